@@ -0,0 +1,113 @@
+#
+# Balancing an equation comes down to finding the nullspace of its element
+# matrix. sympy does that over rational numbers (fractions everywhere), which
+# is slow on big equations and needs sympy loaded. This module does the same
+# linear algebra with integers only: fraction-free Gauss-Jordan elimination,
+# dividing each row by the greatest common divisor of its entries to keep the
+# numbers small. The answer is the exact same set of coefficients sympy gives.
+#
+# Main Libraries:
+# - math: gcd and lcm (Integer arithmetic).
+#
+
+from math import gcd, lcm
+
+def row_content(row):
+	"""
+	:param row: A row of integers.
+	:return: The greatest common divisor of the row's entries (0 if the row is all zeros).
+	"""
+
+	content = 0
+	for value in row:
+		content = gcd(content, value)
+		if content == 1:
+			break
+	return content
+
+def integer_row_reduce(matrix):
+	"""
+	Reduces the matrix to a fraction-free, reduced row echelon form. Each pivot column
+	is only non-zero in its pivot row, like the rational RREF, but pivots aren't scaled to 1.
+
+	:param matrix: The matrix (a list of rows of integers), it's copied and not modified.
+	:return: The reduced rows, and a list of (row, column) pairs for every pivot.
+	"""
+
+	rows = [list(row) for row in matrix]
+	pivots = []
+	column_count = len(rows[0]) if rows else 0
+	pivot_row = 0
+
+	for column in range(column_count):
+		# Find a row that can pivot on this column
+		for index in range(pivot_row, len(rows)):
+			if rows[index][column] != 0:
+				break
+		else:
+			continue # Free column (no pivot)
+
+		rows[pivot_row], rows[index] = rows[index], rows[pivot_row]
+		pivot = rows[pivot_row]
+		pivot_value = pivot[column]
+
+		# Clear the column out of every other row (cross-multiplying, so no fractions)
+		for index, row in enumerate(rows):
+			factor = row[column]
+			if index == pivot_row or factor == 0:
+				continue
+			row = [value * pivot_value - pivot_entry * factor for value, pivot_entry in zip(row, pivot)]
+			content = row_content(row)
+			if content > 1:
+				row = [value // content for value in row]
+			rows[index] = row
+
+		pivots.append((pivot_row, column))
+		pivot_row += 1
+		if pivot_row == len(rows):
+			break
+
+	return rows, pivots
+
+def integer_nullspace_vector(matrix):
+	"""
+	Gets the first nullspace vector of the matrix (the one sympy's nullspace()[0] gives, with
+	the first free variable set), scaled to the smallest integers.
+
+	:param matrix: The matrix (a list of rows of integers), with one column per unknown.
+	:return: A list of integers x, where matrix * x = 0.
+	"""
+
+	rows, pivots = integer_row_reduce(matrix)
+	column_count = len(matrix[0]) if matrix else 0
+	pivot_columns = {column for _, column in pivots}
+	free_columns = [column for column in range(column_count) if column not in pivot_columns]
+	if len(free_columns) == 0:
+		raise Exception("Matrix Solver: The matrix is singular, and cannot be solved. Please ensure the equation is properly typed.")
+	free = free_columns[0]
+
+	# Pivot variables are -row[free] / pivot, so scale the free variable by the LCM of those denominators
+	multiple = 1
+	for row_index, column in pivots:
+		pivot_value = rows[row_index][column]
+		multiple = lcm(multiple, abs(pivot_value) // gcd(pivot_value, rows[row_index][free]))
+
+	solution = [0] * column_count
+	solution[free] = multiple
+	for row_index, column in pivots:
+		solution[column] = -rows[row_index][free] * multiple // rows[row_index][column]
+
+	content = row_content(solution)
+	return [value // content for value in solution]
+
+def integer_balance(element_matrix):
+	"""
+	Balances an equation from its element matrix, with integers only.
+
+	:param element_matrix: One row per substance, one column per element (products negated),
+	as built by Equation.matrix_builder.
+	:return: The balanced coefficients of each substance in the equation (a list of integers, in order).
+	"""
+
+	transposed = [list(column) for column in zip(*element_matrix)] # One row per element, one column per substance
+	return integer_nullspace_vector(transposed)
@@ -0,0 +1,68 @@
+#
+# Balancing one equation is quick, but balancing a whole corpus of them one
+# after another leaves all the other CPU cores sitting around. This module spreads
+# the equations over a pool of processes, and hands back small records (not full
+# Equation objects) so sending results between processes stays cheap. One bad
+# equation doesn't stop the run, its error is just reported in its record.
+#
+# Main Libraries:
+# - concurrent.futures: ProcessPoolExecutor (Parallel balancing).
+# - functools: partial (Picklable worker with options).
+#
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from entities import Equation
+
+class Balanced_Record(namedtuple("Balanced_Record", ["equation", "substances", "coefficients", "balanced", "states", "error"])):
+	"""
+	A balanced equation, in a compact, immutable, and picklable form (error is None if it balanced).
+	Can be handed straight to stoichiometry.solve.
+	"""
+
+	__slots__ = ()
+
+	@property
+	def balanced_dict(self):
+		"""
+		:return: The substances mapped to their balanced coefficients.
+		"""
+
+		return dict(zip(self.substances, self.coefficients))
+
+def balance_record(equation, engine="sympy", cache=None):
+	"""
+	Balances a single equation into a record, catching any error it raises.
+
+	:param equation: The equation string to balance.
+	:param engine: The balancing engine (see Equation).
+	:param cache: An Equation_Cache to share balanced equations through (see Equation).
+	:return: The Balanced_Record of the equation.
+	"""
+
+	try:
+		balanced = Equation(equation, engine=engine, cache=cache)
+	except Exception as error:
+		return Balanced_Record(equation, (), (), "", {}, str(error))
+	return Balanced_Record(equation, tuple(balanced.substances), tuple(int(coefficient) for coefficient in balanced.balanced_coefficients), balanced.balanced, dict(balanced.substance_states), None)
+
+def balance_many(equations, workers=None, chunksize=16, engine="sympy", cache=None):
+	"""
+	Balances many equations across CPU cores, with a pool of processes.
+
+	:param equations: An iterable of equation strings.
+	:param workers: The amount of processes (None for one per CPU core, 1 to stay in this process).
+	:param chunksize: How many equations are sent to a process at a time (bigger chunks, less overhead).
+	:param engine: The balancing engine (see Equation).
+	:param cache: An Equation_Cache shared by every process (each one opens its own connection to the file).
+	:return: A list of Balanced_Records, in the same order as the equations.
+	"""
+
+	worker = partial(balance_record, engine=engine, cache=cache)
+	if workers == 1:
+		return [worker(equation) for equation in equations]
+
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		return list(executor.map(worker, equations, chunksize=chunksize))
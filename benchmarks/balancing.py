@@ -0,0 +1,63 @@
+#
+# Compares the two balancing engines (sympy's rational nullspace and the
+# integer-only one from balancing.py), on the equations from testing.py and
+# bigger generated ones. Both engines must give the same coefficients, and
+# the time each one takes to solve the element matrix is reported.
+#
+# Usage: python benchmarks/balancing.py [--repeat N]
+#
+# Main Libraries:
+# - time: perf_counter (Timing).
+# - argparse: Command line options.
+#
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Stoichify's modules
+
+from corpus import TEST_EQUATIONS, generate_corpus
+from entities import Equation
+
+GENERATED_SIZES = [(6, 4), (10, 8), (16, 12), (24, 16), (32, 18), (40, 20)]
+
+def time_solver(equation, engine, repeat):
+	"""
+	:param equation: The already balanced Equation (its element matrix is reused).
+	:param engine: The engine to time.
+	:param repeat: How many times to solve the matrix.
+	:return: The best time (in seconds) of one solve, and the coefficients.
+	"""
+
+	equation.engine = engine
+	best = float("inf")
+	for _ in range(repeat):
+		start = time.perf_counter()
+		coefficients = equation.matrix_solver()
+		best = min(best, time.perf_counter() - start)
+	return best, [int(coefficient) for coefficient in coefficients]
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark the sympy and integer balancing engines.")
+	parser.add_argument("--repeat", type=int, default=5, help="Times each matrix is solved (the best time is kept).")
+	arguments = parser.parse_args()
+
+	print(f"{'substances':>10} {'elements':>8} {'sympy (ms)':>11} {'integer (ms)':>13} {'speedup':>8}")
+	total_sympy = total_integer = 0
+	for text in TEST_EQUATIONS + generate_corpus(GENERATED_SIZES):
+		equation = Equation(text, engine="integer")
+		sympy_time, sympy_coefficients = time_solver(equation, "sympy", arguments.repeat)
+		integer_time, integer_coefficients = time_solver(equation, "integer", arguments.repeat)
+		if sympy_coefficients != integer_coefficients:
+			raise Exception(f"Engine Mismatch: The engines disagree on '{text}' ({sympy_coefficients} vs {integer_coefficients}).")
+
+		total_sympy += sympy_time
+		total_integer += integer_time
+		print(f"{len(equation.substances):>10} {len(equation.elements):>8} {sympy_time * 1000:>11.3f} {integer_time * 1000:>13.3f} {sympy_time / integer_time:>7.1f}x")
+
+	print(f"{'total':>10} {'':>8} {total_sympy * 1000:>11.3f} {total_integer * 1000:>13.3f} {total_sympy / total_integer:>7.1f}x")
+
+if __name__ == "__main__":
+	main()
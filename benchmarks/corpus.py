@@ -0,0 +1,119 @@
+#
+# Hand-written equations only go so far when measuring speed, so this module
+# generates synthetic (but always balanceable) equations of any size. Products
+# are built out of the reactants themselves (wrapped in nested groups), so there's
+# always a positive set of coefficients. The same seed always gives the same corpus.
+#
+# Main Libraries:
+# - random: Random (Seeded, so every run is the same).
+#
+
+import random
+import re
+
+STATE_LIKE = re.compile(r"(?i)[slgaq]*") # Equation.remove_state would take "(S)" or "(Al)" for a state
+
+# Elements used to build the formulas (in order, the first n are used for n elements)
+ELEMENT_POOL = ["H", "O", "C", "N", "S", "P", "Cl", "Na", "K", "Ca", "Fe", "Cu", "Mg", "Al", "Zn", "Br", "Cr", "Mn", "Si", "Ba", "Li", "Co", "Ni", "Ag"]
+
+# The equations in testing.py
+TEST_EQUATIONS = [
+	"SO2 + O2 -> SO3",
+	"C3H8 + O2 -> CO2 + H2O",
+	"Al + Cl2 -> AlCl3",
+	"K4[Fe(SCN)6] + K2Cr2O7 + H2SO4 → Fe2(SO4)3 + Cr2(SO4)3 + CO2 + H2O + K2SO4 + KNO3",
+]
+
+def subscript(rng):
+	"""
+	:return: A subscript (mostly empty, like real formulas).
+	"""
+
+	return rng.choice(["", "", "2", "3", "4", "6", "12"])
+
+def group(formula):
+	"""
+	:param formula: The formula to group.
+	:return: The formula in parentheses, or in brackets if the parentheses would read as a state (e.g. (S) or (Al)).
+	"""
+
+	if STATE_LIKE.fullmatch(formula):
+		return f"[{formula}]"
+	return f"({formula})"
+
+def random_part(rng, elements, depth):
+	"""
+	Creates one part of a formula, an element or a (possibly nested) group.
+
+	:param rng: The seeded random generator.
+	:param elements: The elements to pick from.
+	:param depth: How deep groups can still be nested.
+	:return: The part of the formula.
+	"""
+
+	if depth > 0 and len(elements) > 1 and rng.random() < 0.3:
+		inner = "".join(random_part(rng, elements, depth - 1) for _ in range(rng.randint(2, 3)))
+		opening, closing = rng.choice([("(", ")"), ("[", "]")])
+		return f"{opening}{inner}{closing}{rng.choice(['2', '3', '4'])}"
+	return f"{rng.choice(elements)}{subscript(rng)}"
+
+def generate_equation(substance_count, element_count, seed=0, depth=2):
+	"""
+	Generates a balanceable equation with the given amount of substances and elements.
+	Reactants are random formulas (sharing all the elements between them), and each product
+	is a couple of reactants grouped together, so setting every product to 1 balances it.
+	Equations need a '+', so the smallest equation has 3 substances.
+
+	:param substance_count: The amount of substances (3 or more).
+	:param element_count: The amount of different elements (2 to len(ELEMENT_POOL)).
+	:param seed: The seed of the generator (same seed, same equation).
+	:param depth: How deep groups can be nested.
+	:return: The unbalanced equation string.
+	"""
+
+	rng = random.Random(f"{seed}-{substance_count}-{element_count}")
+	substance_count = max(3, substance_count)
+	element_count = max(2, min(element_count, len(ELEMENT_POOL)))
+	pool = ELEMENT_POOL[:element_count]
+
+	reactant_count = max(2, substance_count // 2)
+	product_count = substance_count - reactant_count
+
+	# Spread the elements over the reactants, so every element is used
+	shares = [[] for _ in range(reactant_count)]
+	for index, element in enumerate(pool):
+		shares[index % reactant_count].append(element)
+
+	reactants = []
+	for share in shares:
+		elements = share if share else [rng.choice(pool)]
+		formula = ""
+		while formula == "" or formula in reactants:
+			required = "".join(f"{element}{subscript(rng)}" for element in elements)
+			extra = "".join(random_part(rng, pool, depth) for _ in range(rng.randint(0, 2)))
+			formula = f"{required}{extra}"
+		reactants.append(formula)
+
+	# Each product groups together a few reactants (every reactant is used at least once)
+	products = []
+	for index in range(product_count):
+		chosen = {index % reactant_count}
+		chosen.update(rng.sample(range(reactant_count), min(reactant_count, rng.randint(1, 2))))
+		product = ""
+		while product == "" or product in products or product in reactants:
+			product = "".join(f"{group(reactants[reactant])}{rng.choice(['', '2', '3'])}" for reactant in sorted(chosen))
+			chosen.add(rng.randrange(reactant_count))
+		products.append(product)
+	for reactant in range(product_count, reactant_count): # Reactants that haven't landed in any product yet
+		products[-1] += group(reactants[reactant])
+
+	return f"{' + '.join(reactants)} -> {' + '.join(products)}"
+
+def generate_corpus(sizes, seed=0):
+	"""
+	:param sizes: Pairs of (substance count, element count).
+	:param seed: The seed of the generator.
+	:return: A list of generated equations, one per size.
+	"""
+
+	return [generate_equation(substance_count, element_count, seed) for substance_count, element_count in sizes]
@@ -0,0 +1,130 @@
+#
+# Load for the HTTP service (service.py): many connections at once, each sending
+# requests one after another (kept alive), mostly for the same few equations (like
+# a class all doing the same homework), so coalescing and caching get a workout.
+# Reports the throughput, latency percentiles, and how many requests were turned
+# away (503). Starts its own service on 127.0.0.1 unless --url is given.
+#
+# Usage: python benchmarks/load.py [--url http://127.0.0.1:8080] [--connections 32] [--requests 2000] [--unique 8]
+#
+# Main Libraries:
+# - asyncio: Connections (Streams), all at once.
+# - statistics: quantiles (Latency percentiles).
+#
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Stoichify's modules
+
+from corpus import TEST_EQUATIONS, generate_corpus
+from service import Stoichify_Service
+
+def make_requests(count, unique, seed=0):
+	"""
+	:param count: How many requests to make.
+	:param unique: How many different equations they're spread over.
+	:param seed: The seed of the generated equations (and which request gets which).
+	:return: The requests, as (path, body).
+	"""
+
+	equations = (TEST_EQUATIONS + generate_corpus([(5, 4), (8, 6), (12, 8)] * unique, seed))[:unique]
+	generator = random.Random(seed)
+	requests = []
+	for _ in range(count):
+		equation = generator.choice(equations)
+		if generator.random() < 0.25:
+			requests.append(("/molar-mass", {"substance": generator.choice(["H2O", "C6H12O6", "Ca(OH)2", "Fe2(SO4)3"])}))
+		else:
+			requests.append(("/balance", {"equation": equation, "engine": "integer"}))
+	return requests
+
+async def client(host, port, requests, latencies, statuses):
+	"""
+	Sends the requests over one kept-alive connection, one after another.
+
+	:param host: The service's host.
+	:param port: The service's port.
+	:param requests: A shared list of (path, body) to take requests from.
+	:param latencies: Where each request's latency (in seconds) is added.
+	:param statuses: Where each response's status is counted.
+	"""
+
+	reader, writer = await asyncio.open_connection(host, port)
+	try:
+		while requests:
+			path, body = requests.pop()
+			body = json.dumps(body).encode("utf-8")
+			start = time.perf_counter()
+			writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+			await writer.drain()
+			status = int((await reader.readline()).split()[1])
+			length = 0
+			while True:
+				line = await reader.readline()
+				if line in (b"\r\n", b""):
+					break
+				name, _, value = line.decode("latin-1").partition(":")
+				if name.lower() == "content-length":
+					length = int(value)
+			await reader.readexactly(length)
+			latencies.append(time.perf_counter() - start)
+			statuses[status] = statuses.get(status, 0) + 1
+	finally:
+		writer.close()
+
+async def run(host, port, requests, connections):
+	"""
+	:return: The latencies, the count of each status, and the total seconds.
+	"""
+
+	latencies = []
+	statuses = {}
+	start = time.perf_counter()
+	await asyncio.gather(*[client(host, port, requests, latencies, statuses) for _ in range(connections)])
+	return latencies, statuses, time.perf_counter() - start
+
+async def main_async(arguments):
+	requests = make_requests(arguments.requests, arguments.unique, arguments.seed)
+	service = None
+	if arguments.url:
+		url = urlsplit(arguments.url)
+		host, port = url.hostname, url.port or 80
+	else:
+		service = await Stoichify_Service(port=0, workers=arguments.workers, max_concurrency=arguments.max_concurrency, max_queue=arguments.max_queue).start()
+		host, port = "127.0.0.1", service.port
+
+	try:
+		latencies, statuses, seconds = await run(host, port, requests, arguments.connections)
+	finally:
+		if service is not None:
+			await service.close()
+
+	percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+	print(f"{len(latencies)} requests over {arguments.connections} connections in {seconds:.2f} s ({len(latencies) / seconds:.0f} requests/s)")
+	print(f"latency (ms): p50 {percentiles[49] * 1000:.2f}, p90 {percentiles[89] * 1000:.2f}, p99 {percentiles[98] * 1000:.2f}, max {max(latencies) * 1000:.2f}")
+	print(f"statuses: {', '.join(f'{status}: {count}' for status, count in sorted(statuses.items()))} (rejected: {statuses.get(503, 0)})")
+	if service is not None:
+		print(f"service: {service.stats}")
+
+def main():
+	parser = argparse.ArgumentParser(description="Put load on Stoichify's HTTP service.")
+	parser.add_argument("--url", help="A running service (one is started on 127.0.0.1 if left out).")
+	parser.add_argument("--connections", type=int, default=32, help="Connections sending requests at once.")
+	parser.add_argument("--requests", type=int, default=2000, help="Requests to send altogether.")
+	parser.add_argument("--unique", type=int, default=8, help="Different equations the requests are spread over.")
+	parser.add_argument("--seed", type=int, default=0, help="The seed of the requests.")
+	parser.add_argument("--workers", type=int, help="Balancing workers of the started service.")
+	parser.add_argument("--max-concurrency", type=int, default=64, help="Requests the started service works on at once.")
+	parser.add_argument("--max-queue", type=int, default=256, help="Requests that can wait their turn in the started service.")
+	asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+	main()
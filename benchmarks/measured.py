@@ -0,0 +1,69 @@
+#
+# Compares the two ways Stoichify can carry a measured amount through a
+# calculation: the string round trips (Scientific_Handler to a float, counting
+# its significant figures, rounding twice, then back to scientific notation),
+# and a Measured amount, which is parsed once, stays exact through every step,
+# and is only rounded and turned into text at the end.
+#
+# Usage: python benchmarks/measured.py [--number N] [--repeat N]
+#
+# Main Libraries:
+# - timeit: Timing each way.
+# - argparse: Command line options.
+#
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Stoichify's modules
+
+from precision import Scientific_Handler, Significant_Figures, Measured
+
+AMOUNTS = ["4.20", "42", "0.0035", "6.02e23", "4.2 x 10^2", "9.3021 x 10^-27", "123456", "99.95"]
+FACTORS = [18.015, 22.4, 2, 3, 6.02214076e23] # A molar mass, a molar volume, a mole ratio, and Avogadro's number
+
+def legacy(amount):
+	"""
+	:param amount: The amount, as typed.
+	:return: The answer, the way the string round trips work it out.
+	"""
+
+	value = Scientific_Handler(amount).to_float()
+	significant_figures = Significant_Figures().parser(amount)
+	value = value / FACTORS[0] * FACTORS[2] / FACTORS[3] * FACTORS[4] / FACTORS[1]
+	value = round(value, significant_figures)
+	value = Significant_Figures().round(value, significant_figures)
+	return Scientific_Handler(Scientific_Handler(value).to_float()).to_scientific()
+
+def measured(amount):
+	"""
+	:param amount: The amount, as typed.
+	:return: The answer, worked out with a Measured amount.
+	"""
+
+	value = Measured.parse(amount)
+	value = value / FACTORS[0] * FACTORS[2] / FACTORS[3] * FACTORS[4] / FACTORS[1]
+	return str(value)
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark the string round trips against Measured amounts.")
+	parser.add_argument("--number", type=int, default=2000, help="Passes over the amounts per timing.")
+	parser.add_argument("--repeat", type=int, default=5, help="Timings per way (the best is kept).")
+	arguments = parser.parse_args()
+
+	print(f"{'amount':<18} {'string round trips':>22} {'Measured':>22}")
+	for amount in AMOUNTS:
+		print(f"{amount:<18} {str(legacy(amount)):>22} {measured(amount):>22}")
+
+	print(f"\n{'way':<20} {'µs per amount':>14}")
+	timings = {}
+	for name, function in (("string round trips", legacy), ("Measured", measured)):
+		best = min(timeit.repeat(lambda: [function(amount) for amount in AMOUNTS], number=arguments.number, repeat=arguments.repeat))
+		timings[name] = best / (arguments.number * len(AMOUNTS)) * 1e6
+		print(f"{name:<20} {timings[name]:>14.2f}")
+	print(f"\nMeasured takes {timings['Measured'] / timings['string round trips']:.2f}x the time of the string round trips.")
+
+if __name__ == "__main__":
+	main()
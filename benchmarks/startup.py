@@ -0,0 +1,79 @@
+#
+# Measures how long it takes to start using Stoichify, in a fresh Python
+# process each time (so nothing is already imported). Importing entities
+# should only cost about as much as re and unicodedata, with sympy and chemlib
+# (plus pandas) only loaded by the first balance and the first molar mass.
+#
+# Usage: python benchmarks/startup.py [--repeat N]
+#
+# Main Libraries:
+# - subprocess: Fresh Python processes (Cold imports).
+# - argparse: Command line options.
+#
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # Stoichify's modules
+
+# Each scenario runs in its own process, and reports its timings as JSON
+SCENARIO = """
+import json, sys, time
+start = time.perf_counter()
+import entities
+imported = time.perf_counter()
+{code}
+finished = time.perf_counter()
+print(json.dumps({{"import": imported - start, "first_call": finished - imported, "heavy": sorted(module for module in ("sympy", "chemlib", "pandas", "numpy") if module in sys.modules)}}))
+"""
+
+SCENARIOS = {
+	"import entities": "",
+	"significant figures": "from precision import Significant_Figures; Significant_Figures().parser('4.20 x 10^3')",
+	"molar mass": "entities.Substance('C6H12O6').molar_mass()",
+	"integer balance": "entities.Equation('C3H8 + O2 -> CO2 + H2O', engine='integer')",
+	"sympy balance": "entities.Equation('C3H8 + O2 -> CO2 + H2O')",
+}
+
+def run(code):
+	"""
+	:param code: The code to run after importing entities.
+	:return: The timings of the scenario (in a fresh process).
+	"""
+
+	output = subprocess.run([sys.executable, "-c", SCENARIO.format(code=code)], cwd=ROOT, capture_output=True, text=True, check=True)
+	return json.loads(output.stdout)
+
+def import_time(module):
+	"""
+	:param module: The module to import.
+	:return: The cumulative import time of the module (in seconds), as reported by -X importtime.
+	"""
+
+	output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, capture_output=True, text=True, check=True)
+	for line in output.stderr.splitlines():
+		fields = [field.strip() for field in line.split("|")]
+		if len(fields) == 3 and fields[2] == module:
+			return int(fields[1]) / 1e6
+	return 0.0
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark Stoichify's startup time.")
+	parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per scenario (the best time is kept).")
+	arguments = parser.parse_args()
+
+	print("-X importtime (cumulative, best of runs):")
+	for module in ["re", "unicodedata", "entities"]:
+		print(f"  {module:<12} {min(import_time(module) for _ in range(arguments.repeat)) * 1000:8.2f} ms")
+
+	print(f"\n{'scenario':<20} {'import (ms)':>12} {'first call (ms)':>16}  loaded")
+	for name, code in SCENARIOS.items():
+		results = [run(code) for _ in range(arguments.repeat)]
+		best = min(results, key=lambda result: result["import"] + result["first_call"])
+		print(f"{name:<20} {best['import'] * 1000:>12.2f} {best['first_call'] * 1000:>16.2f}  {', '.join(best['heavy']) or '-'}")
+
+if __name__ == "__main__":
+	main()
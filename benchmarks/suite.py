@@ -0,0 +1,168 @@
+#
+# The whole benchmark suite: parsing formulas, molar masses, balancing (with both
+# engines), end-to-end stoichiometry, and reading amounts in bulk, over the equations
+# from testing.py and generated ones growing from 3 to 40 substances and 2 to 20
+# elements (with nested groups). The timings can be written to JSON, and compared against an earlier run
+# (the baseline), flagging anything that got slower by more than the threshold.
+#
+# Usage: python benchmarks/suite.py [--repeat N] [--output FILE] [--baseline FILE] [--threshold 0.1] [--only NAME]
+#
+# Main Libraries:
+# - timeit: Timer (Picks how many loops are needed, and times them).
+# - json: Results and baselines.
+# - argparse: Command line options.
+#
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Stoichify's modules
+
+from corpus import TEST_EQUATIONS, generate_corpus
+from entities import Equation
+from formula import COMPOSITION_CACHE, compile_formula, compute_composition, tokenize
+from precision import Scientific_Handler, Significant_Figures, parse_amounts
+
+# Amounts in every notation Stoichify takes, like a column of a CSV export
+AMOUNTS = ["4.2 x 10^2", "4.2e2", "4.2*10^-27", "42", "4.20", "0.0035", "6.02 x 10^23", "150000000", "9.3021e-27", "25.0"] * 100
+
+# (substances, elements) of the generated equations
+GENERATED_SIZES = [(3, 2), (5, 4), (8, 6), (12, 8), (16, 10), (20, 12), (24, 14), (30, 16), (36, 18), (40, 20)]
+
+def parse_formulas(formulas):
+	"""
+	Parses every formula from scratch (the parsing caches are cleared first).
+
+	:param formulas: The formulas to parse.
+	"""
+
+	tokenize.cache_clear()
+	compile_formula.cache_clear()
+	for formula in formulas:
+		compile_formula(formula)
+
+def molar_masses(canonicals):
+	"""
+	Sums up the molar mass of every (already parsed) formula, without the composition cache.
+
+	:param canonicals: The canonical formulas.
+	"""
+
+	for canonical in canonicals:
+		compute_composition(canonical)
+
+def stoichify(equation, engine):
+	"""
+	Balances the equation, and converts grams of its first reactant to grams of its last product (that are used).
+
+	:param equation: The unbalanced equation.
+	:param engine: The balancing engine.
+	"""
+
+	balanced = Equation(equation, engine=engine)
+	used = [substance for substance in balanced.substances if balanced.balanced_dict[substance]] # Generated equations can leave a substance out (a coefficient of 0)
+	balanced.stoichify(25, 2, "g", used[0], "g", used[-1])
+
+def read_amounts(amounts):
+	"""
+	Reads every amount one at a time (to a float, then its significant figures), the way parse_amounts doesn't have to.
+
+	:param amounts: The amounts.
+	"""
+
+	for amount in amounts:
+		Scientific_Handler(amount).to_float()
+		Significant_Figures().parser(amount)
+
+def benchmarks(equations):
+	"""
+	:param equations: The equations, keyed by their label.
+	:return: The benchmarks (name: function to time), for every equation.
+	"""
+
+	cases = {}
+	for label, equation in equations.items():
+		substances = Equation(equation, engine="integer").substances
+		canonicals = [compile_formula(substance).canonical for substance in substances]
+		cases[f"parse/{label}"] = lambda substances=substances: parse_formulas(substances)
+		cases[f"molar_mass/{label}"] = lambda canonicals=canonicals: molar_masses(canonicals)
+		cases[f"balance.integer/{label}"] = lambda equation=equation: Equation(equation, engine="integer")
+		cases[f"balance.sympy/{label}"] = lambda equation=equation: Equation(equation, engine="sympy")
+		cases[f"stoichiometry/{label}"] = lambda equation=equation: stoichify(equation, "integer")
+	cases["amounts.one_by_one"] = lambda: read_amounts(AMOUNTS)
+	cases["amounts.parse_amounts"] = lambda: parse_amounts(AMOUNTS)
+	return cases
+
+def measure(function, repeat):
+	"""
+	:param function: The function to time.
+	:param repeat: How many times to time it.
+	:return: The best and median time of one call (in seconds), and the loops per timing.
+	"""
+
+	timer = timeit.Timer(function)
+	loops, _ = timer.autorange() # At least 0.2 seconds per timing
+	timings = [timing / loops for timing in timer.repeat(repeat=repeat, number=loops)]
+	return {"best": min(timings), "median": statistics.median(timings), "loops": loops}
+
+def compare(results, baseline, threshold):
+	"""
+	:param results: The results of this run.
+	:param baseline: The results of an earlier run.
+	:param threshold: How much slower (e.g. 0.1 for 10%) a benchmark can get before it's flagged.
+	:return: The benchmarks that got slower than the threshold, as (name, baseline best, best, ratio).
+	"""
+
+	regressions = []
+	for name, result in results.items():
+		if name in baseline:
+			ratio = result["best"] / baseline[name]["best"]
+			if ratio > 1 + threshold:
+				regressions.append((name, baseline[name]["best"], result["best"], ratio))
+	return regressions
+
+def main():
+	parser = argparse.ArgumentParser(description="Run Stoichify's benchmark suite.")
+	parser.add_argument("--repeat", type=int, default=5, help="Timings per benchmark (the best and median are kept).")
+	parser.add_argument("--seed", type=int, default=0, help="The seed of the generated equations.")
+	parser.add_argument("--output", help="Write the results to this JSON file.")
+	parser.add_argument("--baseline", help="Compare against the results in this JSON file.")
+	parser.add_argument("--threshold", type=float, default=0.1, help="How much slower than the baseline counts as a regression (0.1 = 10%%).")
+	parser.add_argument("--only", help="Only run the benchmarks whose name contains this.")
+	arguments = parser.parse_args()
+
+	equations = {f"test-{index + 1}": equation for index, equation in enumerate(TEST_EQUATIONS)}
+	for (substance_count, element_count), equation in zip(GENERATED_SIZES, generate_corpus(GENERATED_SIZES, arguments.seed)):
+		equations[f"{substance_count}x{element_count}"] = equation
+
+	results = {}
+	print(f"{'benchmark':<32} {'best (ms)':>11} {'median (ms)':>12}")
+	for name, function in benchmarks(equations).items():
+		if arguments.only and arguments.only not in name:
+			continue
+		COMPOSITION_CACHE.clear()
+		results[name] = measure(function, arguments.repeat)
+		print(f"{name:<32} {results[name]['best'] * 1000:>11.4f} {results[name]['median'] * 1000:>12.4f}")
+
+	if arguments.output:
+		with open(arguments.output, "w", encoding="utf-8") as file:
+			json.dump({"python": platform.python_version(), "machine": platform.machine(), "seed": arguments.seed, "repeat": arguments.repeat, "results": results}, file, indent="\t")
+
+	if arguments.baseline:
+		with open(arguments.baseline, encoding="utf-8") as file:
+			baseline = json.load(file)["results"]
+		regressions = compare(results, baseline, arguments.threshold)
+		for name, before, after, ratio in regressions:
+			print(f"REGRESSION {name}: {before * 1000:.4f} ms -> {after * 1000:.4f} ms ({ratio:.2f}x)")
+		if regressions:
+			return 1
+		print(f"No regressions over {arguments.threshold:.0%} (against {arguments.baseline}).")
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
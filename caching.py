@@ -0,0 +1,118 @@
+#
+# A few thousand compounds can show up millions of times, so it's a waste
+# to calculate the same things about them over and over. This module holds a
+# small, bounded, thread-safe LRU (Least Recently Used) cache that keeps track
+# of its hits and misses, so you can see how well it's doing.
+#
+# Main Libraries:
+# - collections: OrderedDict (Keeps the usage order of the cache).
+# - threading: Lock (Safe to share between threads).
+#
+
+from collections import OrderedDict, namedtuple
+import threading
+
+Cache_Info = namedtuple("Cache_Info", ["hits", "misses", "maxsize", "currsize"])
+
+class LRU_Cache():
+	"""
+	A bounded mapping that forgets its least recently used entries once it's full.
+	Every lookup is counted as a hit or a miss.
+	"""
+
+	def __init__(self, maxsize=4096):
+		"""
+		:param maxsize: The maximum amount of entries kept (must be at least 1).
+		"""
+
+		if maxsize < 1:
+			raise Exception("Cache Size Check: The cache must be able to hold at least one entry.")
+		self.maxsize = maxsize
+		self.entries = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.lock = threading.Lock()
+
+	def __len__(self):
+		return len(self.entries)
+
+	def __contains__(self, key):
+		return key in self.entries
+
+	def get(self, key, default=None):
+		"""
+		:param key: The key to look up.
+		:param default: What to give back if the key isn't cached.
+		:return: The cached value (marking it as recently used), or the default.
+		"""
+
+		with self.lock:
+			try:
+				value = self.entries[key]
+			except KeyError:
+				self.misses += 1
+				return default
+			self.entries.move_to_end(key)
+			self.hits += 1
+			return value
+
+	def put(self, key, value):
+		"""
+		Caches the value, forgetting the least recently used entry if the cache is full.
+
+		:param key: The key to cache the value under.
+		:param value: The value to cache.
+		"""
+
+		with self.lock:
+			self.entries[key] = value
+			self.entries.move_to_end(key)
+			while len(self.entries) > self.maxsize:
+				self.entries.popitem(last=False)
+
+	def get_or_compute(self, key, compute):
+		"""
+		Gets the cached value, or computes and caches it upon a miss. The computation
+		happens outside of the lock, so a slow one doesn't hold up other threads.
+
+		:param key: The key to look up.
+		:param compute: A function of the key, called upon a miss.
+		:return: The cached (or freshly computed) value.
+		"""
+
+		missing = object()
+		value = self.get(key, missing)
+		if value is missing:
+			value = compute(key)
+			self.put(key, value)
+		return value
+
+	def resize(self, maxsize):
+		"""
+		:param maxsize: The new maximum amount of entries (extra entries are forgotten).
+		"""
+
+		if maxsize < 1:
+			raise Exception("Cache Size Check: The cache must be able to hold at least one entry.")
+		with self.lock:
+			self.maxsize = maxsize
+			while len(self.entries) > self.maxsize:
+				self.entries.popitem(last=False)
+
+	def clear(self):
+		"""
+		Forgets all entries, and resets the hit/miss counts.
+		"""
+
+		with self.lock:
+			self.entries.clear()
+			self.hits = 0
+			self.misses = 0
+
+	def info(self):
+		"""
+		:return: The hits, misses, maximum size, and current size of the cache.
+		"""
+
+		with self.lock:
+			return Cache_Info(self.hits, self.misses, self.maxsize, len(self.entries))
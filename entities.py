@@ -9,34 +9,50 @@
 # Main Libraries:
 # - unicodedata: Used to check for UNICODE characters in the equation, like arrows.
 # - re: Regular Expressions (String Checking).
-# - sympy: Symbolic Mathematics (Equations - https://www.sympy.org/en/index.html).
-# - chemlib: Chemical Library (Molar Masses - https://github.com/harirakul/chemlib/tree/master).
+# - sympy: Symbolic Mathematics (Equations - https://www.sympy.org/en/index.html), only loaded by the sympy balancing engine.
+# - periodic_table: Index of chemlib's periodic table (Molar Masses - https://github.com/harirakul/chemlib/tree/master).
+# - formula: Formula lexer/parser (Elemental Makeups).
+# - balancing: Integer-only nullspace (Alternative balancing engine).
+# - equation_cache: Persistent cache of balanced equations (Optional).
+# - instrumentation: Stage timings (Off by default).
+# - units: The measurements Stoichify can convert between (Unit graph).
 #
 
-# Mathematical Libraries
-import sympy
-from sympy import Matrix, lcm
-from chemlib import Element 
-
 # String Handling Libraries
 import unicodedata
 import re
 
+# Data Structure Libraries
+from types import MappingProxyType # Read-only balanced dictionaries
+from weakref import WeakValueDictionary # Interned substances
+import threading
+
 # Logical Libraries
-from precision import Significant_Figures 
-from stoichiometry import Stoichify
+from fractions import Fraction
+from precision import Significant_Figures, Measured
+from units import UNITS, STP, AVOGADRO
+from stoichiometry import Stoichify, solve, plan
+from balancing import integer_balance
+from caching import LRU_Cache
+from equation_cache import canonical_equation
+from instrumentation import timed
+from periodic_table import atomic_number
+from formula import compile_formula, formula_molar_mass, formula_vector, tokenize, leading_coefficient, subscript_formula, without_coefficient, SUBSCRIPT_DIGITS
 
 #
 # Constants
-#   Required scientific numbers used to bridge needed calculations.
+#   The scientific numbers used to bridge calculations (STP and AVOGADRO) live in units.py.
 #
 
-STP = 22.4 # Standard Temperature and Pressure (L/mol)
-AVOGADRO = 6.02e23 # Avogadro's number (particles/mol)]
+BALANCING_ENGINES = ("sympy", "integer") # Engines that can solve the element matrix
 
-# RegEx Patterns
-UPPERCASE = "^[A-Z]$"
-LOWERCASE = "^[a-z]$"
+# Every Substance alive, by its formula text (forgotten once nothing uses it anymore). Not by its canonical
+# formula: a substance is its text (it equals and hashes as it, and shows it back), so H₂O and 2H2O can't be
+# the same object as H2O. What's worth sharing between them (the molar mass and composition) is already kept
+# by canonical formula, in formula.py's COMPOSITION_CACHE.
+INTERNED_SUBSTANCES = WeakValueDictionary()
+INTERNING_LOCK = threading.Lock()
+RECENT_SUBSTANCES = LRU_Cache(maxsize=1024) # Keeps the most recently made substances alive, as most are thrown away right after use
 
 class Substance():
 	"""
@@ -44,18 +60,72 @@ class Substance():
 	In which, you can perform informational extractions, manipulations, and calculations. 
 	All pertaining to the substance's properties and characteristics, like its coefficients, 
 	subscripts, and elemental makeup which leads to performing stoichiometry measurements conversions.
+
+	Substances can't be changed once made, and there's only ever one alive per formula text
+	(Substance("H2O") is Substance("H2O")), so a formula is only parsed once while it's in use.
+	Different texts of the same formula (H₂O, H2O1) are different substances, but share one
+	molar mass and composition (see formula.composition).
+	Methods that used to change the substance give back a new one instead. A substance equals,
+	and hashes the same as, its formula text, so either can be used as a dictionary key.
 	"""
+
+	__slots__ = ("substance", "balanced_dict", "_compiled", "__weakref__")
 	
-	def __init__(self, substance):
+	def __new__(cls, substance):
 		"""	
 		:param substance: The substance to be analyzed, manipulated, and calculated.
 		"""
-		self.substance = str(substance) # Stringifed substance, to ensure it's a string
-		self.balanced_dict = {substance: self.substance_coefficient()} # Balanced dictionary of the substance
-		self.work_shown = [] # Work shown in the stoichiometry calculations
+
+		substance = str(substance) # Stringifed substance, to ensure it's a string
+		interned = INTERNED_SUBSTANCES.get(substance)
+		if interned is not None:
+			return interned
+
+		self = super().__new__(cls)
+		object.__setattr__(self, "substance", substance)
+		object.__setattr__(self, "_compiled", None) # Parsed upon first use
+		object.__setattr__(self, "balanced_dict", MappingProxyType({substance: self.substance_coefficient()})) # Balanced dictionary of the substance (read-only)
+		with INTERNING_LOCK:
+			self = INTERNED_SUBSTANCES.setdefault(substance, self) # Another thread may have beaten us to it
+		RECENT_SUBSTANCES.put(substance, self)
+		return self
   
+	def __setattr__(self, name, value):
+		raise AttributeError(f"Substance Check: Substances can't be changed ('{self.substance}'). Make a new Substance instead.")
+
+	def __delattr__(self, name):
+		raise AttributeError(f"Substance Check: Substances can't be changed ('{self.substance}'). Make a new Substance instead.")
+
+	def __reduce__(self): # Pickled (and copied) by its formula text
+		return (Substance, (self.substance,))
+
 	def __str__(self):	# String representation of the substance, used for formatting
 		return self.substance
+
+	def __repr__(self):
+		return f"Substance({self.substance!r})"
+
+	def __eq__(self, other):
+		if isinstance(other, Substance):
+			return self.substance == other.substance
+		if isinstance(other, str):
+			return self.substance == other
+		return NotImplemented
+
+	def __hash__(self):
+		return hash(self.substance)
+
+	@property
+	def compiled(self):
+		"""
+		:return: The parsed formula of the substance (see formula.py), kept on the substance after the first parse.
+		"""
+
+		compiled = self._compiled
+		if compiled is None:
+			compiled = compile_formula(self.substance)
+			object.__setattr__(self, "_compiled", compiled)
+		return compiled
   
 	def substance_coefficient(self):
 		"""
@@ -66,10 +136,10 @@ class Substance():
 		:return: The coefficient of the substance.
 		"""
   
-		coefficient_match = re.match(r"(\d+)[A-Z]", self.substance) # Match the coefficient of the substance (e.g. 2H2O, 33CO2, etc.)
+		coefficient_token = leading_coefficient(tokenize(self.substance)) # Match the coefficient of the substance (e.g. 2H2O, 33CO2, 2(NH4)2SO4, etc.)
 		coefficient = 1
-		if coefficient_match:
-			coefficient = int(coefficient_match.group(1))
+		if coefficient_token:
+			coefficient = int(coefficient_token.text)
    
 		return coefficient
   
@@ -79,22 +149,23 @@ class Substance():
 		assume the coefficient is 1, to start calculating the
 		elemental balances.
   
-		:return: The substance without the coefficient.
+		:return: The substance without the coefficient (a new Substance, or itself if it had none).
  		"""
    
-		self.substance = re.sub(r'^\d+(?=[A-Z])', '', self.substance) # Similar to the coefficient method, but we remove it
-		return self.substance
+		if leading_coefficient(tokenize(self.substance)): # Similar to the coefficient method, but we remove it
+			return Substance(without_coefficient(self.substance))
+		return self
   
 	def add_subscripts(self):
 		"""
-		Replace all positive integers in the substance with their
+		Replace all subscript integers in the substance with their
 		respective subscript versions. This is only used for display purposes.
+		Coefficients and hydrate counts are left as regular integers.
   
-		:return: The substance with subscripts, instead of integers.
+		:return: The substance with subscripts, instead of integers (a new Substance).
 		"""
-		subscript_digits = str.maketrans("0123456789", "₀₁₂₃₄₅₆₇₈₉") # Translate integers to subscripts
-		self.substance = str(self.substance).translate(subscript_digits) # Apply it
-		return self.substance
+
+		return Substance(subscript_formula(self.substance))
 
 	def replace_subscripts(self):
 		"""
@@ -102,12 +173,10 @@ class Substance():
 		Usually done to perform calculations with the substance, as 
 		subscripts are not recognized as integers.
   
-		:return: The substance with integers, instead of subscripts.
+		:return: The substance with integers, instead of subscripts (a new Substance).
 		"""
 		
-		subscript_digits = str.maketrans("₀₁₂₃₄₅₆₇₈₉", "0123456789") # Translate it back
-		self.substance = str(self.substance).translate(subscript_digits) # Apply it
-		return self.substance
+		return Substance(self.substance.translate(SUBSCRIPT_DIGITS))
 
 	def calculation_presentation(self):
 		"""
@@ -117,64 +186,30 @@ class Substance():
   
 		:return: The substance in a presentable form.
 		"""
-		substance = Substance(self.substance) # Initialize a new instance of the substance
-		substance.remove_coefficients()
-		substance.add_subscripts()
-		return str(substance)
+		return subscript_formula(without_coefficient(self.substance))
 
 	def element_scanner(self, output=None):
 		"""
-		Takes a string (AKA a substance) and first scans for a capital character.
-		Upon finding a capital letter, it checks the next character's capitalization state 
-		to see if it's a two-lettered element. If the second character isn't a lowercase 
-		character it's a single element. 
+		Gets the elements of the substance, read off its parsed formula (see formula.py).
+		Every element is checked against the periodic table while parsing.
 	
 		:param output: The output of the element scanner, which can be raw
-		(includes not found elements marked in "-") or unique (all unique elements).
+		(includes every digit marked in "-") or unique (all unique elements).
 		:return: A list of elements found in the substance, based on the output param.
 		"""
-		elements = [] # Only includes found elements
-		for index, char in enumerate(self.substance):
-			if re.match(UPPERCASE, char):
-				element = char
-				# Check to see if the character next to the element is lowercase (two-lettered element)
-				if index + 1 < len(self.substance) and re.match(LOWERCASE, self.substance[index + 1]):
-					element = f"{char}{self.substance[index + 1]}"
-
-				# Check to see if the element is valid (from the periodic table, however isn't foolproof)
-				try:
-					element_verification = Element(element) 
-				except Exception:
-					raise Exception(f"Element Verification: The element '{element}' is not found in the periodic table. Please ensure the element is spelled/capitalized correctly.")
-	
-				if output == "unique":
-					# Don't include duplicates
-					if element not in elements:
-						elements.append(element)
-				else:
-					elements.append(element)
-     
-			elif re.match(LOWERCASE, char): # If the character is lowercase, we can't process without context
-				continue
-			elif str(char).isdigit(): # If it's not a letter, then it's not an element
-				if output == "raw":
-					elements.append("-")
-				else:
-					continue
-
-		if len(elements) == 0:
-			raise Exception("Element(s) Not Found: No elements were found in the substance. Please ensure the substance is spelled correctly.")
-
-		if all(element == "-" for element in element):
-			raise Exception("Element(s) Not Found: No elements were found in the substance. Please ensure the substance is spelled correctly.")
 
-		return elements
+		compiled = self.compiled # Parsed once, then kept
+		if output == "raw":
+			return list(compiled.raw_elements)
+		elif output == "unique":
+			return list(compiled.unique_elements)
+		return list(compiled.elements)
 
 	def substance_scanner(self, makeups=None, side=None):
 		"""
-		Scans through the given substance, first extracting all occurring elements.
-		Then, it scans through the substance to find the coefficients, subscripts, and multipliers
-		associated with each element.
+		Gets the coefficients, subscripts, and multipliers associated with each element
+		of the substance, read off its parsed formula (see formula.py). The multiplier 
+		of an element is the product of every group (and hydrate count) it's nested in.
 
 		:param makeups: An optional dictionary to store the elemental makeup of the substance, on 
 		their respective side (reactants or products). If not provided, the function will return the 
@@ -187,121 +222,90 @@ class Substance():
 		:return: Gives the elemental makeup of the substance, stored in the makeups dictionary, if provided.
 		"""
 
-		substance_coefficient = 1
-		element_multiplier = 1 # If parentheses aren't detected, the subscript is 1 by default
-		elements = self.element_scanner("raw") # Get all occurring not found and found elements
-		element_index = 0
-  
-		if makeups != None:
-			makeups[side][self.substance] = []
-		substance_elemental_makeup = []
- 
-		for index, char in enumerate(self.substance):
-			element_subscript = 1 # Same as coefficients; if not provided; it's 1.
-			string_dilation = 1 # Used to traverse the string
-
-			if re.match(LOWERCASE, char):
-				continue
-			elif char == "(":
-				closing_parenthesis_index = str(self.substance).index(")")
-				try:
-					element_multiplier = int(self.substance[closing_parenthesis_index + 1])
-				except Exception:
-					raise Exception("Element Multiplier Error: The element multiplier is not found. Most likely due to a parsing error with substance states. Make sure to close all parentheses.")
-				continue
-			elif char == ")":
-				element_multiplier = 1 # Reset the multiplier
-				continue
-			elif char == "[" or char == "]": # If a closing bracket is detected, it's a complex ion
-				continue
-			elif char != "(" and char != ")":
-				if element_index < len(elements):
-					element = elements[element_index] # Get the element from the elements list
-					element_index += 1
-	
-					if element == "-": # Ignore elements that aren't found (trust me bro, the scanner works (at least I hope))
-						continue
-					else:
-						if len(element) == 2: # Move pointer over 2, to get to the end of the two-lettered elements
-							string_dilation = 2
-							if string_dilation + index > len(self.substance) - 1: # Ensure range
-								string_dilation = 1
-						if index + 1 < len(self.substance) and str(self.substance[index + string_dilation]).isdigit(): # Check if next char is a number, while in range.
-							# Account for multiple digit subscripts (e.g. C6H12O6, C12H22O11, etc.)
-							subscripts = ""
-							subscript_index = index + string_dilation
-							while subscript_index < len(self.substance) and str(self.substance[subscript_index]).isdigit(): # Loop through as long as the next character is a number
-								subscripts += self.substance[subscript_index]
-								subscript_index += 1
-							element_subscript = int(subscripts)
-						else: # If not a number, the subscript is 1.
-							element_subscript = element_subscript
-						element_data = (substance_coefficient, element_subscript, element_multiplier)
-						if makeups != None:
-							if side == "reactants" or side == "products":
-								makeups[side][self.substance].append((element, element_data))
-						else:
-							substance_elemental_makeup.append((element, element_data))
-						
+		substance_elemental_makeup = list(self.compiled.makeup)
+
 		if makeups == None:
 			return substance_elemental_makeup
-		else:
-			return makeups
 
-	def measurement_converter(self, amount, measurement, type, work_shown: list):
+		if side == "reactants" or side == "products":
+			makeups[side][self.substance] = substance_elemental_makeup
+		return makeups
+
+	def molar_mass(self):
+		"""
+		Gets the molar mass of the substance (without its coefficient), 
+		from the composition cache (see formula.py).
+  
+		:return: The molar mass of the substance (g/mol).
+		"""
+
+		return formula_molar_mass(self.substance)
+
+	def element_vector(self):
+		"""
+		Gets how many of each element the substance (without its coefficient) has,
+		from the composition cache (see formula.py).
+
+		:return: The element counts, as an array('i') indexed by atomic number (shared, don't modify it).
+		"""
+
+		return formula_vector(self.substance)
+
+	def measurement_converter(self, amount, measurement, type, work_shown=None):
 		"""
-		Take a substance's measurement (L, r.p., g), and amount and
-		turn it into moles (mol). All with predefined scientific constants,
+		Take a substance's measurement (any in the unit graph, see units.py, like L, r.p., g, or mg),
+		and amount and turn it into moles (mol), or back. All with predefined scientific constants,
 		like STP, Avogadro's number, and the molar masses of elements. All molar masses
 		are provided by the chemlib library to ensure accuracy and precision in the calculations
 		(https://github.com/harirakul/chemlib/tree/master).
   
-		:param amount: The amount of the substance, you have (usually a float or integer).
-		:param measurement: The measurement of the substance (L, r.p., g).
-		:param type: The type of conversion (* (multiplication), / (division)).
-		:return: The amount of the substance in moles, and the significant figures after conversion.
+		:param amount: The amount of the substance, you have (usually a float or integer, or a Measured to keep it exact).
+		:param measurement: The measurement of the substance (L, r.p., g, ...).
+		:param type: The type of conversion (* (moles to the measurement), / (the measurement to moles)).
+		:param work_shown: The list of steps to record the Conversion_Factors in (None to not record them).
+		:return: The amount of the substance in moles (or in the measurement, for *).
 		"""
 
-		# Imported here to avoid circular imports
-		from precision import Scientific_Handler # Import the scientific handler to for changing numbers into scientific notation (if needed)
-		current_substance = Substance(self.substance).calculation_presentation() # Put it in a presentable form
-
 		#
 		# Calculation + Presentation
-		#   Below the code takes a measurement and amount, and based on type calculates it.
-		#   Moreover, the type also applies to the presentation of the fraction, which is 
-		#   required for each type. 
- 
-		if measurement == "L": # Liters to moles
-			amount = amount * STP if type == "*" else amount / STP if type == "/" else amount
-			if type == "*":
-				work_shown = f"{STP}L {current_substance}", f"1 mol {current_substance}"
-			elif type == "/":
-				work_shown = f"1 mol {current_substance}", f"{STP}L {current_substance}"
-		elif measurement == "r.p.": # Atoms / Representative Particles to moles
-			amount = amount * AVOGADRO if type == "*" else amount / AVOGADRO if type == "/" else amount 
-			if type == "*":
-				work_shown.append((f"{Scientific_Handler(float(AVOGADRO)).to_scientific()} r.p. {current_substance}", f"1 mol {current_substance}"))
-			elif type == "/":
-				work_shown.append((f"1 mol {current_substance}", f"{Scientific_Handler(float(AVOGADRO)).to_scientific()} r.p. {current_substance}"))
-		elif measurement == "g": # Grams to moles
-			elemental_makeup = self.substance_scanner()
-			molar_masses = []
-			molar_mass = 0
-
-			# Get the molar mass of each element in the substance (also accounts for the subscript)
-			for element in elemental_makeup:
-				atomic_mass = Element(element[0]).properties['AtomicMass'] # Get the atomic mass of the element to be converted to molar mass
-				molar_masses.append(atomic_mass)
-				molar_mass += atomic_mass * element[1][1] * element[1][2] # Calculate the molar mass of the substance (subscript * multiplier * atomic mass)
-
-			amount = amount * molar_mass if type == "*" else amount / molar_mass if type == "/" else amount
-			if type == "*":
-				work_shown.append((f"{molar_mass} g {current_substance}", f"1 mol {current_substance}"))
-			elif type == "/":
-				work_shown.append((f"1 mol {current_substance}", f"{molar_mass}g {current_substance}"))
-
-		return amount
+		#   Below the code finds the way from moles to the measurement (once, see units.py),
+		#   and multiplies or divides by its factor. The conversion factors (e.g. 1 mol over 22.4 L)
+		#   are recorded the right way up for the type, and only turned into text when the work is shown.
+
+		if type not in ("*", "/"):
+			return amount
+		factor = self.conversion_factor(measurement, type, work_shown)
+		if factor is None: # Already in moles
+			return amount
+
+		factor = factor if isinstance(amount, (Measured, Fraction)) else float(factor)
+		return amount * factor if type == "*" else amount / factor
+
+	def conversion_factor(self, measurement, type, work_shown=None):
+		"""
+		Gets the factor between a measurement (any in the unit graph, see units.py) of the substance and moles.
+
+		:param measurement: The measurement of the substance (L, r.p., g, ...).
+		:param type: The type of conversion (* (moles to the measurement), / (the measurement to moles)), for the work shown.
+		:param work_shown: The list of steps to record the Conversion_Factors in (None to not record them).
+		:return: How many of the measurement one mole is, exactly (None for moles).
+		"""
+
+		path = self.conversion_path("mol", measurement)
+		if not path.steps:
+			return None
+		if work_shown is not None:
+			work_shown.extend(path.steps if type == "*" else self.conversion_path(measurement, "mol").steps)
+		return path.factor
+
+	def conversion_path(self, unit, other):
+		"""
+		:param unit: The measurement to convert from (e.g. g).
+		:param other: The measurement to convert to (e.g. mol).
+		:return: The Conversion_Path between them for this substance, its exact factor and steps (see units.py).
+		"""
+
+		return UNITS.path(unit, other, without_coefficient(self.substance))
 
 	def stoichify(self, given_amount, given_significant_figures, given_measurement, given_substance, wanted_measurement, wanted_substance):
 		"""
@@ -318,11 +322,26 @@ class Substance():
 		:param given_substance: The given substance to convert to the wanted substance.
 		:param wanted_measurement: The measurement of the wanted substance (L, r.p., g).
 		:param wanted_substance: The wanted substance to convert the given substance to.
-		:return: The amount of the wanted substance, with the amount (in the correct significant figures) and the measurement with substance (e.g. 42.8 g H2O).
+		:return: A fresh Stoichiometry_Result, with the amount of the wanted substance (in the correct significant figures) and the measurement with substance (e.g. 42.8 g H2O), and the work shown.
 		"""
 
-		answer, self.work_shown = Stoichify(self.balanced_dict, self.work_shown).solve(given_amount, given_significant_figures, given_measurement, given_substance, wanted_measurement, wanted_substance)
-		return answer, self.work_shown
+		return solve(self, given_amount, given_significant_figures, given_measurement, given_substance, wanted_measurement, wanted_substance) # Nothing is stored on self, so it's safe to share
+
+	def plan(self, given_substance, given_measurement, wanted_substance, wanted_measurement):
+		"""
+		Works out (once) every conversion between the given and wanted substance, for asking
+		the same question with many different amounts. Calling the plan with an amount and its
+		significant figures gives the same Stoichiometry_Result as stoichify, with only a
+		multiplication and rounding left to do.
+
+		:param given_substance: The given substance to convert to the wanted substance.
+		:param given_measurement: The measurement of the given substance (L, r.p., g, mol).
+		:param wanted_substance: The wanted substance to convert the given substance to.
+		:param wanted_measurement: The measurement of the wanted substance (L, r.p., g, mol).
+		:return: A Conversion_Plan (see stoichiometry.py), e.g. plan(25, 2) or plan(25, 2, work_shown=[]).
+		"""
+
+		return plan(self, given_substance, given_measurement, wanted_substance, wanted_measurement)
 
 class Equation():
 	"""
@@ -336,12 +355,22 @@ class Equation():
 	Upon defining the equation, the program will AUTOMATICALLY balance the equation, and provide it!
 	"""
 	
-	def __init__(self, equation):
+	def __init__(self, equation, engine="sympy", cache=None):
 		"""
 		:param equation: The chemical equation to be balanced.
+		:param engine: The balancing engine, either "sympy" (rational nullspace) or 
+		"integer" (fraction-free, integer-only nullspace from balancing.py). Both give the same coefficients.
+		:param cache: An Equation_Cache (see equation_cache.py) to look the balanced equation up in,
+		and keep it in. Upon a hit, the substances aren't parsed, and the element matrix isn't built or
+		solved (they're rebuilt from the record, so a cached equation has the same state as one balanced fresh).
 		"""
 
+		if engine not in BALANCING_ENGINES:
+			raise Exception(f"Balancing Engine Check: The '{engine}' engine doesn't exist. Please use one of: {', '.join(BALANCING_ENGINES)}.")
+
 		self.original = equation # User's inputted chemical equation
+		self.engine = engine # Engine used to solve the element matrix
+		self.cache = cache # Persistent cache of balanced equations (if any)
 		self.unbalanced = equation # Equation put through the type checking process
 		self.elements = [] # All elements (uniques) within the chemical equation
 		self.reactants = []
@@ -355,8 +384,7 @@ class Equation():
 		self.element_matrix = [] # Amounts of each substance on both sides of the equation
 		self.balanced_coefficients = [] # Balanced coefficients for each substance
 		self.balanced = "" # Final balanced chemical equation in presentable form
-		self.balanced_dict = {} # Balanced dictionary for each substance
-		self.work_shown = [] # Work shown in the stoichiometry calculations (fractions and single line strings)
+		self.balanced_dict = MappingProxyType({}) # Balanced dictionary for each substance (read-only)
 		self.balance() # Automatically balance the equation upon initialization
 
 	def replace_arrows(self): #→⮕⇨🡒🡒⟶➜➔➝➞➨⭢🠂🠂🠊🠢🠦🠦🠮🠮🠒🠖🠚🠞🡢🡪🡲🡺
@@ -443,6 +471,7 @@ class Equation():
 		
 		return substance
 
+	@timed("equation.type_checker")
 	def type_checker(self):
 		"""
 		A series of checks to ensure the user inputted a valid chemical equation,
@@ -457,7 +486,18 @@ class Equation():
 		self.replace_subscripts()
 		self.detect_charges()
   
-		# 
+		self.split_sides()
+		self.check_concatenation()
+		return self.unbalanced
+
+	def split_sides(self):
+		"""
+		Splits the (arrow and subscript standardized) equation into its reactants and products,
+		removing their states, and collects the substances without their coefficients.
+
+		:return: The substances of the equation, in order, with the arrow between the sides.
+		"""
+
 		self.reactants = []
 		self.products = []
 		self.substances = []
@@ -467,14 +507,12 @@ class Equation():
 			for substance in str(self.unbalanced.replace(" ", "").split("→")[index]).split("+"):
 				substance = self.remove_state(substance)
 				side.append(substance)
-				new_substance = Substance(substance)	
-				self.substances.append(new_substance.remove_coefficients()) # We don't need coefficients to balance the equation
-
-		self.check_concatenation()
+				self.substances.append(without_coefficient(substance)) # We don't need coefficients to balance the equation
   
 		self.substances_arrowed = self.reactants + ["→"] + self.products
-		return self.unbalanced
+		return self.substances_arrowed
 
+	@timed("equation.substance_element_makeups")
 	def substance_element_makeups(self, side):
 		"""
 		Scans through the substances of the side (reactants or products) and extracts the
@@ -491,8 +529,7 @@ class Equation():
 			elements_side = self.products
  
 		for substance in elements_side:
-			substance = Substance(substance)
-			substance.remove_coefficients() # Remove the coefficients from the substance, as we assume they're 1 (because the equation is unbalanced)
+			substance = Substance(substance).remove_coefficients() # Remove the coefficients from the substance, as we assume they're 1 (because the equation is unbalanced)
 			self.makeups = substance.substance_scanner(self.makeups, side) # Calculate the elemental makeup of the substance on that side
    
 			# Get all unique elements in the equation, while we're at it
@@ -503,6 +540,7 @@ class Equation():
 
 		return self.makeups[side]
 
+	@timed("equation.matrix_builder")
 	def matrix_builder(self, side):
 		"""
 		Creates a matrix (2D Array) of each element's amount (subscript * multiplier) 
@@ -512,20 +550,14 @@ class Equation():
 		:return: The element matrix of the side.
 		"""
 
+		numbers = [atomic_number(element) for element in self.elements] # Where each element sits in the element vectors
+		sign = 1 if side == "reactants" else -1 # Designate products
 		for substance in self.makeups[side]: # For each substance in the side
-			matrix_row = []
-			for element in self.elements: # Get all unique elements in the equation
-				element_total = 0
-				for substance_element in self.makeups[side][substance]: # See if the element is in the substance on that side
-					if substance_element[0] == element: # See if the element is in the substance, uniquely.
-						if side == "reactants":
-							element_total += substance_element[1][1] * substance_element[1][2]
-						else:
-							element_total += substance_element[1][1] * substance_element[1][2] * -1 # Exclude negatives + designate products
-				matrix_row.append(element_total) # Add totals until a row is formed
-			self.element_matrix.append(matrix_row) # Make a new row to define a matrix (2D array)
+			vector = formula_vector(substance) # Totals of every element (subscript * multiplier), by atomic number
+			self.element_matrix.append([vector[number] * sign for number in numbers]) # Make a new row to define a matrix (2D array)
 		return self.element_matrix
 
+	@timed("equation.matrix_solver")
 	def matrix_solver(self):
 		"""
 		Solves the matrix of the element amounts in each substance of the reactants and products.
@@ -536,8 +568,12 @@ class Equation():
   
 		:return: The balanced coefficients of each substance in the equation (a list of integers, in order).
 		"""
+
+		if self.engine == "integer":
+			return integer_balance(self.element_matrix) # Same answer, without any fractions (see balancing.py)
 	 
 		# Use smypy to solve the matrix via linear algebra (Thanks to Mohammad-Ali Bandzar for this logic/code)
+		from sympy import Matrix, lcm # Imported here, as sympy takes a while to load and isn't needed until now
 		matrix = Matrix(self.element_matrix)
 		matrix = matrix.transpose() # Swap the rows and columns
 		try:
@@ -549,6 +585,7 @@ class Equation():
 		
 		return balanced_coefficients
 
+	@timed("equation.reconstruct")
 	def reconstruct(self, balanced_coefficients, include_one=True):
 		"""
 		Reconstructs the balanced chemical equation into a more human-readable format.
@@ -589,6 +626,7 @@ class Equation():
 				self.balanced += "→ " # Add the 'yields' arrow back in
 		return self.balanced
 
+	@timed("equation.balance")
 	def balance(self, include_one=True):
 		"""
 		Performs checks, scans, and calculations from previous methods, to balance 
@@ -601,24 +639,95 @@ class Equation():
 		:return: The balanced chemical equation, with the coefficients and subscripts.
 		"""
 
-		# Ensure the equation is properly formatted
-		self.type_checker()
-  
-		# Get the elemental makeup of each substance on both sides of the equation
-		self.substance_element_makeups("reactants")
-		self.substance_element_makeups("products")
-  
-		# Build the matrix of the element amounts in each substance of the reactants and products
-		self.matrix_builder("reactants")
-		self.matrix_builder("products")
-  
+		# Already balanced before? (see equation_cache.py)
+		key = canonical_equation(self.original) if self.cache is not None else None
+		record = self.cache.get(key) if key is not None else None
+		restored = self.restore(record) if record is not None else None
+
+		if restored is None:
+			# Ensure the equation is properly formatted
+			self.type_checker()
+	  
+			# Get the elemental makeup of each substance on both sides of the equation
+			self.substance_element_makeups("reactants")
+			self.substance_element_makeups("products")
+	  
+			# Build the matrix of the element amounts in each substance of the reactants and products
+			self.matrix_builder("reactants")
+			self.matrix_builder("products")
+
 		# Solve the matrix to get the balanced coefficients
-		self.balanced_coefficients = self.matrix_solver()
+		self.balanced_coefficients = restored if restored is not None else self.matrix_solver()
 		self.balanced = self.reconstruct(self.balanced_coefficients, include_one)
 		
-		self.balanced_dict = dict(zip(self.substances, self.balanced_coefficients)) # Balanced dictionary for each substance (used for stoichiometry calculations)
+		self.balanced_dict = MappingProxyType(dict(zip(self.substances, self.balanced_coefficients))) # Balanced dictionary for each substance (used for stoichiometry calculations, read-only)
+
+		if key is not None and restored is None:
+			self.cache.put(key, self.cache_record())
 		return self.balanced
 
+	def cache_record(self):
+		"""
+		:return: The record kept in the equation cache, each side's substances with their
+		balanced coefficients, elemental makeups, and element amounts (their row of the element matrix).
+		"""
+
+		coefficients = [int(coefficient) for coefficient in self.balanced_coefficients]
+		reactant_count = len(self.reactants)
+		rows = {"reactants": {}, "products": {}}
+		for index, (substance, row) in enumerate(zip(self.substances, self.element_matrix)):
+			side, sign = ("reactants", 1) if index < reactant_count else ("products", -1)
+			rows[side][substance] = {element: amount * sign for element, amount in zip(self.elements, row) if amount}
+		return {
+			"reactants": dict(zip(self.substances[:reactant_count], coefficients[:reactant_count])),
+			"products": dict(zip(self.substances[reactant_count:], coefficients[reactant_count:])),
+			"makeups": self.makeups,
+			"rows": rows,
+		}
+
+	def restore(self, record):
+		"""
+		Picks the equation back up from a cached record, instead of parsing its substances, and
+		building and solving the element matrix again. Only the text is split (for this equation's
+		order of substances, and their states), the rest is rebuilt from the record in that order.
+
+		:param record: The cached record of the equation (see cache_record).
+		:return: The balanced coefficients, or None if the record doesn't match the equation's
+		substances, or doesn't balance its own element amounts (either way, nothing but the split
+		is kept, and it still has to be balanced).
+		"""
+
+		if not {"makeups", "rows"} <= record.keys():
+			return None # Only has the coefficients
+		self.replace_arrows()
+		self.replace_subscripts()
+		self.split_sides()
+		reactant_count = len(self.reactants)
+		sides = (("reactants", self.substances[:reactant_count], 1), ("products", self.substances[reactant_count:], -1))
+		for side, substances, _ in sides:
+			if len(substances) != len(record[side]) or not set(substances) <= record[side].keys() <= record["rows"][side].keys() & record["makeups"][side].keys():
+				return None # Doesn't line up (e.g. a substance repeated on one side)
+
+		# Unique elements in order of appearance, and one row per substance (products negated), as when built fresh
+		elements = []
+		for side, substances, _ in sides:
+			for substance in substances:
+				for element, _ in record["makeups"][side][substance]:
+					if element not in elements:
+						elements.append(element)
+		element_matrix = [[record["rows"][side][substance].get(element, 0) * sign for element in elements] for side, substances, sign in sides for substance in substances]
+		coefficients = [record[side][substance] for side, substances, _ in sides for substance in substances]
+
+		# Every element has to come out even
+		for column in zip(*element_matrix):
+			if sum(amount * coefficient for amount, coefficient in zip(column, coefficients)) != 0:
+				return None
+
+		self.elements = elements
+		self.makeups = {side: {substance: [(element, tuple(amounts)) for element, amounts in record["makeups"][side][substance]] for substance in substances} for side, substances, _ in sides}
+		self.element_matrix = element_matrix
+		return coefficients
+
 	def stoichify(self, given_amount, given_significant_figures, given_measurement, given_substance, wanted_measurement, wanted_substance):
 		"""
 		Performs the stoichiometry calculations, with all given and wanted parameters, 
@@ -633,11 +742,26 @@ class Equation():
 		:param given_substance: The given substance to convert to the wanted substance.
 		:param wanted_measurement: The measurement of the wanted substance (L, r.p., g).
 		:param wanted_substance: The wanted substance to convert the given substance to.
-		:return: The amount of the wanted substance, with the amount (in the correct significant figures) and the measurement with substance (e.g. 42.8 g H2O).
+		:return: A fresh Stoichiometry_Result, with the amount of the wanted substance (in the correct significant figures) and the measurement with substance (e.g. 42.8 g H2O), and the work shown.
 		"""
   
-		answer, self.work_shown = Stoichify(self.balanced_dict, self.work_shown).solve(given_amount, given_significant_figures, given_measurement, given_substance, wanted_measurement, wanted_substance)
-		return answer, self.work_shown
+		return solve(self, given_amount, given_significant_figures, given_measurement, given_substance, wanted_measurement, wanted_substance) # Nothing is stored on self, so it's safe to share
+
+	def plan(self, given_substance, given_measurement, wanted_substance, wanted_measurement):
+		"""
+		Works out (once) every conversion between the given and wanted substance, for asking
+		the same question with many different amounts. Calling the plan with an amount and its
+		significant figures gives the same Stoichiometry_Result as stoichify, with only a
+		multiplication and rounding left to do.
+
+		:param given_substance: The given substance to convert to the wanted substance.
+		:param given_measurement: The measurement of the given substance (L, r.p., g, mol).
+		:param wanted_substance: The wanted substance to convert the given substance to.
+		:param wanted_measurement: The measurement of the wanted substance (L, r.p., g, mol).
+		:return: A Conversion_Plan (see stoichiometry.py), e.g. plan(25, 2) or plan(25, 2, work_shown=[]).
+		"""
+
+		return plan(self, given_substance, given_measurement, wanted_substance, wanted_measurement)
 
 
 #
@@ -0,0 +1,168 @@
+#
+# The same equations get balanced over and over, and every restart used to start
+# from scratch. This module keeps the balanced coefficients (with each substance's
+# makeup and element amounts) in a small SQLite file, so any process (or thread) can
+# pick them back up without parsing anything. Equations are looked up by their
+# canonical form, which ignores the arrow used, subscripts, spacing, states, coefficients,
+# and the order of the substances on each side (so "O₂ + 2H₂ → H₂O(l)" and
+# "H2 + O2 -> H2O" are the same equation). Once the file holds more than its size,
+# the oldest equations are forgotten first.
+#
+# Main Libraries:
+# - sqlite3: The cache file (WAL mode, so readers never wait on a writer), imported upon the first connection.
+# - threading: local (A connection per thread), and Lock (Counting hits and misses).
+#
+
+import json
+import os
+import re
+import threading
+import unicodedata
+
+from caching import Cache_Info
+from instrumentation import timed
+from formula import without_coefficient, SUBSCRIPT_DIGITS
+
+SUBSTANCE_STATES = re.compile(r"(?i)\([slgaq]*\)") # Same states as Equation.remove_state
+
+def split_equation(equation):
+	"""
+	:param equation: The chemical equation (e.g. 2H₂ + O₂ ⟶ 2H₂O(l)).
+	:return: The reactants and products, without spaces, and with regular integer subscripts
+	(e.g. ["2H2", "O2"], ["2H2O(l)"]), or None if the equation has no arrow.
+	"""
+
+	equation = "".join("→" if ord(character) > 127 and "arrow" in unicodedata.name(character, "").lower() else character for character in equation)
+	equation = equation.replace("->", "→").translate(SUBSCRIPT_DIGITS)
+	equation = equation.replace(" ", "") # Only spaces, just like Equation (anything else makes it a different equation)
+	if "→" not in equation:
+		return None
+	reactants, products = equation.split("→", 1)
+	return reactants.split("+"), products.split("+")
+
+def canonical_substance(substance):
+	"""
+	:param substance: A substance from split_equation (e.g. 2H2O(l)).
+	:return: The substance without its state or coefficient (e.g. H2O).
+	"""
+
+	return without_coefficient(SUBSTANCE_STATES.sub("", substance))
+
+def canonical_equation(equation):
+	"""
+	:param equation: The chemical equation.
+	:return: The canonical form of the equation (e.g. "H2+O2→H2O"), or None if the equation has no arrow.
+	"""
+
+	sides = split_equation(equation)
+	if sides is None:
+		return None
+	return "→".join("+".join(sorted(canonical_substance(substance) for substance in side)) for side in sides)
+
+class Equation_Cache():
+	"""
+	A persistent, size-bounded cache of balanced equations, kept in a SQLite file that
+	can be shared by many threads and processes at once. Each thread (and process) opens
+	its own connection, and the file is in WAL mode so reading never waits on a write.
+	It can be pickled (only its path and size are sent), so it can be handed to batch.balance_many.
+	"""
+
+	def __init__(self, path, maxsize=100000):
+		"""
+		:param path: The path of the cache file (made if it doesn't exist yet).
+		:param maxsize: The maximum amount of equations kept (the oldest are forgotten first).
+		"""
+
+		if maxsize < 1:
+			raise Exception("Cache Size Check: The cache must be able to hold at least one entry.")
+		self.path = os.fspath(path)
+		self.maxsize = maxsize
+		self.hits = 0
+		self.misses = 0
+		self.counts_lock = threading.Lock() # The hits and misses are counted by every thread
+		self.local = threading.local()
+		self.connection() # Make the table right away, so errors show up here
+
+	def __reduce__(self):
+		return (Equation_Cache, (self.path, self.maxsize))
+
+	def __len__(self):
+		return self.connection().execute("SELECT COUNT(*) FROM equations").fetchone()[0]
+
+	def connection(self):
+		"""
+		:return: This thread's connection to the cache file (opened upon first use, and again after a fork).
+		"""
+
+		connection = getattr(self.local, "connection", None)
+		if connection is None or self.local.pid != os.getpid():
+			import sqlite3 # Only loaded once a cache file is actually opened, so importing entities stays quick
+			connection = sqlite3.connect(self.path, timeout=30)
+			connection.execute("PRAGMA journal_mode=WAL")
+			connection.execute("PRAGMA synchronous=NORMAL") # Safe with WAL, without syncing on every write
+			connection.execute("CREATE TABLE IF NOT EXISTS equations (key TEXT PRIMARY KEY, record TEXT NOT NULL)")
+			connection.commit()
+			self.local.connection = connection
+			self.local.pid = os.getpid()
+		return connection
+
+	@timed("equation_cache.get")
+	def get(self, key, default=None):
+		"""
+		:param key: The canonical equation (see canonical_equation).
+		:return: The cached record of the equation, or the default.
+		"""
+
+		row = self.connection().execute("SELECT record FROM equations WHERE key = ?", (key,)).fetchone()
+		with self.counts_lock:
+			if row is None:
+				self.misses += 1
+			else:
+				self.hits += 1
+		return default if row is None else json.loads(row[0])
+
+	@timed("equation_cache.put")
+	def put(self, key, record):
+		"""
+		Caches the record, forgetting the oldest equations if the cache is full.
+		An equation that's already cached is left as it is.
+
+		:param key: The canonical equation (see canonical_equation).
+		:param record: The record of the balanced equation (anything JSON can hold).
+		"""
+
+		connection = self.connection()
+		with connection: # One transaction
+			inserted = connection.execute("INSERT OR IGNORE INTO equations (key, record) VALUES (?, ?)", (key, json.dumps(record))).rowcount
+			if inserted:
+				# Rows are only ever added at the end and removed from the start, so their rowids stay in a row
+				connection.execute("DELETE FROM equations WHERE rowid <= (SELECT MAX(rowid) FROM equations) - ?", (self.maxsize,))
+
+	def clear(self):
+		"""
+		Forgets all equations, and resets the hit/miss counts.
+		"""
+
+		connection = self.connection()
+		with connection:
+			connection.execute("DELETE FROM equations")
+		with self.counts_lock:
+			self.hits = 0
+			self.misses = 0
+
+	def info(self):
+		"""
+		:return: The hits, misses (of this object), maximum size, and current size of the cache.
+		"""
+
+		return Cache_Info(self.hits, self.misses, self.maxsize, len(self))
+
+	def close(self):
+		"""
+		Closes this thread's connection (it's opened again if the cache is used).
+		"""
+
+		connection = getattr(self.local, "connection", None)
+		if connection is not None:
+			connection.close()
+			self.local.connection = None
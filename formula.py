@@ -0,0 +1,345 @@
+#
+# Reading a chemical formula is a lot like reading a math expression, there are
+# numbers, letters, and parentheses that can be nested as deep as you want. This
+# module reads a formula ONCE, splitting it into tokens (lexer), then building a
+# small tree out of them (recursive-descent parser). Coefficients, elements,
+# multi-digit subscripts, nested () and [] groups with their multipliers, and
+# hydrate dots (e.g. CuSO4·5H2O) are all covered. Everything a Substance needs
+# (elements, elemental makeup, subscripts) is then read off the cached tree.
+#
+# Main Libraries:
+# - re: Regular Expressions (Tokenizing).
+# - functools: lru_cache (Formulas are only parsed once).
+# - caching: LRU_Cache (Molar masses and compositions, by canonical formula).
+# - array: array (Element counts by atomic number).
+#
+
+from array import array
+from collections import namedtuple
+from functools import lru_cache
+import re
+
+from periodic_table import is_element, atomic_number, atomic_mass_vector, MASS_SCALE
+from caching import LRU_Cache
+
+#
+# Tokens
+#   Every character of a formula belongs to one of these kinds. Lowercase
+#   letters only make sense right after a capital (two-lettered elements),
+#   so any others are left as unknown for the parser to reject. Charges get
+#   their own kind, so the parser can reject them by name (Stoichify doesn't
+#   support ions, see Equation.detect_charges).
+#
+
+Token = namedtuple("Token", ["kind", "text", "position"])
+
+SUBSCRIPT_DIGITS = str.maketrans("₀₁₂₃₄₅₆₇₈₉", "0123456789")
+TO_SUBSCRIPT_DIGITS = str.maketrans("0123456789", "₀₁₂₃₄₅₆₇₈₉")
+CLOSING_BRACKETS = {"(": ")", "[": "]"}
+
+TOKEN_PATTERN = re.compile(r"""
+	(?P<ELEMENT>[A-Z][a-z]?)
+	|(?P<NUMBER>[0-9]+)
+	|(?P<OPEN>[(\[])
+	|(?P<CLOSE>[)\]])
+	|(?P<DOT>[·•*.])
+	|(?P<CHARGE>[+\-−])
+	|(?P<SPACE>\s+)
+	|(?P<UNKNOWN>.)
+""", re.VERBOSE)
+
+#
+# Tree
+#   A formula holds its coefficient and its components (more than one for hydrates),
+#   each component holds atoms and groups, and groups can hold more groups.
+#
+
+Atom = namedtuple("Atom", ["symbol", "count"])
+Group = namedtuple("Group", ["bracket", "items", "count"])
+Component = namedtuple("Component", ["count", "items"])
+Formula = namedtuple("Formula", ["coefficient", "components"])
+
+# Everything derived from a parsed formula (all tuples, as they're shared through the cache)
+Compiled_Formula = namedtuple("Compiled_Formula", ["text", "tokens", "tree", "canonical", "elements", "unique_elements", "raw_elements", "makeup"])
+
+# The molar mass and element counts of a canonical formula (counts are (element, count) pairs, in order of appearance,
+# and vector is an array('i') of the same counts indexed by atomic number, shared through the cache so don't modify it)
+Composition = namedtuple("Composition", ["formula", "molar_mass", "counts", "vector"])
+
+COMPOSITION_CACHE = LRU_Cache(maxsize=4096)
+
+@lru_cache(maxsize=4096)
+def tokenize(formula):
+	"""
+	Splits the formula into tokens, in one pass with a single compiled pattern.
+	Subscript digits are read as regular digits, and whitespace is dropped.
+	Tokenizing never fails, unknown characters are handed to the parser to deal with.
+
+	:param formula: The formula to tokenize (e.g. "K4[Fe(SCN)6]").
+	:return: A tuple of tokens, in order.
+	"""
+
+	formula = str(formula).translate(SUBSCRIPT_DIGITS)
+	return tuple(Token(match.lastgroup, match.group(), match.start()) for match in TOKEN_PATTERN.finditer(formula) if match.lastgroup != "SPACE")
+
+def leading_coefficient(tokens):
+	"""
+	Finds the coefficient token of a substance, which is a number at the 0th index that's
+	directly followed by an element or a group (e.g. the 2 in 2H2O or 2(NH4)2SO4).
+
+	:param tokens: The tokens of the formula.
+	:return: The coefficient token, or None if the substance doesn't have one.
+	"""
+
+	if len(tokens) > 1 and tokens[0].kind == "NUMBER" and tokens[1].kind in ("ELEMENT", "OPEN"):
+		return tokens[0]
+	return None
+
+def without_coefficient(formula):
+	"""
+	:param formula: The formula (e.g. 2H₂O).
+	:return: The formula without its coefficient, and with regular integer subscripts (e.g. H2O).
+	"""
+
+	formula = str(formula).translate(SUBSCRIPT_DIGITS)
+	coefficient_token = leading_coefficient(tokenize(formula))
+	if coefficient_token:
+		return formula[coefficient_token.position + len(coefficient_token.text):]
+	return formula
+
+class Formula_Parser():
+	"""
+	A recursive-descent parser, which walks the tokens of a formula exactly once
+	and builds its tree. Elements are checked against the periodic table as they're found.
+	"""
+
+	def __init__(self, formula):
+		"""
+		:param formula: The formula to parse.
+		"""
+
+		self.formula = str(formula)
+		self.tokens = tokenize(self.formula)
+		self.index = 0
+
+	def peek(self):
+		return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+	def advance(self):
+		token = self.tokens[self.index]
+		self.index += 1
+		return token
+
+	def count(self):
+		"""
+		:return: The number following an element or group (1 if not provided).
+		"""
+
+		token = self.peek()
+		if token is not None and token.kind == "NUMBER":
+			return int(self.advance().text)
+		return 1
+
+	def parse(self):
+		"""
+		Parses the whole formula: formula := component (DOT component)*
+
+		:return: The formula's tree.
+		"""
+
+		components = []
+		while True:
+			components.append(Component(self.count(), self.sequence(None)))
+			token = self.peek()
+			if token is None:
+				break
+			self.advance() # Only a hydrate dot can end a component
+
+		if any(len(component.items) == 0 for component in components):
+			raise Exception("Element(s) Not Found: No elements were found in the substance. Please ensure the substance is spelled correctly.")
+
+		# The leading number of the first component is the substance's coefficient
+		coefficient = components[0].count
+		components[0] = Component(1, components[0].items)
+		return Formula(coefficient, tuple(components))
+
+	def sequence(self, closing):
+		"""
+		Parses atoms and groups until the closing bracket (or the end of the component):
+		sequence := ((ELEMENT | OPEN sequence CLOSE) NUMBER?)*
+
+		:param closing: The bracket that closes this sequence, None if it's the top level.
+		:return: A tuple of atoms and groups.
+		"""
+
+		items = []
+		while True:
+			token = self.peek()
+			if token is None or token.kind == "DOT":
+				if closing is not None:
+					raise Exception(f"Parentheses Check: The '{self.formula}' substance doesn't close all of its parentheses/brackets. Make sure to close all parentheses.")
+				return tuple(items)
+			elif token.kind == "CHARGE":
+				raise Exception(f"Charges Check: The '{self.formula}' substance has a charge ('{token.text}' at position {token.position + 1}), which is not supported by Stoichify.")
+			elif token.kind == "ELEMENT":
+				self.advance()
+				if not is_element(token.text):
+					raise Exception(f"Element Verification: The element '{token.text}' is not found in the periodic table. Please ensure the element is spelled/capitalized correctly.")
+				items.append(Atom(token.text, self.count()))
+			elif token.kind == "OPEN":
+				self.advance()
+				inner = self.sequence(CLOSING_BRACKETS[token.text])
+				if len(inner) == 0:
+					raise Exception(f"Element(s) Not Found: The '{self.formula}' substance has an empty group. Please ensure the substance is spelled correctly.")
+				self.advance() # The closing bracket
+				items.append(Group(token.text, inner, self.count()))
+			elif token.kind == "CLOSE":
+				if token.text != closing:
+					raise Exception(f"Parentheses Check: The '{token.text}' at position {token.position + 1} of '{self.formula}' doesn't close anything. Make sure parentheses and brackets are properly matched.")
+				return tuple(items)
+			elif token.kind == "NUMBER":
+				raise Exception(f"Formula Parsing Error: The number '{token.text}' at position {token.position + 1} of '{self.formula}' isn't attached to an element or group.")
+			else:
+				raise Exception(f"Formula Parsing Error: The character '{token.text}' at position {token.position + 1} of '{self.formula}' can't be read. Most likely due to substance states, charges, or element capitalization.")
+
+def flatten(items, multiplier, makeup):
+	"""
+	Walks the tree, collecting each element with its subscript and multiplier
+	(the product of all groups it's nested within).
+
+	:param items: The atoms and groups to walk.
+	:param multiplier: The multiplier of the enclosing groups.
+	:param makeup: The list to collect the makeup into.
+	:return: The makeup list, in order of appearance.
+	"""
+
+	for item in items:
+		if isinstance(item, Atom):
+			makeup.append((item.symbol, (1, item.count, multiplier)))
+		else:
+			flatten(item.items, multiplier * item.count, makeup)
+	return makeup
+
+@lru_cache(maxsize=4096)
+def compile_formula(formula):
+	"""
+	Parses the formula into its tree (only once per formula, the result is cached),
+	and derives all the views of it Substance needs.
+
+	:param formula: The formula to compile (e.g. "Fe2(SO4)3").
+	:return: The Compiled_Formula of the formula.
+	"""
+
+	parser = Formula_Parser(formula)
+	tree = parser.parse()
+
+	makeup = []
+	for component in tree.components:
+		flatten(component.items, component.count, makeup)
+	elements = tuple(element for element, _ in makeup)
+
+	raw_elements = [] # Found elements, with a "-" for every digit
+	for token in parser.tokens:
+		if token.kind == "ELEMENT":
+			raw_elements.append(token.text)
+		elif token.kind == "NUMBER":
+			raw_elements.extend("-" * len(token.text))
+
+	return Compiled_Formula(parser.formula, parser.tokens, tree, render_canonical(tree), elements, tuple(dict.fromkeys(elements)), tuple(raw_elements), tuple(makeup))
+
+def render_canonical(tree):
+	"""
+	Writes the tree back out as plain text, without the coefficient, with regular
+	integer subscripts (1s are left out) and "·" for every hydrate dot. So, H₂O,
+	2H2O, and H2O1 all end up as H2O.
+
+	:param tree: The formula's tree.
+	:return: The canonical formula.
+	"""
+
+	def render(items):
+		rendered = []
+		for item in items:
+			if isinstance(item, Atom):
+				rendered.append(item.symbol)
+			else:
+				rendered.append(f"{item.bracket}{render(item.items)}{CLOSING_BRACKETS[item.bracket]}")
+			if item.count != 1:
+				rendered.append(str(item.count))
+		return "".join(rendered)
+
+	return "·".join(f"{component.count if component.count != 1 else ''}{render(component.items)}" for component in tree.components)
+
+def subscript_formula(formula):
+	"""
+	Renders the formula with subscripts, leaving the coefficient and hydrate counts
+	as regular numbers (e.g. CuSO4·5H2O → CuSO₄·5H₂O). Only tokenizes, so it works on
+	any text.
+
+	:param formula: The formula to render.
+	:return: The formula with subscripts.
+	"""
+
+	tokens = tokenize(formula)
+	rendered = []
+	previous = None
+	for token in tokens:
+		if token.kind == "NUMBER" and previous is not None and previous.kind in ("ELEMENT", "CLOSE"):
+			rendered.append(token.text.translate(TO_SUBSCRIPT_DIGITS))
+		else:
+			rendered.append(token.text)
+		previous = token
+	return "".join(rendered)
+
+def compute_composition(canonical):
+	"""
+	Totals how many of each element the formula has (subscript * multiplier), as a vector
+	indexed by atomic number, and takes its dot product with the atomic masses for the molar mass.
+
+	:param canonical: The canonical formula.
+	:return: The Composition of the formula.
+	"""
+
+	masses = atomic_mass_vector()
+	counts = {}
+	for element, (_, subscript, multiplier) in compile_formula(canonical).makeup:
+		counts[element] = counts.get(element, 0) + subscript * multiplier
+
+	vector = array("i", [0]) * len(masses)
+	molar_mass = 0 # Dot product of the vector and the atomic masses (only where the vector isn't 0)
+	for element, count in counts.items():
+		number = atomic_number(element)
+		try:
+			vector[number] = count
+		except OverflowError:
+			raise Exception(f"Formula Parsing Error: '{canonical}' has too many {element} atoms to count.")
+		molar_mass += count * masses[number]
+	return Composition(canonical, molar_mass / MASS_SCALE, tuple(counts.items()), vector) # Exact in thousandths, so it's only rounded once
+
+def composition(formula):
+	"""
+	Gets the molar mass and element counts of the formula, from the composition cache
+	(keyed by the canonical formula, so 2H2O and H₂O share H2O's entry).
+	See COMPOSITION_CACHE.info() for its size and hit/miss stats.
+
+	:param formula: The formula (coefficients are ignored).
+	:return: The Composition of the formula.
+	"""
+
+	return COMPOSITION_CACHE.get_or_compute(compile_formula(formula).canonical, compute_composition)
+
+def formula_vector(formula):
+	"""
+	:param formula: The formula (coefficients are ignored).
+	:return: The element counts, as an array('i') indexed by atomic number (don't modify it).
+	"""
+
+	return composition(formula).vector
+
+def formula_molar_mass(formula):
+	"""
+	:param formula: The formula (coefficients are ignored).
+	:return: The molar mass (g/mol).
+	"""
+
+	return composition(formula).molar_mass
@@ -0,0 +1,205 @@
+#
+# When balancing or solving is slow, it helps to know which stage is to blame.
+# This module times the stages of Equation.balance and Stoichify.solve, counting
+# how many times each ran and how long they took altogether (and at most). It's off by
+# default, and while it's off a stage costs about as much as an empty with block.
+# Turn it on with enable() (or the STOICHIFY_INSTRUMENTATION=1 environment variable,
+# so worker processes have it on too), and read the stats as a dictionary or as
+# Prometheus text. Hooks can also be added, to be told about every stage as it finishes.
+# Stages are marked by decorating the function they time with timed().
+#
+# Main Libraries:
+# - time: perf_counter (Wall time).
+# - threading: Lock (Safe to share between threads).
+#
+
+from collections import namedtuple
+from functools import wraps
+import os
+import threading
+import time
+
+Stage_Stats = namedtuple("Stage_Stats", ["calls", "total_seconds", "max_seconds"])
+
+class Null_Timer():
+	"""
+	What a stage gives back while instrumentation is off, it does nothing at all.
+	"""
+
+	__slots__ = ()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exception):
+		return False
+
+NULL_TIMER = Null_Timer()
+
+class Stage_Timer():
+	"""
+	Times one run of a stage, and reports it to its registry once it's done.
+	"""
+
+	__slots__ = ("registry", "name", "start")
+
+	def __init__(self, registry, name):
+		"""
+		:param registry: The Stage_Registry to report to.
+		:param name: The name of the stage (e.g. equation.matrix_solver).
+		"""
+
+		self.registry = registry
+		self.name = name
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *exception):
+		self.registry.record(self.name, time.perf_counter() - self.start)
+		return False
+
+class Stage_Registry():
+	"""
+	Keeps the timings of every stage, and the hooks to tell about them.
+	"""
+
+	def __init__(self, enabled=False):
+		"""
+		:param enabled: Whether stages are timed from the start.
+		"""
+
+		self.enabled = enabled
+		self.stages = {} # Stage name: [calls, total seconds, max seconds]
+		self.hooks = () # Replaced (never changed in place), so they can be called without holding the lock
+		self.lock = threading.Lock()
+
+	def stage(self, name):
+		"""
+		:param name: The name of the stage.
+		:return: A context manager that times the stage (or does nothing, if instrumentation is off).
+		"""
+
+		if not self.enabled:
+			return NULL_TIMER
+		return Stage_Timer(self, name)
+
+	def record(self, name, seconds):
+		"""
+		:param name: The name of the stage.
+		:param seconds: How long the stage took.
+		"""
+
+		with self.lock:
+			stats = self.stages.get(name)
+			if stats is None:
+				self.stages[name] = [1, seconds, seconds]
+			else:
+				stats[0] += 1
+				stats[1] += seconds
+				stats[2] = max(stats[2], seconds)
+		for hook in self.hooks:
+			hook(name, seconds)
+
+	def add_hook(self, hook):
+		"""
+		:param hook: A function of the stage name and seconds, called after every timed stage.
+		"""
+
+		with self.lock:
+			self.hooks = self.hooks + (hook,)
+
+	def remove_hook(self, hook):
+		"""
+		:param hook: A hook added before.
+		"""
+
+		with self.lock:
+			hooks = list(self.hooks)
+			hooks.remove(hook)
+			self.hooks = tuple(hooks)
+
+	def reset(self):
+		"""
+		Forgets all timings (the hooks are kept).
+		"""
+
+		with self.lock:
+			self.stages.clear()
+
+	def stats(self):
+		"""
+		:return: The stats of every stage so far, keyed by the stage name.
+		"""
+
+		with self.lock:
+			return {name: Stage_Stats(*stats) for name, stats in self.stages.items()}
+
+	def to_dict(self):
+		"""
+		:return: The stats as plain dictionaries (e.g. for JSON).
+		"""
+
+		return {name: stats._asdict() for name, stats in self.stats().items()}
+
+	def to_prometheus(self, prefix="stoichify_stage"):
+		"""
+		:param prefix: The prefix of the metric names.
+		:return: The stats in the Prometheus text format, ready to be scraped.
+		"""
+
+		stats = self.stats()
+		lines = []
+		for metric, type, field, description in [("calls_total", "counter", "calls", "Times the stage ran."), ("seconds_total", "counter", "total_seconds", "Wall time spent in the stage."), ("seconds_max", "gauge", "max_seconds", "Longest single run of the stage.")]:
+			lines.append(f"# HELP {prefix}_{metric} {description}")
+			lines.append(f"# TYPE {prefix}_{metric} {type}")
+			for name in sorted(stats):
+				lines.append(f'{prefix}_{metric}{{stage="{name}"}} {getattr(stats[name], field)}')
+		return "\n".join(lines) + "\n"
+
+# The registry Stoichify's own stages report to
+REGISTRY = Stage_Registry(enabled=os.environ.get("STOICHIFY_INSTRUMENTATION", "") not in ("", "0"))
+
+def stage(name):
+	"""
+	:param name: The name of the stage.
+	:return: A context manager that times the stage in the registry (or does nothing, if it's off).
+	"""
+
+	if not REGISTRY.enabled:
+		return NULL_TIMER
+	return Stage_Timer(REGISTRY, name)
+
+def timed(name):
+	"""
+	Times every call of the decorated function as a stage (in the registry), so the
+	function itself doesn't have to change.
+
+	:param name: The name of the stage.
+	:return: The decorator.
+	"""
+
+	def decorator(function):
+		@wraps(function)
+		def timed_function(*args, **kwargs):
+			if not REGISTRY.enabled:
+				return function(*args, **kwargs)
+			with Stage_Timer(REGISTRY, name):
+				return function(*args, **kwargs)
+		return timed_function
+	return decorator
+
+def enable():
+	"""
+	Starts timing stages.
+	"""
+
+	REGISTRY.enabled = True
+
+def disable():
+	"""
+	Stops timing stages (the timings so far are kept).
+	"""
+
+	REGISTRY.enabled = False
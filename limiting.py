@@ -0,0 +1,156 @@
+#
+# Real reactions rarely have their reactants in the perfect ratio, one of them
+# runs out first (the limiting reactant) and caps how much of every product can be
+# made (the theoretical yield), while the rest are left over (in excess). This module
+# works all of that out from the amounts of several reactants (each in its own
+# measurement), and the percent yield if you know how much was actually made.
+# Every amount can also be a whole array of scenarios, which are all worked out
+# together by NumPy, instead of one stoichiometry calculation at a time.
+#
+# Main Libraries:
+# - numpy: Arrays of scenarios (Vectorized limiting reactants and yields).
+#
+
+from collections import namedtuple
+
+from entities import Substance
+from precision import Scientific_Handler, round_sig_array
+
+# The outcome of one (or an array of) scenario(s). Every amount is in the measurement it was asked for,
+# theoretical_yields and excess are keyed by substance, and percent_yield is None without an actual yield.
+Yield_Result = namedtuple("Yield_Result", ["limiting_reactant", "extent", "theoretical_yields", "excess", "percent_yield"])
+
+class Yield_Calculator:
+	"""
+	Finds the limiting reactant, theoretical yields, excess reactants, and percent yield
+	of a balanced equation. The conversion factors of each substance are worked out once,
+	so the calculator can be reused for as many scenarios as you'd like.
+	"""
+
+	def __init__(self, equation):
+		"""
+		:param equation: The balanced Equation (it's only ever read from).
+		"""
+
+		self.coefficients = dict(equation.balanced_dict)
+		reactant_count = len(equation.reactants)
+		self.reactants = list(equation.substances[:reactant_count])
+		self.products = list(equation.substances[reactant_count:])
+		self.factors = {} # (substance, measurement): moles in one of the measurement
+
+	def moles_per(self, substance, measurement):
+		"""
+		:param substance: The substance (without its coefficient).
+		:param measurement: The measurement (any in the unit graph, see units.py).
+		:return: How many moles of the substance are in 1 of the measurement.
+		"""
+
+		key = (substance, measurement)
+		if key not in self.factors:
+			self.factors[key] = float(Substance(substance).conversion_path(measurement, "mol").factor) # Unknown measurements are caught by the unit graph
+		return self.factors[key]
+
+	def solve(self, amounts, yield_measurement="g", actual_yield=None, significant_figures=None):
+		"""
+		Works out the limiting reactant of every scenario. Reactants that aren't given
+		are assumed to be in excess (there's plenty of them).
+
+		:param amounts: The given reactants, mapped to (amount, measurement). Each amount can be a number
+		(or scientific string), or an array of amounts (one per scenario).
+		:param yield_measurement: The measurement of the theoretical yields (L, r.p., g, mol).
+		:param actual_yield: Optionally, (product, amount, measurement) of what was actually made, for the percent yield.
+		:param significant_figures: Optionally, the significant figures to round every result to.
+		:return: A Yield_Result, holding numbers (and the limiting reactant's formula) for a single scenario,
+		or arrays of them for an array of scenarios.
+		"""
+
+		import numpy
+
+		if not amounts:
+			raise Exception("Limiting Reactant Check: At least one reactant's amount must be given.")
+		given = list(amounts)
+		for reactant in given:
+			if reactant not in self.reactants:
+				raise Exception(f"Substance Check: '{reactant}' isn't a reactant of the equation ({', '.join(self.reactants)}).")
+			if not self.coefficients[reactant]:
+				raise Exception(f"Limiting Reactant Check: '{reactant}' isn't used by the balanced equation (its coefficient is 0).")
+
+		# Moles of each given reactant, then how many times the reaction can run on it (its extent)
+		moles = numpy.broadcast_arrays(*[as_array(amount) * self.moles_per(reactant, measurement) for reactant, (amount, measurement) in amounts.items()])
+		moles = numpy.stack(moles)
+		extents = moles / numpy.array([float(self.coefficients[reactant]) for reactant in given]).reshape((-1,) + (1,) * (moles.ndim - 1))
+		limiting = numpy.argmin(extents, axis=0) # The reactant that runs out first
+		extent = numpy.min(extents, axis=0)
+
+		theoretical_yields = {}
+		for product in self.products:
+			theoretical_yields[product] = extent * float(self.coefficients[product]) / self.moles_per(product, yield_measurement)
+
+		excess = {}
+		for index, reactant in enumerate(given):
+			measurement = amounts[reactant][1]
+			leftover = (moles[index] - extent * float(self.coefficients[reactant])) / self.moles_per(reactant, measurement)
+			excess[reactant] = numpy.where(limiting == index, 0.0, leftover) # All of the limiting reactant is used up (not just nearly)
+
+		percent_yield = None
+		if actual_yield is not None:
+			product, amount, measurement = actual_yield
+			if product not in self.products:
+				raise Exception(f"Substance Check: '{product}' isn't a product of the equation ({', '.join(self.products)}).")
+			theoretical_moles = extent * float(self.coefficients[product])
+			with numpy.errstate(divide="ignore", invalid="ignore"): # No reaction, no percent yield (nan)
+				percent_yield = as_array(amount) * self.moles_per(product, measurement) / theoretical_moles * 100
+
+		if significant_figures is not None:
+			theoretical_yields = {product: round_answers(values, significant_figures) for product, values in theoretical_yields.items()}
+			excess = {reactant: round_answers(values, significant_figures) for reactant, values in excess.items()}
+			if percent_yield is not None:
+				percent_yield = round_answers(percent_yield, significant_figures)
+
+		limiting_reactant = numpy.array(given, dtype=object)[limiting]
+		if extent.ndim == 0: # A single scenario, so plain numbers
+			return Yield_Result(
+				str(limiting_reactant), float(extent),
+				{product: float(values) for product, values in theoretical_yields.items()},
+				{reactant: float(values) for reactant, values in excess.items()},
+				None if percent_yield is None else float(percent_yield),
+			)
+		return Yield_Result(limiting_reactant, extent, theoretical_yields, excess, percent_yield)
+
+def as_array(amount):
+	"""
+	:param amount: A number, scientific string (e.g. "4.2 x 10^2"), or array of numbers.
+	:return: The amount as a float64 array (0-dimensional for a single number).
+	"""
+
+	import numpy
+
+	if isinstance(amount, str):
+		amount = Scientific_Handler(amount).to_float()
+	return numpy.asarray(amount, dtype=numpy.float64)
+
+def round_answers(values, significant_figures):
+	"""
+	Rounds like Stoichify.solve_array does (straight to the significant figures, halves up,
+	so small yields and excesses like 0.000371 keep their digits, and NaNs are kept).
+
+	:param values: The values to round.
+	:param significant_figures: The significant figures to round to.
+	:return: The rounded values.
+	"""
+
+	return round_sig_array(values, significant_figures)
+
+def limiting_reactant(equation, amounts, yield_measurement="g", actual_yield=None, significant_figures=None):
+	"""
+	Shortcut for Yield_Calculator(equation).solve(...), see Yield_Calculator.solve.
+
+	:param equation: The balanced Equation.
+	:param amounts: The given reactants, mapped to (amount, measurement).
+	:param yield_measurement: The measurement of the theoretical yields.
+	:param actual_yield: Optionally, (product, amount, measurement) of what was actually made.
+	:param significant_figures: Optionally, the significant figures to round every result to.
+	:return: A Yield_Result.
+	"""
+
+	return Yield_Calculator(equation).solve(amounts, yield_measurement, actual_yield, significant_figures)
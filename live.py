@@ -0,0 +1,145 @@
+#
+# Balances the equation as it's being typed, for the live preview under the equation
+# entry. Between two keystrokes, usually only one substance changes, so instead of
+# balancing from scratch every time, this module diffs the new list of substances
+# against the last one, keeps the element matrix rows of every substance that didn't
+# change, and only parses (and builds the rows of) the ones that did. The matrix is
+# then solved with the integer engine (see balancing.py), which is quick enough to run
+# on every (debounced) keystroke. The preview is the same as Equation(...).balanced.
+#
+# Main Libraries:
+# - balancing: integer_balance (Solving the element matrix).
+# - formula: composition (Cached parses of each substance).
+# - caching: LRU_Cache (Bounding the element counts kept between keystrokes).
+#
+
+from collections import namedtuple
+
+from balancing import integer_balance
+from caching import LRU_Cache
+from equation_cache import split_equation, canonical_substance, SUBSTANCE_STATES
+from formula import composition, subscript_formula
+from periodic_table import atomic_number
+
+# A preview of the balanced equation (error is None if it balanced, otherwise the rest are empty),
+# and how many substances had to be parsed for it (the rest were reused from earlier keystrokes)
+Live_Preview = namedtuple("Live_Preview", ["balanced", "substances", "coefficients", "parsed", "error"])
+
+class Live_Balancer():
+	"""
+	Balances the same (but changing) equation over and over, reusing everything it
+	can from the last time. Make one per entry, and call update() with the entry's text.
+	"""
+
+	def __init__(self, cache_size=256):
+		"""
+		:param cache_size: How many substances' element counts are kept (the least recently used are parsed again).
+		"""
+
+		self.text = None # The text of the last update
+		self.preview = None # The preview of the last update
+		self.substances = [] # The (side, substance) of every substance, in order (1 for reactants, -1 for products)
+		self.counts = LRU_Cache(maxsize=cache_size) # Each substance's element counts, as (atomic number, count) pairs
+		self.numbers = [] # The atomic numbers of the element matrix's columns
+		self.element_matrix = [] # One row per substance (products negated), as for Equation.matrix_builder
+
+	def diff(self, substances):
+		"""
+		Finds the part of the substances that changed since the last update (between the
+		substances both lists start with, and the ones they both end with).
+
+		:param substances: The new (side, substance) list.
+		:return: How many substances at the start, and at the end, stayed the same.
+		"""
+
+		limit = min(len(substances), len(self.substances))
+		start = 0
+		while start < limit and substances[start] == self.substances[start]:
+			start += 1
+		end = 0
+		while end < limit - start and substances[-1 - end] == self.substances[-1 - end]:
+			end += 1
+		return start, end
+
+	def element_counts(self, substance):
+		"""
+		:param substance: The substance (without its coefficient or state).
+		:return: The substance's element counts, as (atomic number, count) pairs (parsed only the first time).
+		"""
+
+		return self.counts.get_or_compute(substance, lambda substance: tuple((atomic_number(element), count) for element, count in composition(substance).counts))
+
+	def update(self, equation):
+		"""
+		:param equation: The equation, as it's typed so far.
+		:return: A Live_Preview of the balanced equation (or of why it can't be balanced yet).
+		"""
+
+		if equation == self.text:
+			return self.preview
+		self.text = equation
+		try:
+			self.preview = self.balance(equation)
+		except Exception as error:
+			self.preview = Live_Preview("", [], [], 0, str(error))
+		return self.preview
+
+	def balance(self, equation):
+		"""
+		Balances the equation, only parsing the substances that changed since the last update.
+
+		:param equation: The equation.
+		:return: A Live_Preview of the balanced equation (errors are raised).
+		"""
+
+		sides = split_equation(equation)
+		if sides is None:
+			raise Exception("'Yields' Arrow Check: The yields or any UNICODE arrow is not found in the equation.")
+		if "+" not in equation:
+			raise Exception("Substance Concatenation '+' Check: The '+' symbol is not found in the equation.")
+
+		typed = [] # (side, substance as typed without its state, state)
+		for sign, side in ((1, sides[0]), (-1, sides[1])):
+			for substance in side:
+				state = SUBSTANCE_STATES.search(substance)
+				substance = SUBSTANCE_STATES.sub("", substance)
+				if len(substance) == 0:
+					raise Exception("Substance Concatenation Length Check: There is an empty substance in the equation.")
+				if "-" in substance or "−" in substance:
+					raise Exception("Equation Charges Check: Your equation includes charges (Oxidation-Reduction Reactions), which are not supported by Stoichify.")
+				typed.append((sign, substance, state.group().lower() if state else ""))
+		substances = [(sign, canonical_substance(substance)) for sign, substance, _ in typed]
+
+		# Only the substances that changed are parsed
+		start, end = self.diff(substances)
+		parsed = sum(substance not in self.counts for _, substance in substances[start:len(substances) - end])
+		counts = [self.element_counts(substance) for _, substance in substances]
+
+		# Rows that didn't change are kept, unless an element came or went (then every row is laid out again, without parsing)
+		numbers = sorted({number for substance_counts in counts for number, _ in substance_counts})
+		if numbers == self.numbers:
+			kept_start, kept_end = self.element_matrix[:start], self.element_matrix[len(self.element_matrix) - end:] if end else []
+			changed = range(start, len(substances) - end)
+		else:
+			kept_start, kept_end = [], []
+			changed = range(len(substances))
+		columns = {number: column for column, number in enumerate(numbers)}
+		rows = []
+		for index in changed:
+			row = [0] * len(numbers)
+			for number, count in counts[index]:
+				row[columns[number]] = count * substances[index][0]
+			rows.append(row)
+		element_matrix = kept_start + rows + kept_end
+
+		coefficients = integer_balance(element_matrix)
+
+		# Only kept once it balanced, so the next keystroke diffs against a good matrix
+		self.substances = substances
+		self.numbers = numbers
+		self.element_matrix = element_matrix
+
+		reactant_count = len(sides[0])
+		presented = [f"{coefficient}{subscript_formula(substance)}{state}" for coefficient, (_, substance), (_, _, state) in zip(coefficients, substances, typed)]
+		balanced = f"{' + '.join(presented[:reactant_count])} → {' + '.join(presented[reactant_count:])}"
+		return Live_Preview(balanced, [substance for _, substance in substances], coefficients, parsed, None)
@@ -25,7 +25,16 @@ from PIL import Image, ImageTk # Pillow image library (pip install pillow)
 
 # Logical Libraries
 from entities import Equation, Substance
-from precision import Significant_Figures
+from precision import Measured
+from steps import Given_Step, Conversion_Factor, Result_Step, format_quantity
+from worker import Background_Worker
+from live import Live_Balancer
+from units import UNITS
+
+# The work shown canvas
+WORK_SHOWN_FONT = ("Times New Roman", 20)
+WORK_SHOWN_HEIGHT = 100
+WORK_SHOWN_PADDING = 10
 
 class Main_Window:
 	"""
@@ -45,7 +54,14 @@ class Main_Window:
 		self.place_navbar()
 		self.content = tk.Frame(self.window) # Content is the interaction/display frame
 		self.content.pack(fill="both", expand=True)
-  
+
+		# Balancing and stoichiometry run in the background, with a progress bar while they do
+		self.progress = ttk.Progressbar(self.window, mode="indeterminate", length=300)
+		self.worker = Background_Worker(self.window)
+		self.worker.prepare(lambda: Equation("H2 + O2 -> H2O")) # Loads sympy while the user is still reading, instead of on their first equation
+
+		self.type = None # equation or substance (chosen at the start)
+		self.build_views() # Every stage's widgets, built once
 		self.start() # Show text banner and input type selector 
 
 	def place_navbar(self):
@@ -107,12 +123,113 @@ class Main_Window:
 
 		return self.navbar	
 
+	def build_views(self):
+		"""
+		Builds every stage's widgets ONCE (the banner, the equation/substance display, 
+		the work shown canvas, and the inputs of each stage). Moving between stages only 
+		shows/hides these views and changes their text and values, nothing is destroyed 
+		and re-created, so long sessions don't slow down or build up memory.
+  
+		:return: The views of each stage, by name (selection, entry, stoichiometry, results)
+		"""
+
+		# Text banner (header and description are changed by text_banner)
+		self.banner_frame = tk.Frame(self.content)
+		self.banner_header = ttk.Label(self.banner_frame, text="", font=("Times New Roman", 25))
+		self.banner_header.pack(pady=15, anchor="center")
+		self.banner_text = ttk.Label(self.banner_frame, text="", font=("Times New Roman", 15), wraplength=800, justify='center')
+		self.banner_text.pack(pady=15, anchor="center")
+		self.banner_frame.pack(padx=15, pady=15, anchor="center", fill="y", expand=True)
+
+		# The balanced equation (or substance), and the work shown (drawn onto one canvas, instead of a widget per number)
+		self.showing = tk.Label(self.content, text="", font=("Times New Roman", 20))
+		self.work_shown_canvas = tk.Canvas(self.content, width=500, height=WORK_SHOWN_HEIGHT, bg=self.content.cget("bg"), highlightthickness=0, bd=0)
+
+		self.bottom_frame = tk.Frame(self.content)
+		self.bottom_frame.pack(side=tk.BOTTOM, fill="x", anchor="center")
+
+		self.views = {}
+
+		# Input type selection
+		self.views["selection"], _, self.stage_input, stage_submit = self.input_creator(self.bottom_frame, "dropdown", "Input Type:", 25, ["Equation", "Substance Only"])
+		stage_submit.config(command=lambda: self.stage_selector(self.stage_input.get()))
+
+		# Equation (or substance) entry, with the live preview of the balanced equation
+		self.views["entry"], self.input_explainer, self.input, self.submit = self.input_creator(self.bottom_frame, "entry", "Equation:", 75)
+		self.submit.config(command=lambda: self.balance(self.input.get(), self.type))
+		self.live_preview = ttk.Label(self.views["entry"], text="", font=("Times New Roman", 15))
+		self.live_preview.pack(side=tk.BOTTOM, anchor="w", pady=5, padx=5, before=self.input_explainer)
+		self.live_balancer = Live_Balancer()
+		self.live_job = None
+		self.input.bind("<KeyRelease>", lambda event: self.schedule_live_preview())
+
+		#
+		# Stoichiometry Inputs
+		#   These contain all required inputs for the stoichiometry calculations.	
+		#   All with their own explainer and input, with a submit button at the end.
+		#   The substances are filled in once the equation (or substance) is known.
+		#
+
+		self.views["stoichiometry"] = tk.Frame(self.bottom_frame)
+		self.given_amount = self.stoichiometry_input("Given Amount?", "entry")
+		self.given_measurement = self.stoichiometry_input("Given Measurement Unit?", "dropdown", UNITS.names())
+		self.given_substance = self.stoichiometry_input("Given Substance?", "dropdown")
+		self.wanted_measurement = self.stoichiometry_input("Wanted Measurement Unit?", "dropdown", UNITS.names())
+		self.wanted_substance = self.stoichiometry_input("Wanted Substance?", "dropdown")
+
+		# Submit button to check all inputs
+		self.stoichify_button = ttk.Button(self.views["stoichiometry"], text="Stoichify!", style="Accent.TButton", command=lambda: self.stoichify(self.type))
+		self.stoichify_button.pack(side=tk.BOTTOM, pady=15, fill=tk.X)
+
+		# Results (only the restart button, the rest is in the content)
+		self.views["results"] = tk.Frame(self.bottom_frame)
+		self.restart_button = tk.Button(self.views["results"], text="Restart Stoichiometry", bg="tomato", highlightthickness = 0, bd = 0, command=self.restart_stoichiometry, width=40, height=2, font=("Times New Roman", 15))
+		self.restart_button.pack(pady=15)
+
+		return self.views
+
+	def show_view(self, name):
+		"""
+		Shows one stage's view at the bottom of the window, hiding the others.
+
+		:param name: The name of the view (selection, entry, stoichiometry, results)
+		"""
+
+		for view in self.views.values():
+			view.pack_forget()
+		self.views[name].pack(pady=15, anchor="center")
+
+	def show_entity(self, text, placed=False):
+		"""
+		Shows the balanced equation (or substance), under the banner or in the middle of the content.
+
+		:param text: The balanced equation (or substance)
+		:param placed: Whether it's placed in the middle of the content (results), or packed under the banner
+		"""
+
+		self.showing.config(text=text)
+		self.showing.pack_forget()
+		self.showing.place_forget()
+		if placed:
+			self.showing.place(relx=0.5, rely=0.5, anchor='center')
+		else:
+			self.showing.pack(before=self.bottom_frame)
+
+	def hide_results(self):
+		"""
+		Hides the equation/substance display and the work shown (they're kept for next time).
+		"""
+
+		self.showing.pack_forget()
+		self.showing.place_forget()
+		self.work_shown_canvas.place_forget()
+		self.work_shown_canvas.delete("all")
+
 	def start(self):
 		"""
 		The "start" stage, where the user is greeted with a welcome message 
 		and asked to select their input type (Equation or Substance Only).
-		This method only ADDS widgets to the window, it does not destroy any.
-		Use the reset method to clear all widgets and re-create the start screen.
+		The widgets are built once (see build_views), and only shown here.
   
 		:return: Stoichify's Main/Start Window
 		"""
@@ -120,28 +237,26 @@ class Main_Window:
 		# Welcome Statement
 		self.text_banner("Welcome to Stoichify!", "Built by Nathan Parker, with the goal of simplifying the process of stoichiometry for beginner chemistry students. Stoichify is made for turning the daunting complexity of stoichiometry, into digestible steps, with all the work shown. If you experience any issues and want to see all contributors, please view the extra page via the right most button in the navigation bar.")
 
-		self.bottom_frame = tk.Frame(self.content)
-		self.bottom_frame.pack(side=tk.BOTTOM, fill="x", anchor="center")
-
-		self.input_creator(self.bottom_frame, "dropdown", "Input Type:", 25, "stage_selection", ["Equation", "Substance Only"])
+		self.hide_results()
+		self.stage_input.set("")
+		self.show_view("selection")
 
 	def reset(self):
 		"""
-		Resets the window to the start, clearing all widgets and 
-		re-creating (not killing the window) the start screen. 
+		Resets the window to the start, clearing all inputs and showing
+		the start screen again (nothing is destroyed, see build_views).
 		Only triggered upon clicking the restart button in the navbar.
   
 		:return: Stoichify's Main/Start Window
 		"""
      
-		for child in self.content.winfo_children(): # Vanish all children
-			child.destroy()
-		self.input_frame.destroy()
+		self.worker.cancel() # Anything still running is for the old stage
+		self.stop_progress()
 		self.start() # Go back to start layout
 
 	def text_banner(self, header, desc):
 		"""
-		Creates a text banner with a header and description, at the
+		Changes the text banner's header and description, at the
 		top of the window. This banner is used to display information
 		to the user about the current stage of the program, and other
 		instructions.
@@ -151,263 +266,301 @@ class Main_Window:
 		:return: Stoichify's Text Banner
 		"""
 
-		self.banner_frame = tk.Frame(self.content)
-		self.banner_frame.pack(padx=15, pady=15, anchor="center", fill="y", expand=True)
-
-		self.banner_header = ttk.Label(self.banner_frame, text=header, font=("Times New Roman", 25))
-		self.banner_header.pack(pady=15, anchor="center")
-
-		self.banner_text = ttk.Label(self.banner_frame, text=desc, font=("Times New Roman", 15), wraplength=800, justify='center')
-		self.banner_text.pack(pady=15, anchor="center")		
- 
+		self.banner_header.config(text=header)
+		self.banner_text.config(text=desc)
 		return self.banner_frame
  
-	def stage_selector(self, stage, frame):
+	def stage_selector(self, stage):
 		"""
-		Destroys the current frame contents, and goes to the next
-		stage based on the user's selection. The stages are either
-		"Equation" or "Substance Only", leading to different
-		logical paths in the program.
+		Goes to the next stage based on the user's selection. The stages
+		are either "Equation" or "Substance Only", leading to different
+		logical paths in the program (the same entry is used for both).
   
 		:param stage: The user's selection of the next stage
-		:param frame: The frame to place the input in
 		:return: The next stage specified by the user
 		"""
 
-		self.banner_frame.destroy()
-		self.input_frame.destroy()
-     
 		# Selects the stage, equations require slightly different logic
 		if stage == "Equation":
-			self.string = tk.StringVar()
+			self.type = "equation"
 			self.text_banner("Inputting a Chemical Equation", "Since you chose “Equation Mode,” you need to type an equation CAREFULLY in the input below. Any mistyping will result in incorrect balancing, affecting the rest of the calculation. An example is: Fe + O2 → Fe2O3. For the formatting, include pluses between substances, correct element capitalization, all subscripts, an arrow of some sort (UNICODE or a dash and greater than “->”), and no charges (oxidation-reactions aren't supported).")
-			self.input_creator(frame, "entry", "Equation:", 75, "balance_equation")
+			self.input_explainer.config(text="Equation:")
+			self.input.config(width=75)
     
 		elif stage == "Substance Only":
+			self.type = "substance"
 			self.text_banner("Inputting a Substance Only", "Since you chose “Substance Only Mode,” you need to type a substance CAREFULLY in the input below. An example is: H2O. For the formatting, include the correct element capitalization, all subscripts, and no charges")
-			self.input_creator(frame, "entry", "Substance:", 25, "substance_only")
+			self.input_explainer.config(text="Substance:")
+			self.input.config(width=25)
+
+		else:
+			return
+
+		self.input.delete(0, tk.END)
+		self.live_preview.config(text="")
+		self.show_view("entry")
  
-	def input_creator(self, frame, type, tooltip, width, stage=None, dropdown_options=None):
+	def input_creator(self, frame, type, tooltip, width, dropdown_options=None):
 		"""
 		A shorthand function to create inputs with a frame, explainer (tooltip),
 		and they input (based on type - entry or dropdown). With a submit button;
-		usually only for one input creation. After the checks clear, inputs are 
-		cleared, and the next stage is shown with inputs for stoichiometry 
-		(not using the input_creator). 
+		usually only for one input creation. Called once per view (see build_views),
+		which then sets the submit button's command.
   
 		:param frame: The frame to place the input in
 		:param type: The type of input (entry or dropdown)
 		:param tooltip: The explainer text for the input
 		:param width: The width of the input (applies to both types)
-		:param stage: The current stage to apply it's command to the submit button 
 		:param dropdown_options: The options for the dropdown (only for dropdown type)
-		:return: A input with a explainer, input, and submit button
+		:return: The (unpacked) input frame, and its explainer, input, and submit button
 		"""
 
 		# Create the input frame
-		self.input_frame = tk.Frame(frame)
-		self.input_frame.pack(pady=15)
+		input_frame = tk.Frame(frame)
 
 		# Add explainer text
-		self.input_explainer = ttk.Label(self.input_frame, text=tooltip, font=("Times New Roman", 15), width=15)
-		self.input_explainer.pack(anchor="w", pady=5, padx=5)
+		explainer = ttk.Label(input_frame, text=tooltip, font=("Times New Roman", 15), width=15)
+		explainer.pack(anchor="w", pady=5, padx=5)
 
 		# Create the input based on the type
 		if type == "entry":
-			self.input = ttk.Entry(self.input_frame, width=width)
-			self.input.pack(side=tk.LEFT, padx=5)
+			input = ttk.Entry(input_frame, width=width)
+			input.pack(side=tk.LEFT, padx=5)
 		elif type == "dropdown":
-			self.input = ttk.Combobox(self.input_frame, values=dropdown_options, width=width, state="readonly")
-			self.input.pack(side=tk.LEFT, padx=5)
-
-		self.submit = ttk.Button(self.input_frame, text="Submit")
-
-		# Change the command based on current stage
-		if stage == "stage_selection":
-			self.submit.config(command=lambda: self.stage_selector(self.input.get(), frame))
-		elif stage == "balance_equation":
-			self.submit.config(command=lambda: self.balance(self.input.get(), "equation"))  
-		elif stage == "substance_only":
-			self.submit.config(command=lambda: self.balance(self.input.get(), "substance"))
-   
+			input = ttk.Combobox(input_frame, values=dropdown_options, width=width, state="readonly")
+			input.pack(side=tk.LEFT, padx=5)
+
 		# Style the submit button
-		self.submit.config(style="Accent.TButton")
-		self.submit.pack(side=tk.LEFT, padx=5)
+		submit = ttk.Button(input_frame, text="Submit", style="Accent.TButton")
+		submit.pack(side=tk.LEFT, padx=5)
   
-		return self.input_frame
+		return input_frame, explainer, input, submit
+
+	def stoichiometry_input(self, tooltip, type, dropdown_options=None):
+		"""
+		Creates one row of the stoichiometry inputs (an explainer, and an entry or dropdown).
+
+		:param tooltip: The explainer text for the input
+		:param type: The type of input (entry or dropdown)
+		:param dropdown_options: The options for the dropdown (the substances are set later)
+		:return: The input
+		"""
+
+		row = tk.Frame(self.views["stoichiometry"])
+		row.pack(side=tk.TOP, fill=tk.X)
+		explainer = ttk.Label(row, text=tooltip, font=("Times New Roman", 15), width=25)
+		explainer.pack(side=tk.LEFT)
+		if type == "entry":
+			input = ttk.Entry(row, width=20)
+		else:
+			input = ttk.Combobox(row, values=dropdown_options or [], width=15, state="readonly")
+		input.pack(side=tk.LEFT, padx=5)
+		return input
+
+	def schedule_live_preview(self, delay=250):
+		"""
+		Debounces the live preview, so the equation is only balanced once the
+		user stops typing for a moment (not on every single keystroke).
+
+		:param delay: How long (in milliseconds) to wait after the last keystroke
+		"""
+
+		if self.live_job is not None:
+			self.window.after_cancel(self.live_job)
+		self.live_job = self.window.after(delay, self.update_live_preview)
+
+	def update_live_preview(self):
+		"""
+		Balances the equation typed so far (only re-parsing the substances that changed,
+		see live.py), and shows it under the entry. Half-typed equations just show why
+		they can't be balanced yet.
+		"""
+
+		self.live_job = None
+		equation = self.input.get()
+		if self.type != "equation" or not equation.strip(): # Substances aren't balanced
+			return self.live_preview.config(text="")
+		preview = self.live_balancer.update(equation)
+		if preview.error is None:
+			self.live_preview.config(text=preview.balanced)
+		else:
+			self.live_preview.config(text=f"Keep typing... ({preview.error.split(':')[0]})")
 
 	def balance(self, string, type, bypass=False):
 		"""
 		Calls entities.py to balance and create the equation or create a substance object
-		from the user's input. Upon the call of such, errors are caught and displayed
-		via a messagebox. 
+		from the user's input, in the background (so the window doesn't freeze on big equations).
+		Upon the call of such, errors are caught and displayed via a messagebox. 
 		"""
 
-		# Remove children from the work_shown_wrapper (if it exists)
-		if hasattr(self, 'work_shown_wrapper') and self.work_shown_wrapper:
-			self.work_shown_wrapper.destroy()
+		self.hide_results()
 
-		try:
-			if bypass == False:
-				if type == "equation":
-					self.string = Equation(string)
-				elif type == "substance":
-					self.string = Substance(string)
-			elif bypass == True:
-				self.string.work_shown = [] # Clear work_shown for the new stoichiometry calculation
-		except Exception as e:
-			error_string = str(e)
-			if ":" in error_string:
-				error_string = error_string.split(":")
-				return messagebox.showerror(error_string[0], error_string[1])
+		if bypass == True:
+			return self.show_stoichiometry_inputs(type)
+
+		entity = Equation if type == "equation" else Substance
+		self.run_in_background(lambda: entity(string), lambda result: self.show_stoichiometry_inputs(type, result))
+
+	def show_stoichiometry_inputs(self, type, string=None):
+		"""
+		Shows the balanced equation (or substance), and the (cleared) inputs for the stoichiometry.
+
+		:param type: The type of input (equation or substance)
+		:param string: The new Equation or Substance object (None to keep the current one)
+		"""
+
+		if string is not None:
+			self.string = string
+
+		# Change the phrase based on the type (equation or substance), I wanted this to be as specific as possible
+		self.last_phrase = ""
+		if type == "equation":
+			self.last_phrase = "Below is your balanced chemical equation, in which the coefficients will be used for the molar ratios:"
+		elif type == "substance":
+			self.last_phrase = "Below is your substance:"
+
+		self.text_banner("Doing the Stoichiometry", f"With a now fully balanced equation, you can start the stoichiometry process. For the given amount, you can enter an integer, float, or a number in scientific notation (Ex: “4.2 x 10^24” OR “4.2e24”). {self.last_phrase}")
+
+		# Based on the type, show either the fully balanced equation or the just the substance
+		if type == "equation":
+			self.show_entity(self.string.balanced)
+			substances = self.string.substances
+		elif type == "substance":
+			self.show_entity(self.string.calculation_presentation())
+			substances = [self.string.substance]
+
+		# Clear the inputs, and fill in the substances (substance mode is only one substance, equation mode is multiple substances)
+		self.given_amount.delete(0, tk.END)
+		self.given_measurement.set("")
+		self.wanted_measurement.set("")
+		for input in (self.given_substance, self.wanted_substance):
+			input.config(values=substances)
+			if type == "substance":
+				input.current(0)
 			else:
-				return messagebox.showerror("Error Occurred - UNKNOWN", e)
+				input.set("")
+
+		self.show_view("stoichiometry")
+
+	def run_in_background(self, function, on_done):
+		"""
+		Runs the function on the background worker (superseding anything still running), 
+		with the progress bar going until it's done. The result (or error) is handed back
+		on Tk's main loop, so it's safe to change widgets from on_done.
+
+		:param function: The work to do (it must not touch any widgets)
+		:param on_done: Called with the function's result
+		"""
+
+		def done(result):
+			self.stop_progress()
+			on_done(result)
+
+		def failed(error):
+			self.stop_progress()
+			self.show_error(error)
+
+		self.progress.pack(side=tk.BOTTOM, pady=5)
+		self.progress.start(10)
+		self.worker.submit(function, done, failed)
+
+	def stop_progress(self):
+		"""
+		Stops and hides the progress bar.
+		"""
+
+		self.progress.stop()
+		self.progress.pack_forget()
+
+	def show_error(self, e):
+		"""
+		Shows the error in a messagebox, titled by its category (the part before the colon).
+
+		:param e: The exception raised
+		"""
+
+		error_string = str(e)
+		if ":" in error_string:
+			error_string = error_string.split(":")
+			return messagebox.showerror(error_string[0], error_string[1])
 		else:
-			# Clear the banner
-			self.banner_frame.destroy()
-			self.last_phrase = ""
-
-			# Change the phrase based on the type (equation or substance), I wanted this to be as specific as possible
-			if type == "equation":
-				self.last_phrase = "Below is your balanced chemical equation, in which the coefficients will be used for the molar ratios:"
-			elif type == "substance":
-				self.last_phrase = "Below is your substance:"
-
-			self.text_banner("Doing the Stoichiometry", f"With a now fully balanced equation, you can start the stoichiometry process. For the given amount, you can enter an integer, float, or a number in scientific notation (Ex: “4.2 x 10^24” OR “4.2e24”). {self.last_phrase}")
-
-			# Based on the type, show either the fully balanced equation or the just the substance
-			if type == "equation":
-				self.showing_chemical_equation = tk.Label(self.content, text=self.string.balanced, font=("Times New Roman", 20))
-				self.showing_chemical_equation.pack()
-
-			elif type == "substance":
-				self.showing_substance = tk.Label(self.content, text=self.string.calculation_presentation(), font=("Times New Roman", 20))
-				self.showing_substance.pack()
-
-			# Destroy and create the input frame for the stoichiometry inputs
-			self.input_frame.destroy()
-			self.input_frame = tk.Frame(self.window)
-			self.input_frame.pack(side=tk.BOTTOM, pady=15, anchor="center")
-
-			#
-			# Stoichiometry Inputs
-			#   These contain all required inputs for the stoichiometry calculations.	
-			#   All with their own explainer and input, with a submit button at the end.
-			#
-
-			# Given amount
-			frame_given_amount = tk.Frame(self.input_frame)
-			frame_given_amount.pack(side=tk.TOP, fill=tk.X)
-			self.given_amount_explainer = ttk.Label(frame_given_amount, text="Given Amount?", font=("Times New Roman", 15), width=25)
-			self.given_amount_explainer.pack(side=tk.LEFT)
-			self.given_amount = ttk.Entry(frame_given_amount, width=20)
-			self.given_amount.pack(side=tk.LEFT, padx=5)
-
-			# Given measurement
-			frame_given_measurement = tk.Frame(self.input_frame)
-			frame_given_measurement.pack(side=tk.TOP, fill=tk.X)
-			self.given_measurement_explainer = ttk.Label(frame_given_measurement, text="Given Measurement Unit?", font=("Times New Roman", 15), width=25)
-			self.given_measurement_explainer.pack(side=tk.LEFT)
-			self.given_measurement = ttk.Combobox(frame_given_measurement, values=["g", "mol", "L", "r.p."], width=15, state="readonly")
-			self.given_measurement.pack(side=tk.LEFT, padx=5)
-
-			# Given substance (substance mode is only one substance, equation mode is multiple substances)
-			if type == "equation":
-				frame_given_substance = tk.Frame(self.input_frame)
-				frame_given_substance.pack(side=tk.TOP, fill=tk.X)
-				self.given_substance_explainer = ttk.Label(frame_given_substance, text="Given Substance?", font=("Times New Roman", 15), width=25)
-				self.given_substance_explainer.pack(side=tk.LEFT)
-				self.given_substance = ttk.Combobox(frame_given_substance, values=self.string.substances, width=15, state="readonly")
-				self.given_substance.pack(side=tk.LEFT, padx=5)
-
-			elif type == "substance":
-				frame_given_substance = tk.Frame(self.input_frame)
-				frame_given_substance.pack(side=tk.TOP, fill=tk.X)
-				self.given_substance_explainer = ttk.Label(frame_given_substance, text="Given Substance?", font=("Times New Roman", 15), width=25)
-				self.given_substance_explainer.pack(side=tk.LEFT)
-				self.given_substance = ttk.Combobox(frame_given_substance, values=[self.string.substance], width=15, state="readonly")
-				self.given_substance.current(0)
-				self.given_substance.pack(side=tk.LEFT, padx=5)
-
-			# Wanted measurement
-			frame_wanted_measurement = tk.Frame(self.input_frame)
-			frame_wanted_measurement.pack(side=tk.TOP, fill=tk.X)
-			self.wanted_measurement_explainer = ttk.Label(frame_wanted_measurement, text="Wanted Measurement Unit?", font=("Times New Roman", 15), width=25)
-			self.wanted_measurement_explainer.pack(side=tk.LEFT)
-			self.wanted_measurement = ttk.Combobox(frame_wanted_measurement, values=["g", "mol", "L", "r.p."], width=15, state="readonly")
-			self.wanted_measurement.pack(side=tk.LEFT, padx=5)
-
-			# Wanted substance (substance mode is only one substance, equation mode is multiple substances)
-			if type == "equation":
-				frame_wanted_substance = tk.Frame(self.input_frame)
-				frame_wanted_substance.pack(side=tk.TOP, fill=tk.X)
-				self.wanted_substance_explainer = ttk.Label(frame_wanted_substance, text="Wanted Substance?", font=("Times New Roman", 15), width=25)
-				self.wanted_substance_explainer.pack(side=tk.LEFT)
-				self.wanted_substance = ttk.Combobox(frame_wanted_substance, values=self.string.substances, width=15, state="readonly")
-				self.wanted_substance.pack(side=tk.LEFT, padx=5)
-	
-			elif type == "substance":
-				frame_wanted_substance = tk.Frame(self.input_frame)
-				frame_wanted_substance.pack(side=tk.TOP, fill=tk.X)
-				self.wanted_substance_explainer = ttk.Label(frame_wanted_substance, text="Wanted Substance?", font=("Times New Roman", 15), width=25)
-				self.wanted_substance_explainer.pack(side=tk.LEFT)
-				self.wanted_substance = ttk.Combobox(frame_wanted_substance, values=[self.string.substance], width=15, state="readonly")
-				self.wanted_substance.current(0)
-				self.wanted_substance.pack(side=tk.LEFT, padx=5)
-
-			# Submit button to check all inputs
-			self.submit = ttk.Button(self.input_frame, text="Stoichify!", style="Accent.TButton", command=lambda: self.stoichify(type))
-			self.submit.pack(side=tk.BOTTOM, pady=15, fill=tk.X)
-
-	def restart_stoichiometry(self, string, type):
-		"""
-		Allows the user to renew the stoichiometry process, by clearing
-		all widgets and re-creating the entering of stoichiometry inputs.
-  
-		:param string: The string object (either an string representation equation or substance)
-		:param type: The type of input (equation or substance)
+			return messagebox.showerror("Error Occurred - UNKNOWN", e)
+
+	def restart_stoichiometry(self):
+		"""
+		Allows the user to renew the stoichiometry process, by going back
+		to the (cleared) stoichiometry inputs of the same equation/substance.
 		"""
 
-		self.restart_button = tk.Button(self.input_frame, text="Restart Stoichiometry", bg="tomato", highlightthickness = 0, bd = 0, command=lambda: self.balance(string, type, True), width=40, height=2, font=("Times New Roman", 15))
-		self.restart_button.pack(pady=15)
+		self.balance(self.string, self.type, True)
 
-	def create_fraction(self, frame, numerator_text, denominator_text): 
+	def create_fraction(self, canvas, x, numerator_text, denominator_text): 
 		"""
 		A custom fraction creator to display all values/work as would be
 		shown on a piece of paper. So that the user can see the work blown
 		out, instead of just showing an answer. Each fraction has it's numerator
 		and denominator, with a line in-between (1/1 fractions are disregarded in
-  		stoichiometry.py).
+  		stoichiometry.py). Drawn straight onto the work shown canvas.
 	
-		:param frame: The frame to place the fraction in
+		:param canvas: The canvas to draw the fraction on
+		:param x: Where the fraction starts (from the left of the canvas)
 		:param numerator_text: The numerator of the fraction
 		:param denominator_text: The denominator of the fraction
-		:return: A fraction with a numerator, denominator, and line in-between to be placed in the work_shown
+		:return: Where the fraction ends (from the left of the canvas)
 		"""
 
-		# Create the fraction holder (numerator, line, denominator)
-		fraction_holder = tk.Frame(frame)
-		fraction_holder.pack(side=tk.LEFT, padx=5, expand=True)
+		middle = WORK_SHOWN_HEIGHT // 2
+
+		# Top and bottom parts of the fraction (numerator and denominator), centered over each other
+		numerator = canvas.create_text(x, middle - 4, text=numerator_text, font=WORK_SHOWN_FONT, fill=self.showing.cget("fg"), anchor="sw")
+		denominator = canvas.create_text(x, middle + 4, text=denominator_text, font=WORK_SHOWN_FONT, fill=self.showing.cget("fg"), anchor="nw")
+		width = max(canvas.bbox(numerator)[2], canvas.bbox(denominator)[2]) - x # Set the width of the fraction based on the longest string
+		for item in (numerator, denominator):
+			left, _, right, _ = canvas.bbox(item)
+			canvas.move(item, (width - (right - left)) // 2, 0)
 
-		max_length = max(len(numerator_text), len(denominator_text)) # Set the width of the fraction based on the longest string
-	
-		# Top part of the fraction (numerator)
-		numerator = tk.Label(fraction_holder, text=numerator_text, font=("Times New Roman", 20), width=max_length)
-		numerator.pack(side=tk.TOP, anchor='center')
-	
 		# Line in-between the numerator and denominator (to actually make it a fraction)
-		line = tk.Frame(fraction_holder, height=1, width=200, bg="white")
-		line.pack(side=tk.TOP, fill=tk.X, anchor='center')
-	
-		# Bottom part of the fraction (denominator)
-		denominator = tk.Label(fraction_holder, text=denominator_text, font=("Times New Roman", 20), width=max_length)
-		denominator.pack(side=tk.TOP, anchor='center')
-  
-		return fraction_holder
+		canvas.create_line(x, middle, x + width, middle, fill="white")
   
+		return x + width
+
+	def draw_work_shown(self, work_shown):
+		"""
+		Draws the work shown onto the canvas (cleared first), the given
+		and the answer as text and the conversion factors as fractions,
+		then sizes the canvas to fit.
+
+		:param work_shown: The recorded steps of the calculation
+		:return: The work shown canvas
+		"""
+
+		canvas = self.work_shown_canvas
+		canvas.delete("all")
+		middle = WORK_SHOWN_HEIGHT // 2
+		x = WORK_SHOWN_PADDING
+
+		def text(x, string):
+			item = canvas.create_text(x, middle, text=string, font=WORK_SHOWN_FONT, fill=self.showing.cget("fg"), anchor="w")
+			return canvas.bbox(item)[2] + WORK_SHOWN_PADDING
+
+		for index, step in enumerate(work_shown):
+			# The given and the answer are text
+			if isinstance(step, Given_Step):
+				x = text(x, f"{format_quantity(step.quantity)} ×")
+			elif isinstance(step, Result_Step):
+				x = text(x, f"= {format_quantity(step.quantity)}")
+			# Conversion factors are fractions (like molar bridge or conversions)
+			elif isinstance(step, Conversion_Factor):
+				x = self.create_fraction(canvas, x, format_quantity(step.numerator), format_quantity(step.denominator)) + WORK_SHOWN_PADDING
+				if index+1 < len(work_shown) and isinstance(work_shown[index+1], Conversion_Factor):
+					x = text(x, "×")
+
+		canvas.config(width=x, height=WORK_SHOWN_HEIGHT)
+		return canvas
+
 	def stoichify(self, type):
 		"""
-		Checks all the stoichiometry inputs (created by balance), 
+		Checks all the stoichiometry inputs (built by build_views), 
 		calls the stoichify method, and recreates the display of 
 		the equation/substance, then shows the work shown as a
 		student would write it on a piece of paper.
@@ -424,7 +577,7 @@ class Main_Window:
 		#
 
 		given_amount = self.given_amount.get()
-		given_significant_figures = Significant_Figures().parser(given_amount)
+		given_significant_figures = Measured.parse(given_amount).significant_figures # Counted from the digits as typed, as the amount is read
 
 		# Get all other inputs 
 		given_measurement = self.given_measurement.get()
@@ -437,74 +590,56 @@ class Main_Window:
 		#   Checks to see if any inputs were left blank, and throws error messages if so.
 		#	
 
-		if given_measurement not in ["g", "mol", "L", "r.p."]:
+		if given_measurement not in UNITS:
 			return messagebox.showerror("Given Measurement Left Blank", "The given measurement was left blank. Please select a valid measurement.")
   
 		if type == "equation" and given_substance not in self.string.substances:
 			return messagebox.showerror("Given Substance Left Blank", "The given substance was left blank. Please select a valid substance.")
   
-		if wanted_measurement not in ["g", "mol", "L", "r.p."]:
+		if wanted_measurement not in UNITS:
 			return messagebox.showerror("Wanted Measurement Left Blank", "The wanted measurement is was left blank. Please select a valid measurement.")
   
 		if type == "equation" and wanted_substance not in self.string.substances:
 			return messagebox.showerror("Wanted Substance Left Blank", "The wanted substance is was left blank. Please select a valid substance.")
   
-		# Call the stoichify method from entities.py (changes based on type - equation or substance)
-		try:
-			self.string.stoichify(given_amount, given_significant_figures, given_measurement, given_substance, wanted_measurement, wanted_substance)
-		except Exception as e:
-			error_string = str(e)
-			if ":" in error_string:
-				error_string = error_string.split(":")
-				return messagebox.showerror(error_string[0], error_string[1])
-			else:
-				return messagebox.showerror("Error Occurred - UNKNOWN", e)
+		# Call the stoichify method from entities.py in the background (changes based on type - equation or substance)
+		string = self.string
+		self.run_in_background(lambda: string.stoichify(given_amount, given_significant_figures, given_measurement, given_substance, wanted_measurement, wanted_substance).work_shown, lambda work_shown: self.show_results(type, work_shown)) # A fresh result every time (nothing builds up on self.string)
+
+	def show_results(self, type, work_shown):
+		"""
+		Shows the equation/substance again (in the middle), then draws the
+		work shown as a student would write it on a piece of paper.
+
+		:param type: The type of input (equation or substance)
+		:param work_shown: The recorded steps of the calculation
+		:return: Stoichiometry Results (Balanced Equation, Work Shown, etc.)
+		"""
 
-		# Destroy the banner, substance/equation, and input frame
-		self.banner_frame.destroy()
+		self.work_shown = work_shown
 		if type == "equation":
-			self.showing_chemical_equation.destroy()
 			self.phrase = "balanced chemical equation"
 		elif type == "substance":
-			self.showing_substance.destroy()
 			self.phrase = "substance"
 
-		for child in self.input_frame.winfo_children(): # Vanish all children
-			child.destroy()
-
-		self.restart_stoichiometry(self.string, type)
-
 		# Explain to the user what the results
 		self.text_banner("Stoichiometry Results", f"Below is the completed calculation! This includes the final {self.phrase}, and the conversion from the given to the wanted. All shown out like you would write on a piece of paper. If this calculation is wrong, please go to the extra page and report an issue.")
 
 		if type == "equation":
-			self.showing_chemical_equation = tk.Label(self.content, text=self.string.balanced, font=("Times New Roman", 20))
-			self.showing_chemical_equation.place(relx=0.5, rely=0.5, anchor='center')
-		
+			self.show_entity(self.string.balanced, placed=True)
 		elif type == "substance":
-			self.showing_substance = tk.Label(self.content, text=self.string.calculation_presentation(), font=("Times New Roman", 20))
-			self.showing_substance.place(relx=0.5, rely=0.5, anchor='center')        
+			self.show_entity(self.string.calculation_presentation(), placed=True)
 
 		#
 		# Work Shown
-		#   Create the wrapper for the work shown, and loop throught the
-		#   work_shown list to display the work as a student would write it.
+		#   Draw the recorded steps onto the work shown canvas,
+		#   to display the work as a student would write it.
 		#		
   
-		self.work_shown_wrapper = ttk.Frame(self.content, width=500, style="Accent.TFrame")
-		self.work_shown_wrapper.place(relx=0.5, rely=0.7, anchor='center')
-  
-		for index, fraction in enumerate(self.string.work_shown):
-			# If it's a string it's a given or answer
-			if isinstance(fraction, str):
-				label = tk.Label(self.work_shown_wrapper, text=fraction, font=("Times New Roman", 20))
-				label.pack(side=tk.LEFT, padx=5)
-			# If it's a tuple it's a fraction (like molar bridge or conversions)
-			elif isinstance(fraction, tuple):
-				self.create_fraction(self.work_shown_wrapper, fraction[0], fraction[1])
-				if index+1 < len(self.string.work_shown) and isinstance(self.string.work_shown[index+1], tuple):
-					label = tk.Label(self.work_shown_wrapper, text="×", font=("Times New Roman", 20))
-					label.pack(side=tk.LEFT, padx=5) 
+		self.draw_work_shown(self.work_shown)
+		self.work_shown_canvas.place(relx=0.5, rely=0.7, anchor='center')
+
+		self.show_view("results")
 
 	def run(self):
 		"""
@@ -515,7 +650,10 @@ class Main_Window:
 		:return: Starts the main window process of Stoichify
 		"""
 
-		self.window.mainloop()
+		try:
+			self.window.mainloop()
+		finally:
+			self.worker.shutdown()
 
 class Extra_Page():
 	"""
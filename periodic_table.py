@@ -0,0 +1,101 @@
+#
+# Every substance needs its elements verified and its molar mass found,
+# which used to mean asking chemlib for a brand new Element (a pandas row lookup)
+# for every single character. This module builds one immutable index of the
+# periodic table the first time it's needed, so validation and atomic masses
+# are plain dictionary hits from then on. All values are copied straight from
+# chemlib, so every molar mass stays exactly the same.
+#
+# Main Libraries:
+# - chemlib: Chemical Library (Periodic Table - https://github.com/harirakul/chemlib/tree/master).
+# - types: MappingProxyType (Read-only view of the index).
+# - array: array (Atomic masses by atomic number, for dot products).
+#
+
+from array import array
+from collections import namedtuple
+from types import MappingProxyType
+
+# A single entry of the periodic table (only what Stoichify needs)
+Periodic_Element = namedtuple("Periodic_Element", ["symbol", "atomic_number", "atomic_mass"])
+
+# chemlib's atomic masses have at most 3 decimals, so in thousandths of g/mol they're exact integers
+MASS_SCALE = 1000
+
+_periodic_table = None # Built upon first use
+_atomic_mass_vector = None
+
+def periodic_table():
+	"""
+	Gets the periodic table index, building it from chemlib's data upon the
+	first call. Afterwards, the same read-only mapping is handed out every time.
+
+	:return: A read-only mapping of element symbols to their Periodic_Element entries.
+	"""
+
+	global _periodic_table
+	if _periodic_table is None:
+		from chemlib.chemistry import pte # Only loaded when the table is built
+
+		table = {}
+		for symbol, atomic_number, atomic_mass in zip(pte["Symbol"], pte["AtomicNumber"], pte["AtomicMass"]):
+			table[str(symbol)] = Periodic_Element(str(symbol), int(atomic_number), float(atomic_mass))
+		_periodic_table = MappingProxyType(table)
+	return _periodic_table
+
+def is_element(symbol):
+	"""
+	Checks if the symbol is an element on the periodic table (case-sensitive, like chemlib).
+
+	:param symbol: The element symbol to check (e.g. "Fe").
+	:return: True if the element exists, False if not.
+	"""
+
+	return symbol in periodic_table()
+
+def element_entry(symbol):
+	"""
+	Looks up the periodic table entry of an element.
+
+	:param symbol: The element symbol to look up (e.g. "Fe").
+	:return: The Periodic_Element entry of the symbol.
+	"""
+
+	try:
+		return periodic_table()[symbol]
+	except KeyError:
+		raise Exception(f"Element Verification: The element '{symbol}' is not found in the periodic table. Please ensure the element is spelled/capitalized correctly.")
+
+def atomic_mass(symbol):
+	"""
+	:param symbol: The element symbol (e.g. "O").
+	:return: The atomic mass of the element (g/mol), identical to chemlib's value.
+	"""
+
+	return element_entry(symbol).atomic_mass
+
+def atomic_number(symbol):
+	"""
+	:param symbol: The element symbol (e.g. "O").
+	:return: The atomic number of the element.
+	"""
+
+	return element_entry(symbol).atomic_number
+
+def atomic_mass_vector():
+	"""
+	Gets every element's atomic mass, indexed by atomic number (index 0 is unused), in
+	thousandths of g/mol. As they're exact integers, a dot product with an element count
+	vector gives the exact molar mass (divide by MASS_SCALE), no matter the order it's summed in.
+
+	:return: The atomic masses, as an array('q') (the same one every call, don't modify it).
+	"""
+
+	global _atomic_mass_vector
+	if _atomic_mass_vector is None:
+		entries = periodic_table().values()
+		vector = array("q", [0]) * (max(entry.atomic_number for entry in entries) + 1)
+		for entry in entries:
+			vector[entry.atomic_number] = round(entry.atomic_mass * MASS_SCALE)
+		_atomic_mass_vector = vector
+	return _atomic_mass_vector
@@ -12,11 +12,21 @@
 # Main Libraries:
 # - math (Rounding numbers)
 # - re (Regular Expressions for pattern matching)
+# - fractions and decimal (Exact amounts that keep their significant figures, see Measured)
+# - numpy (Reading and rounding whole arrays of numbers, only loaded when needed)
 #
 
+from decimal import Decimal
+from fractions import Fraction
+from functools import lru_cache
 import math
 import re
 
+# Any number Stoichify accepts, in one pass: plain (42, 4.20), expanded (4.2 x 10^2, 4.2*10^-27), or shorthand (4.2e2)
+NUMBER_PATTERN = re.compile(r"\s*([+-]?(?:\d+\.?\d*|\.\d+))(?:(?:\s*[xXeE*×]\s*10\s*\^|\s*[xX*×]\s*10)\s*([+-]?\d+)|[eE]([+-]?\d+))?\s*")
+SUPERSCRIPTS = str.maketrans("0123456789-", "⁰¹²³⁴⁵⁶⁷⁸⁹⁻")
+HALF_TOLERANCE = 4 * 2.0 ** -52 # How many float steps under the half still count as the half (see round_sig_array)
+
 class Scientific_Handler():
 	"""
 	Takes numbers, regardless of their format, and converts them to scientific
@@ -39,18 +49,16 @@ class Scientific_Handler():
 		"""
 
 		number_str = str(self.number)
-		match = re.match(r'([0-9.]+)\s*[xXeE*]\s*10\^?([+-]?[0-9]+)', number_str, re.I) # Expanded (e.g. 4.2 x 10^2) 
-
-		if not match:
-			match = re.match(r'([0-9.]+)[eE]([+-]?[0-9]+)', number_str, re.I) # Shorthand (e.g. 4.2e2)
+		match = NUMBER_PATTERN.match(number_str) # Expanded (e.g. 4.2 x 10^2) or shorthand (e.g. 4.2e2), in one pass
 		if match:
-			base, exponent = match.groups()
-			return float(f"{base}e{exponent}")
+			mantissa, expanded, shorthand = match.groups()
+			exponent = expanded or shorthand
+			if exponent is not None:
+				return float(f"{mantissa}e{exponent}")
+		if "." in number_str:
+			return float(self.number)	
 		else:
-			if "." in str(self.number):
-				return float(self.number)	
-			else:
-				return int(self.number)	
+			return int(self.number)	
 
 	def to_scientific(self):
 		"""
@@ -65,15 +73,14 @@ class Scientific_Handler():
 				return float(self.number)
 			else:
 				if len(str(int(float(self.number)))) > 6: 
-					self.number = re.sub("e\+0", "e+", f"{float(self.number):.3e}")
+					self.number = f"{float(self.number):.3e}".replace("e+0", "e+")
 				else:
 					return "{:,}".format(int(self.number)) # If not, use commas to separate the numbers
 
 		base, exponent = str(self.number).lower().split('e') # If it is in a shorthand scientific notation
 
 		# Convert the exponent to superscript
-		superscript_digits = str.maketrans("0123456789-", "⁰¹²³⁴⁵⁶⁷⁸⁹⁻") # Translate the digits to superscript
-		exponent = exponent.translate(superscript_digits).replace("+", "").replace("^", "") # Replace them, and exclude other symbols
+		exponent = exponent.translate(SUPERSCRIPTS).replace("+", "").replace("^", "") # Replace them, and exclude other symbols
 
 		return f"{base} × 10{exponent}"
 
@@ -139,6 +146,328 @@ class Significant_Figures:
 		else:
 			return 0  # Can't take the log of 0
 
+def count_significant_figures(mantissa):
+	"""
+	:param mantissa: The digits of a number, as typed (e.g. "4.20" or "0.0050", without its exponent).
+	:return: The significant figures of the digits (trailing zeros only count after a decimal point).
+	"""
+
+	digits = mantissa.lstrip("+-")
+	if "." in digits:
+		digits = digits.replace(".", "").lstrip("0")
+	else:
+		digits = digits.lstrip("0").rstrip("0")
+	return max(len(digits), 1) # Zero still has one
+
+def exact(number):
+	"""
+	:param number: An int, float, Decimal, or rational number (e.g. a coefficient or a conversion factor).
+	:return: The number as a Fraction (floats by their shortest repr, so 22.4 is exactly 224/10).
+	"""
+
+	if isinstance(number, Fraction):
+		return number
+	if isinstance(number, (int, float, Decimal)):
+		return exact_number(number)
+	if hasattr(number, "numerator") and hasattr(number, "denominator"): # sympy's Rationals
+		return Fraction(int(number.numerator), int(number.denominator))
+	return Fraction(str(number))
+
+@lru_cache(maxsize=1024)
+def exact_number(number):
+	"""
+	:param number: An int, float, or Decimal (the same constants come up again and again, so they're cached).
+	:return: The number as a Fraction.
+	"""
+
+	if isinstance(number, float):
+		return Fraction(repr(number))
+	return Fraction(number)
+
+class Measured():
+	"""
+	A measured amount, kept exact (as a whole number numerator and denominator) along with its
+	significant figures, so nothing is lost between steps (dividing by 22.4 and multiplying back
+	out gives exactly what you started with), and trailing zeros and exponents survive (4.20 x 10^3
+	keeps its 3 significant figures). Multiplying or dividing by exact numbers (coefficients, molar
+	masses, constants) keeps the significant figures, and by another Measured keeps the fewer of the
+	two. It's only rounded (half up) and turned into text at the end, with rounded() and str().
+	"""
+
+	__slots__ = ("numerator", "denominator", "significant_figures")
+
+	def __init__(self, value, significant_figures):
+		"""
+		:param value: The amount (a Fraction, or anything exact() takes).
+		:param significant_figures: The significant figures of the amount.
+		"""
+
+		value = exact(value)
+		self.numerator = value.numerator
+		self.denominator = value.denominator
+		self.significant_figures = significant_figures
+
+	@classmethod
+	def from_ratio(cls, numerator, denominator, significant_figures):
+		"""
+		:param numerator: The whole number on top (with the sign).
+		:param denominator: The whole number on the bottom (above 0). They don't have to be in lowest terms,
+		as they're only ever multiplied (which is what keeps Measured fast), and compared by cross multiplying.
+		:param significant_figures: The significant figures of the amount.
+		:return: The Measured amount.
+		"""
+
+		measured = cls.__new__(cls)
+		measured.numerator = numerator
+		measured.denominator = denominator
+		measured.significant_figures = significant_figures
+		return measured
+
+	@classmethod
+	def parse(cls, number, significant_figures=None):
+		"""
+		:param number: The amount, as a number or a string in any notation Scientific_Handler takes (e.g. "4.20 x 10^3").
+		:param significant_figures: The significant figures of the amount (counted from how it's written if None).
+		:return: The Measured amount.
+		"""
+
+		if isinstance(number, str):
+			match = NUMBER_PATTERN.fullmatch(number)
+			if match is None:
+				raise Exception(f"Number Check: '{number}' isn't a number Stoichify can read (e.g. 42, 4.2, 4.2 x 10^2, or 4.2e2).")
+			mantissa, expanded, shorthand = match.groups()
+
+			# The digits as one whole number, and the power of ten they're off by (e.g. 4.20 x 10^3 is 420 x 10^1)
+			whole, _, decimals = mantissa.partition(".")
+			numerator = int(whole + decimals) if whole.lstrip("+-") or decimals else 0
+			power = int(expanded or shorthand or 0) - len(decimals)
+			if power >= 0:
+				numerator, denominator = numerator * 10 ** power, 1
+			else:
+				denominator = 10 ** -power
+		else:
+			mantissa = repr(number) if isinstance(number, float) else str(number)
+			mantissa = mantissa.lower().split("e")[0]
+			value = exact(number)
+			numerator, denominator = value.numerator, value.denominator
+		if significant_figures is None:
+			significant_figures = count_significant_figures(mantissa)
+		return cls.from_ratio(numerator, denominator, significant_figures)
+
+	@property
+	def value(self):
+		"""
+		:return: The exact amount, as a Fraction (in lowest terms).
+		"""
+
+		return Fraction(self.numerator, self.denominator)
+
+	def __mul__(self, other):
+		if isinstance(other, int): # Coefficients (no need to make them a Fraction)
+			return Measured.from_ratio(self.numerator * other, self.denominator, self.significant_figures)
+		if isinstance(other, Measured):
+			return Measured.from_ratio(self.numerator * other.numerator, self.denominator * other.denominator, min(self.significant_figures, other.significant_figures))
+		other = exact(other)
+		return Measured.from_ratio(self.numerator * other.numerator, self.denominator * other.denominator, self.significant_figures)
+
+	__rmul__ = __mul__
+
+	def __truediv__(self, other):
+		if isinstance(other, Measured):
+			significant_figures = min(self.significant_figures, other.significant_figures)
+		else:
+			significant_figures = self.significant_figures
+			other = exact(other)
+		if not other.numerator:
+			raise ZeroDivisionError(f"Measured({self!s}) / 0")
+		if other.numerator < 0: # Keep the sign on top
+			return Measured.from_ratio(-self.numerator * other.denominator, self.denominator * -other.numerator, significant_figures)
+		return Measured.from_ratio(self.numerator * other.denominator, self.denominator * other.numerator, significant_figures)
+
+	def __rtruediv__(self, other):
+		return Measured.from_ratio(1, 1, self.significant_figures) / self * other
+
+	def __float__(self):
+		return self.numerator / self.denominator
+
+	def __eq__(self, other):
+		if isinstance(other, Measured):
+			return self.numerator * other.denominator == other.numerator * self.denominator and self.significant_figures == other.significant_figures
+		return NotImplemented
+
+	def __hash__(self):
+		return hash((self.value, self.significant_figures))
+
+	def __repr__(self):
+		return f"Measured({str(self.to_decimal())!r}, {self.significant_figures})"
+
+	def round_digits(self):
+		"""
+		Rounds the amount (half up) to its significant figures, all in whole numbers, so an
+		amount sitting right on the half (e.g. 4.515 to 3 significant figures) always goes up.
+
+		:return: The sign ("-" or ""), the significant digits as a whole number, and the power of ten
+		of the last digit (e.g. "", 452, 21 for 4.52 × 10²³).
+		"""
+
+		numerator, denominator = self.numerator, self.denominator
+		if not numerator:
+			return "", 0, 1 - self.significant_figures
+		sign = ""
+		if numerator < 0:
+			sign, numerator = "-", -numerator
+
+		# The power of ten of the first digit (guessed from the lengths, then checked exactly)
+		exponent = len(str(numerator)) - len(str(denominator))
+		if exponent >= 0:
+			if numerator < denominator * 10 ** exponent:
+				exponent -= 1
+		elif numerator * 10 ** -exponent < denominator:
+			exponent -= 1
+
+		# Scale it so the significant figures are the whole part, then add a half and cut off the rest
+		place = exponent - self.significant_figures + 1
+		if place >= 0:
+			denominator *= 10 ** place
+		else:
+			numerator *= 10 ** -place
+		digits = (2 * numerator + denominator) // (2 * denominator)
+		if digits == 10 ** self.significant_figures: # Rounded up a place (e.g. 9.996 to 10.0), so one digit too many
+			digits //= 10
+			place += 1
+		return sign, digits, place
+
+	def to_decimal(self):
+		"""
+		:return: The rounded amount (see round_digits), as a Decimal with exactly its significant figures (e.g. 1.00 stays 1.00).
+		"""
+
+		sign, digits, place = self.round_digits()
+		return Decimal(f"{sign}{digits}E{place}")
+
+	def rounded(self):
+		"""
+		:return: The amount rounded (half up) to its significant figures.
+		"""
+
+		sign, digits, place = self.round_digits()
+		if sign:
+			digits = -digits
+		if place >= 0:
+			return Measured.from_ratio(digits * 10 ** place, 1, self.significant_figures)
+		return Measured.from_ratio(digits, 10 ** -place, self.significant_figures)
+
+	def __str__(self):
+		"""
+		:return: The rounded amount as text, written the way Stoichify always has: in scientific notation
+		from a million up or under 0.0001 (e.g. 6.02 × 10²³), with commas if it's a whole number (e.g. 587,110),
+		and otherwise with exactly its significant figures (e.g. 0.0450).
+		"""
+
+		sign, digits, place = self.round_digits()
+		if not digits:
+			return f"{0:.{max(-place, 0)}f}"
+		digits = str(digits)
+		exponent = place + len(digits) - 1
+		if exponent >= 6 or exponent < -4:
+			mantissa = f"{digits[0]}.{digits[1:]}" if len(digits) > 1 else digits
+			return f"{sign}{mantissa} × 10{str(exponent).translate(SUPERSCRIPTS)}"
+		if place >= 0:
+			return f"{sign}{int(digits) * 10 ** place:,}"
+		if exponent >= 0:
+			return f"{sign}{digits[:place]}.{digits[place:]}"
+		return f"{sign}0.{'0' * (-exponent - 1)}{digits}"
+
+
+def parse_amounts(amounts):
+	"""
+	Reads a whole list of amounts at once (e.g. a column of a CSV export), in any notation
+	Scientific_Handler takes (42, 4.20, 4.2 x 10^2, 4.2*10^-27, 4.2e2), with one compiled
+	pattern per amount. The significant figures are counted in the same pass (from the digits
+	as typed, so trailing zeros after a decimal point count), so nothing has to be read twice.
+
+	:param amounts: The amounts (strings, ints, or floats).
+	:return: A float64 array of the amounts, and an int64 array of their significant figures.
+	"""
+
+	import numpy
+
+	match = NUMBER_PATTERN.fullmatch
+	values = []
+	figures = []
+	for amount in amounts:
+		found = match(amount if isinstance(amount, str) else str(amount))
+		if found is None:
+			raise Exception(f"Number Check: '{amount}' isn't a number Stoichify can read (e.g. 42, 4.2, 4.2 x 10^2, or 4.2e2).")
+		mantissa, expanded, shorthand = found.groups()
+		exponent = expanded or shorthand
+		values.append(float(f"{mantissa}e{exponent}") if exponent is not None else float(mantissa))
+		figures.append(count_significant_figures(mantissa))
+	return numpy.array(values, dtype=numpy.float64), numpy.array(figures, dtype=numpy.int64)
+
+def round_sig_array(values, sig_figs, formatted=False):
+	"""
+	Rounds a whole array of numbers to a certain number of significant figures at once,
+	the same log10 approach as Significant_Figures.round, but done by NumPy for every value
+	(zeros and negatives included, without a branch per number). Like Measured, halves are
+	rounded up (away from zero), not to the even digit, and a value a few float steps under
+	the half is taken as the half (4.515 is stored as 4.51499999..., but was typed as 4.515).
+	Infinities and NaNs are given back as they are.
+
+	:param values: The numbers to round (anything NumPy can turn into an array).
+	:param sig_figs: The number of significant figures to round the numbers to, either one for all
+	of them, or an array with one per number (e.g. the significant figures from parse_amounts).
+	:param formatted: Whether to also give back the rounded numbers as text, written like
+	Measured writes them (trailing zeros kept, commas in whole numbers, and 6.02 × 10²³ from a
+	million up or under 0.0001).
+	:return: A float64 array of the numbers rounded to the specified number significant figures,
+	or (array, text array) if formatted is True.
+	"""
+
+	import numpy
+
+	values, sig_figs = numpy.broadcast_arrays(numpy.asarray(values, dtype=numpy.float64), numpy.asarray(sig_figs, dtype=numpy.int64))
+	finite = numpy.isfinite(values)
+	counted = finite & (values != 0) # Can't take the log of 0 (or of infinity)
+	magnitudes = numpy.floor(numpy.log10(numpy.where(counted, numpy.abs(values), 1.0)))
+	decimals = (sig_figs - 1) - magnitudes
+
+	# Scale by whole powers of ten so the significant figures are the whole part (dividing for negative decimals keeps them exact)
+	scale = 10.0 ** numpy.abs(decimals)
+	scaled = numpy.where(decimals >= 0, numpy.abs(values) * scale, numpy.abs(values) / scale)
+	scaled = numpy.where(counted, scaled, 0.0)
+	digits = numpy.floor(scaled + 0.5 + scaled * HALF_TOLERANCE) # Half up
+	rounded = numpy.where(decimals >= 0, digits / scale, digits * scale)
+	far = counted & (numpy.abs(decimals) > 22) # Powers of ten past 10^22 aren't exact floats, so those are read from their digits instead
+	if far.any():
+		rounded[far] = [float(f"{digit:.0f}e{-decimal:.0f}") for digit, decimal in zip(digits[far].tolist(), decimals[far].tolist())]
+	rounded = numpy.copysign(rounded, values)
+	rounded = numpy.where(finite, numpy.where(counted, rounded, 0.0), values)
+	if not formatted:
+		return rounded
+
+	# Rounding can carry into the next place (9.996 to 10.0), so the magnitudes are taken again
+	nonzero = finite & (rounded != 0)
+	magnitudes = numpy.floor(numpy.log10(numpy.where(nonzero, numpy.abs(rounded), 1.0))).astype(numpy.int64)
+	scientific = nonzero & ((magnitudes < -4) | (magnitudes >= 6))
+	text = numpy.empty(rounded.shape, dtype=object)
+
+	# Each group of numbers with the same decimal places is written at once
+	places = numpy.where(scientific, sig_figs - 1, numpy.maximum(sig_figs - 1 - magnitudes, 0))
+	mantissas = numpy.where(scientific, rounded / 10.0 ** magnitudes, rounded)
+	for place in numpy.unique(places[finite]):
+		group = finite & (places == place)
+		if place == 0: # Whole numbers get commas (and scientific ones don't have any to add)
+			text[group] = [f"{mantissa:,.0f}" for mantissa in mantissas[group].tolist()]
+		else:
+			text[group] = numpy.char.mod(f"%.{place}f", mantissas[group])
+	if scientific.any():
+		exponents = numpy.char.translate(magnitudes[scientific].astype(str), SUPERSCRIPTS)
+		text[scientific] = numpy.char.add(numpy.char.add(text[scientific].astype(str), " × 10"), exponents)
+	if not finite.all():
+		text[~finite] = numpy.char.mod("%f", rounded[~finite]) # inf, -inf, or nan
+	return rounded, text.astype(str)
+
 #
 # Some testing done through creation
 #
@@ -0,0 +1,368 @@
+#
+# Stoichify as a small HTTP/JSON service, built only on asyncio (no web framework).
+# Balancing is the slow part, so it's handed off to a pool of worker processes, and
+# when the same equation is asked for by many requests at once, it's only balanced
+# once (everyone waits on the same result). Only so many requests are worked on at
+# a time, a few more can wait their turn, and the rest are turned away with a 503
+# (Retry-After), so a flood of requests can't pile up without end.
+#
+# Endpoints (all POST, with a JSON body, except GET /health):
+# - /balance      {"equation": "Al + Cl2 -> AlCl3", "engine": "integer"}
+# - /molar-mass   {"substance": "C6H12O6"}
+# - /stoichify    A problem, just like the rows of python -m stoichify.
+#
+# Usage: python service.py [--host 127.0.0.1] [--port 8080] [--workers N]
+#
+# Main Libraries:
+# - asyncio: The server (Streams) and coalescing requests (Futures).
+# - concurrent.futures: ProcessPoolExecutor (Balancing off of the event loop).
+# - json: Request and response bodies.
+#
+
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import json
+
+from batch import balance_record
+from caching import LRU_Cache
+from entities import Substance, BALANCING_ENGINES
+from stoichify import answer_problem, solve_problem
+
+MAX_BODY = 1 << 20 # Biggest request body accepted (1 MiB)
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+class Request_Error(Exception):
+	"""
+	An error to answer the request with (its status code and message), instead of a 500.
+	"""
+
+	def __init__(self, status, message):
+		super().__init__(message)
+		self.status = status
+
+class Stoichify_Service:
+	"""
+	The HTTP/JSON service. Start it with start() (or serve() to run until it's cancelled),
+	and stop it with close(). Every stat it keeps is in self.stats.
+	"""
+
+	def __init__(self, host="127.0.0.1", port=8080, workers=None, executor="process", engine="sympy", max_concurrency=64, max_queue=256, cache_size=4096):
+		"""
+		:param host: The address to listen on.
+		:param port: The port to listen on (0 for any free port, see self.port once started).
+		:param workers: The amount of balancing workers (None for one per CPU core).
+		:param executor: "process" (balancing runs in parallel) or "thread" (lighter, for testing).
+		:param engine: The default balancing engine (see Equation).
+		:param max_concurrency: How many requests are worked on at once.
+		:param max_queue: How many more requests can wait for their turn, before the rest get a 503.
+		:param cache_size: How many balanced equations are kept around.
+		"""
+
+		if engine not in BALANCING_ENGINES:
+			raise Exception(f"Balancing Engine Check: The '{engine}' engine doesn't exist. Please use one of: {', '.join(BALANCING_ENGINES)}.")
+		self.host = host
+		self.port = port
+		self.workers = workers
+		self.executor_type = executor
+		self.engine = engine
+		self.max_concurrency = max_concurrency
+		self.max_queue = max_queue
+		self.balanced = LRU_Cache(maxsize=cache_size) # Balanced_Records, by (equation, engine)
+		self.in_flight = {} # Balances that are still running, by (equation, engine)
+		self.active = 0 # Requests being worked on, or waiting for their turn
+		self.stats = {"requests": 0, "rejected": 0, "balanced": 0, "coalesced": 0, "cached": 0}
+		self.executor = None
+		self.server = None
+		self.semaphore = None
+		self.connections = {} # Open connections (their handling task: writer)
+
+	async def start(self):
+		"""
+		Starts the worker pool and begins listening.
+
+		:return: The service (self.port is the actual port).
+		"""
+
+		self.executor = ProcessPoolExecutor(max_workers=self.workers) if self.executor_type == "process" else ThreadPoolExecutor(max_workers=self.workers)
+		self.semaphore = asyncio.Semaphore(self.max_concurrency)
+		self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+		self.port = self.server.sockets[0].getsockname()[1]
+		return self
+
+	async def serve(self):
+		"""
+		Starts the service, and serves until it's cancelled.
+		"""
+
+		await self.start()
+		try:
+			await self.server.serve_forever()
+		finally:
+			await self.close()
+
+	async def close(self):
+		"""
+		Stops listening, and shuts down the worker pool.
+		"""
+
+		if self.server is not None:
+			self.server.close()
+			for writer in self.connections.values():
+				writer.close() # Kept-alive connections just see the end of their stream, and finish
+			await asyncio.gather(*self.connections, return_exceptions=True)
+			await self.server.wait_closed()
+		if self.executor is not None:
+			self.executor.shutdown(wait=True, cancel_futures=True)
+
+	#
+	# Balancing
+	#   Balanced equations are cached, and an equation that's already being balanced
+	#   isn't balanced again, the request just waits on the same future.
+	#
+
+	async def balance(self, equation, engine=None):
+		"""
+		:param equation: The equation string to balance.
+		:param engine: The balancing engine (the service's default if None).
+		:return: The Balanced_Record of the equation (its error is set if it couldn't be balanced).
+		"""
+
+		engine = engine or self.engine
+		if engine not in BALANCING_ENGINES:
+			raise Request_Error(400, f"Balancing Engine Check: The '{engine}' engine doesn't exist. Please use one of: {', '.join(BALANCING_ENGINES)}.")
+		key = (equation, engine) # Not canonical, the record keeps the equation's own order of substances
+
+		record = self.balanced.get(key)
+		if record is not None:
+			self.stats["cached"] += 1
+			return record
+
+		future = self.in_flight.get(key)
+		if future is not None:
+			self.stats["coalesced"] += 1
+			return await asyncio.shield(future) # One request giving up doesn't cancel it for the others
+
+		future = asyncio.get_running_loop().run_in_executor(self.executor, partial(balance_record, equation, engine))
+		self.in_flight[key] = future
+		future.add_done_callback(partial(self.balanced_done, key)) # Even if this request gives up, the others still share it
+		self.stats["balanced"] += 1
+		return await asyncio.shield(future)
+
+	def balanced_done(self, key, future):
+		"""
+		Forgets a finished balance (whichever requests are still waiting on it), caching its record if it balanced.
+
+		:param key: The (equation, engine) of the balance.
+		:param future: Its finished future.
+		"""
+
+		del self.in_flight[key]
+		if not future.cancelled() and future.exception() is None and future.result().error is None:
+			self.balanced.put(key, future.result())
+
+	#
+	# Endpoints
+	#
+
+	async def endpoint_balance(self, body):
+		record = await self.balance(require(body, "equation"), body.get("engine"))
+		if record.error is not None:
+			raise Request_Error(400, record.error)
+		return {"equation": record.equation, "balanced": record.balanced, "coefficients": dict(zip(record.substances, record.coefficients)), "states": record.states}
+
+	async def endpoint_molar_mass(self, body):
+		result = await asyncio.get_running_loop().run_in_executor(self.executor, partial(molar_mass_answer, require(body, "substance"))) # Parsing (and loading chemlib the first time) is off of the event loop
+		if "error" in result:
+			raise Request_Error(400, result["error"])
+		return result
+
+	async def endpoint_stoichify(self, body):
+		show_work = bool(body.get("show_work", False))
+		problem = {key: value for key, value in body.items() if key not in ("engine", "show_work")}
+		if "equation" in problem:
+			record = await self.balance(require(problem, "equation"), body.get("engine"))
+			if record.error is not None:
+				raise Request_Error(400, record.error)
+			result = dict(problem, balanced=record.balanced)
+			try:
+				answer_problem(problem, record, result, show_work)
+			except Exception as error:
+				raise Request_Error(400, str(error))
+		else:
+			result = solve_problem(problem, None, show_work=show_work) # Substances don't need balancing
+			if "error" in result:
+				raise Request_Error(400, result["error"])
+		return result
+
+	ROUTES = {
+		"/balance": endpoint_balance,
+		"/molar-mass": endpoint_molar_mass,
+		"/stoichify": endpoint_stoichify,
+	}
+
+	#
+	# HTTP
+	#   Just enough HTTP/1.1 for JSON requests: a request line, headers, and a
+	#   Content-Length body. Connections are kept alive until the client closes them.
+	#
+
+	def admit(self):
+		"""
+		:return: Whether there's room for another request (working on it, or waiting for its turn).
+		"""
+
+		return self.active < self.max_concurrency + self.max_queue
+
+	async def handle_connection(self, reader, writer):
+		task = asyncio.current_task()
+		self.connections[task] = writer
+		try:
+			while True:
+				try:
+					head = await read_head(reader)
+					if head is None:
+						break
+					request_line, headers = head
+					keep_alive = headers.get("connection", "").lower() != "close"
+					length = content_length(headers)
+				except Request_Error as error: # Where the request (or its body) ends can't be told, so the connection can't be used again
+					self.stats["requests"] += 1
+					status, payload, extra, keep_alive = error.status, {"error": str(error)}, [], False
+				else:
+					status, payload, extra = await self.handle_request(request_line, await reader.readexactly(length) if length else b"")
+				body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+				head = [f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}", "Content-Type: application/json; charset=utf-8", f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"] + extra
+				writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+				await writer.drain()
+				if not keep_alive:
+					break
+		except (ConnectionError, asyncio.IncompleteReadError):
+			pass
+		finally:
+			del self.connections[task]
+			writer.close()
+
+	async def handle_request(self, request_line, raw_body):
+		"""
+		:param request_line: The first line of the request (e.g. b"POST /balance HTTP/1.1").
+		:param raw_body: The body of the request (see content_length).
+		:return: The status, JSON payload, and extra headers of the response.
+		"""
+
+		self.stats["requests"] += 1
+		try:
+			method, path, _ = request_line.decode("latin-1").split(" ", 2)
+		except ValueError:
+			return 400, {"error": "Request Check: The request line couldn't be read."}, []
+
+		if path == "/health":
+			return 200, {"status": "ok", "active": self.active, **self.stats}, []
+		endpoint = self.ROUTES.get(path)
+		if endpoint is None:
+			return 404, {"error": f"Request Check: There's no '{path}' endpoint."}, []
+		if method != "POST":
+			return 405, {"error": f"Request Check: '{path}' only accepts POST."}, ["Allow: POST"]
+
+		if not self.admit(): # Back-pressure, come back later
+			self.stats["rejected"] += 1
+			return 503, {"error": "Service Check: Too many requests at once, please try again."}, ["Retry-After: 1"]
+
+		self.active += 1
+		try:
+			async with self.semaphore:
+				try:
+					body = json.loads(raw_body or b"{}")
+				except ValueError:
+					raise Request_Error(400, "Request Check: The body isn't valid JSON.")
+				if not isinstance(body, dict):
+					raise Request_Error(400, "Request Check: The body must be a JSON object.")
+				return 200, await endpoint(self, body), []
+		except Request_Error as error:
+			return error.status, {"error": str(error)}, []
+		except Exception as error: # Anything else is the service's fault, but the client still gets an answer
+			return 500, {"error": f"Service Check: The request couldn't be handled ({type(error).__name__}: {error})."}, []
+		finally:
+			self.active -= 1
+
+async def read_head(reader):
+	"""
+	:param reader: The connection's StreamReader.
+	:return: The request line and headers (lowercase names) of the next request, or None once the client is done.
+	"""
+
+	try:
+		request_line = await reader.readline()
+		if not request_line:
+			return None
+		headers = {}
+		while True:
+			line = await reader.readline()
+			if line in (b"\r\n", b"\n", b""):
+				break
+			name, _, value = line.decode("latin-1").partition(":")
+			headers[name.strip().lower()] = value.strip()
+	except (ValueError, asyncio.LimitOverrunError): # Longer than the reader's limit (64 KiB)
+		raise Request_Error(400, "Request Check: The request line or a header is too long.")
+	return request_line, headers
+
+def content_length(headers):
+	"""
+	:param headers: The request headers (lowercase names).
+	:return: The length of the body (0 if there isn't one).
+	"""
+
+	length = headers.get("content-length") or "0"
+	if not length.isdecimal(): # Not a number, or negative
+		raise Request_Error(400, f"Request Check: '{length}' isn't a valid Content-Length.")
+	length = int(length)
+	if length > MAX_BODY:
+		raise Request_Error(413, f"Request Check: The body can't be bigger than {MAX_BODY} bytes.")
+	return length
+
+def molar_mass_answer(formula):
+	"""
+	Reads a substance and works out its molar mass (run by a worker, so it can't hold up the service).
+
+	:param formula: The substance's formula.
+	:return: The substance (with subscripts) and its molar mass, or the error if it isn't a real substance.
+	"""
+
+	try:
+		substance = Substance(formula)
+		substance.substance_scanner() # Make sure it's a real substance
+		return {"substance": substance.calculation_presentation(), "molar_mass": substance.molar_mass()}
+	except Exception as error:
+		return {"error": str(error)}
+
+def require(body, field):
+	"""
+	:param body: The request body.
+	:param field: The field the endpoint needs.
+	:return: The value of the field.
+	"""
+
+	if not isinstance(body.get(field), str) or not body[field]:
+		raise Request_Error(400, f"Request Check: The '{field}' field is required.")
+	return body[field]
+
+def main():
+	parser = argparse.ArgumentParser(description="Run Stoichify as an HTTP/JSON service.")
+	parser.add_argument("--host", default="127.0.0.1", help="The address to listen on.")
+	parser.add_argument("--port", type=int, default=8080, help="The port to listen on.")
+	parser.add_argument("--workers", type=int, help="Balancing worker processes (one per CPU core by default).")
+	parser.add_argument("--engine", choices=BALANCING_ENGINES, default="sympy", help="The default balancing engine.")
+	parser.add_argument("--max-concurrency", type=int, default=64, help="Requests worked on at once.")
+	parser.add_argument("--max-queue", type=int, default=256, help="Requests that can wait their turn (the rest get a 503).")
+	arguments = parser.parse_args()
+
+	service = Stoichify_Service(arguments.host, arguments.port, arguments.workers, engine=arguments.engine, max_concurrency=arguments.max_concurrency, max_queue=arguments.max_queue)
+	print(f"Stoichify is listening on http://{arguments.host}:{arguments.port}")
+	try:
+		asyncio.run(service.serve())
+	except KeyboardInterrupt:
+		pass
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,113 @@
+#
+# The work shown of a stoichiometry calculation used to be built as formatted
+# strings while calculating, even when nobody was going to look at them. Now each
+# step is recorded as a small typed record (a given quantity, a conversion factor,
+# and a result), holding plain numbers and formulas. Turning them into text is left
+# to the renderers below (plain text, Unicode, and LaTeX), or to the GUI, and only
+# happens when the work is actually shown.
+#
+# Main Libraries:
+# - None
+#
+
+from collections import namedtuple
+
+from formula import subscript_formula
+from precision import Scientific_Handler, Measured
+
+# An amount of a substance in a measurement (e.g. 35 g Al), the substance is a formula without its coefficient
+Quantity = namedtuple("Quantity", ["amount", "measurement", "substance"])
+
+# The steps of a calculation, in order: Given_Step × Conversion_Factor × ... = Result_Step
+Given_Step = namedtuple("Given_Step", ["quantity"])
+Conversion_Factor = namedtuple("Conversion_Factor", ["numerator", "denominator"])
+Result_Step = namedtuple("Result_Step", ["quantity"])
+
+SUPERSCRIPT_DIGITS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹⁻", "0123456789-")
+
+def format_quantity(quantity, style="unicode"):
+	"""
+	:param quantity: The Quantity to format.
+	:param style: unicode (subscripts, × 10ⁿ), plain (ASCII only, x 10^n), or latex.
+	:return: The quantity as text (e.g. "6.02 × 10²³ r.p. F₂").
+	"""
+
+	amount = str(quantity.amount) if isinstance(quantity.amount, Measured) else str(Scientific_Handler(quantity.amount).to_scientific()) # Measured amounts already know how they're written
+	if style == "unicode":
+		return f"{amount} {quantity.measurement} {subscript_formula(quantity.substance)}"
+
+	if " × 10" in amount: # Bring the exponent back down from its superscripts
+		base, exponent = amount.split(" × 10")
+		exponent = exponent.translate(SUPERSCRIPT_DIGITS)
+		amount = f"{base} \\times 10^{{{exponent}}}" if style == "latex" else f"{base} x 10^{exponent}"
+	if style == "latex":
+		return f"{amount}\\ \\mathrm{{{quantity.measurement}}}\\ \\mathrm{{{latex_formula(quantity.substance)}}}"
+	return f"{amount} {quantity.measurement} {quantity.substance}"
+
+def latex_formula(substance):
+	"""
+	:param substance: The formula (e.g. Fe2(SO4)3).
+	:return: The formula with LaTeX subscripts (e.g. Fe_{2}(SO_{4})_{3}).
+	"""
+
+	latex = []
+	for character in subscript_formula(substance):
+		digit = "₀₁₂₃₄₅₆₇₈₉".find(character)
+		if digit != -1:
+			if latex and latex[-1].startswith("_{"):
+				latex[-1] = f"{latex[-1][:-1]}{digit}}}" # Multi-digit subscripts share one group
+			else:
+				latex.append(f"_{{{digit}}}")
+		else:
+			latex.append(character.replace("[", "\\lbrack ").replace("]", "\\rbrack "))
+	return "".join(latex)
+
+def render_line(steps, style):
+	"""
+	:param steps: The recorded steps.
+	:param style: unicode or plain.
+	:return: The whole calculation on one line, fractions in parentheses.
+	"""
+
+	times = "×" if style == "unicode" else "x"
+	line = ""
+	for step in steps:
+		if isinstance(step, Given_Step):
+			line += format_quantity(step.quantity, style)
+		elif isinstance(step, Conversion_Factor):
+			line += f" {times} ({format_quantity(step.numerator, style)} / {format_quantity(step.denominator, style)})"
+		elif isinstance(step, Result_Step):
+			line += f" = {format_quantity(step.quantity, style)}"
+	return line
+
+def render_plain(steps):
+	"""
+	:param steps: The recorded steps.
+	:return: The calculation as ASCII-only text (e.g. "35 g Al x (1 mol Al / 26.982 g Al) = 1.3 mol Al").
+	"""
+
+	return render_line(steps, "plain")
+
+def render_unicode(steps):
+	"""
+	:param steps: The recorded steps.
+	:return: The calculation as Unicode text, with subscripts and superscripts.
+	"""
+
+	return render_line(steps, "unicode")
+
+def render_latex(steps):
+	"""
+	:param steps: The recorded steps.
+	:return: The calculation as a LaTeX math expression (fractions with \\frac).
+	"""
+
+	latex = ""
+	for step in steps:
+		if isinstance(step, Given_Step):
+			latex += format_quantity(step.quantity, "latex")
+		elif isinstance(step, Conversion_Factor):
+			latex += f" \\times \\frac{{{format_quantity(step.numerator, 'latex')}}}{{{format_quantity(step.denominator, 'latex')}}}"
+		elif isinstance(step, Result_Step):
+			latex += f" = {format_quantity(step.quantity, 'latex')}"
+	return latex
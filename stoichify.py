@@ -0,0 +1,191 @@
+#
+# Not every computer running Stoichify has a screen, so this module is the
+# headless, command-line way in (python -m stoichify). Problems are read one row at
+# a time from a file or stdin (JSONL or CSV), solved with the same Equation,
+# Substance, and Stoichify classes the GUI uses, and written out one row at a time.
+# Nothing is ever loaded all at once, so the problem files can be as big as you want.
+#
+# Each row has either an "equation" or a "substance", and optionally the problem:
+# "given_amount", "given_measurement", "given_substance", "wanted_measurement",
+# "wanted_substance", and "significant_figures" (counted from the given amount if left out).
+# For a substance, the given and wanted substances default to the substance itself.
+# Rows without a given amount are only balanced.
+#
+# Usage: python -m stoichify [--input FILE] [--input-format jsonl|csv] [--output-format jsonl|csv] [--cache FILE] [--stats]
+#
+# Main Libraries:
+# - argparse: Command line options.
+# - json / csv: Reading and writing problems.
+#
+
+import argparse
+import csv
+import json
+import sys
+
+from caching import LRU_Cache
+from entities import Equation, Substance
+from equation_cache import Equation_Cache
+import instrumentation
+from precision import Measured
+from stoichiometry import solve
+from steps import render_unicode
+
+FORMATS = ("jsonl", "csv")
+PROBLEM_FIELDS = ["equation", "substance", "given_amount", "given_measurement", "given_substance", "wanted_measurement", "wanted_substance", "significant_figures"]
+RESULT_FIELDS = PROBLEM_FIELDS + ["balanced", "answer", "work_shown", "error"]
+
+def read_problems(stream, format):
+	"""
+	Reads problems from the stream, one row at a time.
+
+	:param stream: A text stream (file or stdin).
+	:param format: The format of the rows (jsonl or csv).
+	:return: A generator of problems (dictionaries).
+	"""
+
+	if format == "csv":
+		for row in csv.DictReader(stream):
+			yield {key: value for key, value in row.items() if value not in (None, "")} # Empty cells are left out
+	else:
+		for number, line in enumerate(stream, start=1):
+			if line.strip():
+				try:
+					problem = json.loads(line)
+				except ValueError:
+					yield {"error": f"Problem Check: Line {number} isn't valid JSON."} # Reported, without stopping the run
+					continue
+				if isinstance(problem, dict):
+					yield problem
+				else:
+					yield {"error": f"Problem Check: Line {number} isn't a JSON object."}
+
+def solve_problem(problem, equations, engine="sympy", show_work=False, equation_cache=None):
+	"""
+	Balances (or parses) the problem's equation (or substance), and solves its stoichiometry
+	if it has a given amount. Errors are caught and put into the result.
+
+	:param problem: The problem (a dictionary of the fields above).
+	:param equations: A cache of balanced equations, so repeated equations are only balanced once.
+	:param engine: The balancing engine (see Equation).
+	:param show_work: Whether to include the work shown in the result.
+	:param equation_cache: An Equation_Cache, so equations balanced by earlier runs aren't balanced again.
+	:return: The result (the problem, with the balanced equation/substance, answer, and error).
+	"""
+
+	result = dict(problem)
+	if "error" in problem: # Couldn't even be read
+		return result
+
+	try:
+		if "equation" in problem:
+			entity = equations.get_or_compute(problem["equation"], lambda equation: Equation(equation, engine=engine, cache=equation_cache))
+			result["balanced"] = entity.balanced
+		elif "substance" in problem:
+			entity = Substance(problem["substance"])
+			entity.substance_scanner() # Make sure it's a real substance
+			result["balanced"] = entity.calculation_presentation()
+		else:
+			raise Exception("Problem Check: Every problem needs an 'equation' or a 'substance'.")
+
+		answer_problem(problem, entity, result, show_work)
+	except Exception as error:
+		result["error"] = str(error)
+	return result
+
+def answer_problem(problem, entity, result, show_work=False):
+	"""
+	Solves the stoichiometry of a problem whose equation is already balanced (or substance parsed),
+	if it has a given amount. Errors are raised, not caught.
+
+	:param problem: The problem (a dictionary of the fields above).
+	:param entity: The balanced Equation (or Balanced_Record), or the Substance of the problem.
+	:param result: The result to put the answer (and work shown) into.
+	:param show_work: Whether to include the work shown in the result.
+	:return: The result.
+	"""
+
+	if "given_amount" in problem:
+		missing = [field for field in ("given_measurement", "wanted_measurement") if field not in problem]
+		if missing:
+			raise Exception(f"Problem Check: The problem has a given amount, but is missing: {', '.join(missing)}.")
+		given_amount = problem["given_amount"]
+		significant_figures = int(problem.get("significant_figures") or Measured.parse(given_amount).significant_figures) # Counted from the digits as typed, as the amount is read
+		given_substance = problem.get("given_substance", problem.get("substance"))
+		wanted_substance = problem.get("wanted_substance", problem.get("substance"))
+		if given_substance not in entity.balanced_dict or wanted_substance not in entity.balanced_dict:
+			raise Exception(f"Substance Check: The given and wanted substances must be in the {'equation' if 'equation' in problem else 'substance'}.")
+
+		solved = solve(entity, given_amount, significant_figures, problem["given_measurement"], given_substance, problem["wanted_measurement"], wanted_substance, show_work) # The cached equation is only read from
+		result["answer"] = solved.answer
+		if show_work:
+			result["work_shown"] = render_unicode(solved.work_shown)
+	return result
+
+def solve_problems(problems, engine="sympy", show_work=False, cache_size=1024, equation_cache=None):
+	"""
+	:param problems: An iterable of problems.
+	:param engine: The balancing engine (see Equation).
+	:param show_work: Whether to include the work shown in the results.
+	:param cache_size: How many balanced equations are kept around.
+	:param equation_cache: An Equation_Cache, so equations balanced by earlier runs aren't balanced again.
+	:return: A generator of results, in the same order as the problems.
+	"""
+
+	equations = LRU_Cache(maxsize=cache_size)
+	for problem in problems:
+		yield solve_problem(problem, equations, engine, show_work, equation_cache)
+
+def write_results(results, stream, format):
+	"""
+	Writes the results to the stream, one row at a time.
+
+	:param results: An iterable of results.
+	:param stream: A text stream (file or stdout).
+	:param format: The format of the rows (jsonl or csv).
+	"""
+
+	if format == "csv":
+		writer = csv.DictWriter(stream, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+		writer.writeheader()
+		for result in results:
+			writer.writerow(result)
+	else:
+		for result in results:
+			stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+def main(arguments=None):
+	"""
+	Runs the command line interface.
+
+	:param arguments: The command line arguments (sys.argv if None).
+	:return: The exit code.
+	"""
+
+	parser = argparse.ArgumentParser(prog="python -m stoichify", description="Solve stoichiometry problems from a JSONL or CSV stream, without the GUI.")
+	parser.add_argument("--input", default="-", help="The problems file (- for stdin).")
+	parser.add_argument("--input-format", choices=FORMATS, help="The format of the problems (guessed from the file extension, otherwise jsonl).")
+	parser.add_argument("--output-format", choices=FORMATS, default="jsonl", help="The format of the results (written to stdout).")
+	parser.add_argument("--engine", choices=("sympy", "integer"), default="sympy", help="The balancing engine.")
+	parser.add_argument("--show-work", action="store_true", help="Include the work shown in every result.")
+	parser.add_argument("--stats", action="store_true", help="Time every stage, and write the timings to stderr (Prometheus text) at the end.")
+	parser.add_argument("--cache", help="A file to keep balanced equations in, between runs (made if it doesn't exist).")
+	arguments = parser.parse_args(arguments)
+
+	input_format = arguments.input_format or ("csv" if arguments.input.lower().endswith(".csv") else "jsonl")
+	stream = sys.stdin if arguments.input == "-" else open(arguments.input, newline="", encoding="utf-8")
+	try:
+		if arguments.stats:
+			instrumentation.enable()
+		equation_cache = Equation_Cache(arguments.cache) if arguments.cache else None
+		results = solve_problems(read_problems(stream, input_format), arguments.engine, arguments.show_work, equation_cache=equation_cache)
+		write_results(results, sys.stdout, arguments.output_format)
+	finally:
+		if stream is not sys.stdin:
+			stream.close()
+	if arguments.stats:
+		sys.stderr.write(instrumentation.REGISTRY.to_prometheus())
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
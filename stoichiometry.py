@@ -4,10 +4,185 @@
 # equations for you. Once you have created the balanced chemical equation, 
 # or have your substance, you initialize the Stoichify class with your values 
 # and get your answer. It only has one method and one purpose, to solve 
-# stoichiometry problems. 
+# stoichiometry problems. As the same question tends to come up again and again
+# with different amounts (the same equation, substances, and measurements), the
+# conversion factors are worked out once into a Conversion_Plan, which only has to
+# multiply each new amount and round it.
 #
 # Main Libraries:
-# - None
+# - numpy (Only for solving whole arrays of amounts at once)
+# - instrumentation (Stage timings, off by default)
+# - caching (The most recently used Conversion_Plans)
+
+from caching import LRU_Cache
+from instrumentation import stage, timed
+from precision import Measured, round_sig_array
+from formula import without_coefficient
+from steps import Quantity, Given_Step, Conversion_Factor, Result_Step
+
+PLANS = LRU_Cache(maxsize=4096) # Conversion_Plans, by (balanced coefficients, given substance and measurement, wanted substance and measurement)
+
+class Stoichiometry_Result:
+	"""
+	The result of one stoichiometry calculation, the answer and (optionally) its work shown.
+	A fresh one is made for every calculation, and it can still be unpacked or indexed
+	like the (answer, work_shown) tuple solve used to give back.
+	"""
+
+	__slots__ = ("answer", "work_shown", "value")
+
+	def __init__(self, answer, work_shown=None, value=None):
+		"""
+		:param answer: The amount of the wanted substance (e.g. "42.8 g H₂O").
+		:param work_shown: The steps of the calculation (None if they weren't asked for), see steps.py to render them.
+		:param value: The exact amount of the wanted substance, with its significant figures (a Measured, see precision.py),
+		for anything that needs the number itself (not the text of the answer).
+		"""
+
+		self.answer = answer
+		self.work_shown = work_shown
+		self.value = value
+
+	def __iter__(self):
+		return iter((self.answer, self.work_shown))
+
+	def __getitem__(self, index):
+		return (self.answer, self.work_shown)[index]
+
+	def __len__(self):
+		return 2
+
+	def __repr__(self):
+		return f"Stoichiometry_Result(answer={self.answer!r}, work_shown={self.work_shown!r}, value={self.value!r})"
+
+class Conversion_Plan:
+	"""
+	Every conversion of one question (e.g. grams of C3H8 to grams of H2O, in one balanced
+	equation), worked out once: the conversion factors multiplied into one exact factor, and
+	the steps to show (the Conversion_Factors between the given and result steps). Calling it
+	with an amount only multiplies and rounds, so hold on to it (or get it from plan(), which
+	keeps the most recently used ones) for questions asked over and over.
+	"""
+
+	__slots__ = ("given_measurement", "given_formula", "wanted_measurement", "wanted_formula", "wanted_presentation", "factor", "steps")
+
+	def __init__(self, balanced_dict, given_substance, given_measurement, wanted_substance, wanted_measurement):
+		"""
+		:param balanced_dict: The balanced dictionary, with the substances as keys and their coefficients as values.
+		:param given_substance: The given substance to convert to the wanted substance.
+		:param given_measurement: The measurement of the given substance (any in the unit graph, see units.py).
+		:param wanted_substance: The wanted substance to convert the given substance to.
+		:param wanted_measurement: The measurement of the wanted substance (any in the unit graph, see units.py).
+		"""
+
+		from entities import Substance # (to avoid circular imports)
+
+		given_substance = Substance(f"{balanced_dict[given_substance]}{given_substance}")
+		wanted_substance = Substance(f"{balanced_dict[wanted_substance]}{wanted_substance}")
+
+		# Convert to moles (however many conversions that takes, see units.py)
+		given_path = given_substance.conversion_path(given_measurement, "mol")
+		steps = list(given_path.steps)
+		factor = given_path.factor
+
+		# Molar Bridge
+		wanted_coefficient = wanted_substance.substance_coefficient()
+		given_coefficient = given_substance.substance_coefficient()
+		if wanted_coefficient + given_coefficient != 2: # Exclude fractions of 1/1
+			steps.append(Conversion_Factor(Quantity(wanted_coefficient, "mol", without_coefficient(wanted_substance.substance)), Quantity(given_coefficient, "mol", without_coefficient(given_substance.substance))))
+			factor = factor * wanted_coefficient / given_coefficient
+
+		# Then from moles to the wanted measurement
+		wanted_path = wanted_substance.conversion_path("mol", wanted_measurement)
+		steps.extend(wanted_path.steps)
+		factor = factor * wanted_path.factor
+
+		self.given_measurement = given_measurement
+		self.given_formula = without_coefficient(given_substance.substance)
+		self.wanted_measurement = wanted_measurement
+		self.wanted_formula = without_coefficient(wanted_substance.substance)
+		self.wanted_presentation = wanted_substance.calculation_presentation()
+		self.factor = factor # Exact (a Fraction), so an amount times it is exactly what the conversions one by one would give
+		self.steps = tuple(steps)
+
+	def __call__(self, given_amount, given_significant_figures, work_shown=None):
+		"""
+		:param given_amount: The amount of the given substance (see Stoichify.solve).
+		:param given_significant_figures: The significant figures of the given amount.
+		:param work_shown: The list of steps to add this calculation's steps to (None to not record any).
+		:return: A Stoichiometry_Result of the amount of the wanted substance, and the work shown (the same list).
+		"""
+
+		# Read the given amount exactly (keeping its significant figures)
+		with stage("stoichify.parse"):
+			given = Measured.parse(given_amount, given_significant_figures)
+
+		with stage("stoichify.conversions"):
+			value = given * self.factor
+
+		# Round the answer to the given significant figures, exactly (chemists usually round up, so it's half up)
+		with stage("stoichify.rounding"):
+			value = value.rounded()
+
+		# Only now is it turned into text, once
+		with stage("stoichify.presentation"):
+			if work_shown is not None:
+				work_shown.append(Given_Step(Quantity(given, self.given_measurement, self.given_formula))) # As typed, trailing zeros included (e.g. 35.00 g)
+				work_shown.extend(self.steps)
+				work_shown.append(Result_Step(Quantity(value, self.wanted_measurement, self.wanted_formula)))
+			return Stoichiometry_Result(f"{value} {self.wanted_measurement} {self.wanted_presentation}", work_shown, value)
+
+	def solve_array(self, amounts, given_significant_figures):
+		"""
+		:param amounts: The amounts of the given substance (anything NumPy can turn into an array of floats).
+		:param given_significant_figures: The significant figures of the given amounts (one for all of them, or an array with one per amount).
+		:return: A float64 array of the wanted amounts (see Stoichify.solve_array).
+		"""
+
+		import numpy
+
+		amounts = numpy.asarray(amounts, dtype=numpy.float64)
+		return round_sig_array(amounts * float(self.factor), given_significant_figures) # Half up, just like solve
+
+@timed("stoichify.plan")
+def plan(balanced, given_substance, given_measurement, wanted_substance, wanted_measurement):
+	"""
+	Gets the Conversion_Plan of a question, from the most recently used ones (or works it out).
+	Like solve, the balanced equation (or substance) is only ever read from.
+
+	:param balanced: The balanced equation or substance (an Equation, Substance, Balanced_Record, or
+	any mapping of substances to their coefficients).
+	:param given_substance: The given substance to convert to the wanted substance.
+	:param given_measurement: The measurement of the given substance (L, r.p., g, mol).
+	:param wanted_substance: The wanted substance to convert the given substance to.
+	:param wanted_measurement: The measurement of the wanted substance (L, r.p., g, mol).
+	:return: The Conversion_Plan (shared, call it with each amount).
+	"""
+
+	balanced_dict = getattr(balanced, "balanced_dict", balanced)
+	key = (tuple(balanced_dict.items()), given_substance, given_measurement, wanted_substance, wanted_measurement)
+	return PLANS.get_or_compute(key, lambda key: Conversion_Plan(balanced_dict, given_substance, given_measurement, wanted_substance, wanted_measurement))
+
+def solve(balanced, given_amount, given_significant_figures, given_measurement, given_substance, wanted_measurement, wanted_substance, show_work=True):
+	"""
+	Performs a stoichiometry calculation WITHOUT touching the balanced equation (or substance)
+	it's given, so one balanced equation can be shared by as many threads as you'd like.
+	Each call works on its own Stoichify, and hands back its own result.
+
+	:param balanced: The balanced equation or substance (an Equation, Substance, Balanced_Record, or
+	any mapping of substances to their coefficients). It's only ever read from.
+	:param given_amount: The amount of the given substance (see Stoichify.solve).
+	:param given_significant_figures: The significant figures of the given amount.
+	:param given_measurement: The measurement of the given substance (L, r.p., g, mol).
+	:param given_substance: The given substance to convert to the wanted substance.
+	:param wanted_measurement: The measurement of the wanted substance (L, r.p., g, mol).
+	:param wanted_substance: The wanted substance to convert the given substance to.
+	:param show_work: Whether to record the steps taken (skipped entirely if not).
+	:return: A fresh Stoichiometry_Result, with the answer and steps taken (see steps.py).
+	"""
+
+	balanced_dict = getattr(balanced, "balanced_dict", balanced)
+	return Stoichify(balanced_dict, [] if show_work else None).solve(given_amount, given_significant_figures, given_measurement, given_substance, wanted_measurement, wanted_substance)
 
 class Stoichify:
 	"""
@@ -18,16 +193,17 @@ class Stoichify:
 	throughout the calculations, to ensure the provided maximum precision and accuracy.
 	"""
 
-	def __init__(self, balanced_dict, work_shown: list):
+	def __init__(self, balanced_dict, work_shown=None):
 		"""
 		Initializes the Stoichify object, with the balanced_dict and work_shown list.
 
 		:param balanced_dict: The balanced dictionary, with the substances as keys and their coefficients as values.
-		:param work_shown: The list of work shown, to keep track of the calculations and steps taken.
+		:param work_shown: The list of steps already taken, to keep track of the calculations (None to not record any steps).
 		"""
 		self.balanced_dict = balanced_dict
-		self.work_shown = list(work_shown)
+		self.work_shown = list(work_shown) if work_shown is not None else None
 
+	@timed("stoichify.solve")
 	def solve(self, given_amount, given_significant_figures, given_measurement, given_substance, wanted_measurement, wanted_substance):
 		"""
 		Performs the stoichiometry calculations, with all given and wanted parameters, 
@@ -42,52 +218,37 @@ class Stoichify:
 		:param given_substance: The given substance to convert to the wanted substance.
 		:param wanted_measurement: The measurement of the wanted substance (L, r.p., g).
 		:param wanted_substance: The wanted substance to convert the given substance to.
-		:return: The amount of the wanted substance, with the amount (in the correct significant figures) and the measurement with substance (e.g. 42.8 g H2O).
+		:return: A Stoichiometry_Result of the amount of the wanted substance, with the amount (in the correct significant figures) and the measurement with substance (e.g. 42.8 g H2O), and the steps taken (see steps.py, None if not recorded).
 		"""
   
-		# Import Logistical Modules (to avoid circular imports)
-		from entities import Substance, Significant_Figures
-		from precision import Scientific_Handler
-  
-		# Convert any potential scientific numbers to floats
-		given_amount = Scientific_Handler(given_amount).to_float()
-  
-		answer = 0
-
-		# Convert the given and wanted substances to Substance objects
-		given_substance = Substance(f"{self.balanced_dict[given_substance]}{given_substance}")
-		wanted_substance = Substance(f"{self.balanced_dict[wanted_substance]}{wanted_substance}")
-		if given_measurement == "g":
-			self.work_shown.append((f"{Scientific_Handler(given_amount).to_scientific()}{given_measurement} {given_substance.calculation_presentation()} ×"))
-		else:
-			self.work_shown.append(f"{Scientific_Handler(given_amount).to_scientific()} {given_measurement} {given_substance.calculation_presentation()} ×")
-  
-		current_measurement = given_measurement # Make a standard variable for the current measurement.
-     
-		if current_measurement != "mol": # If not in moles, convert to moles.
-			given_amount = given_substance.measurement_converter(given_amount, given_measurement, "/", self.work_shown)
-			current_measurement = "mol"
-	
-		# Molar Bridge
-		wanted_coefficient = wanted_substance.substance_coefficient()
-		given_coefficient = given_substance.substance_coefficient()
-		if wanted_coefficient + given_coefficient != 2: # Exclude fractions of 1/1
-			self.work_shown.append((f"{wanted_coefficient} {current_measurement} {wanted_substance.calculation_presentation()}", f"{given_coefficient} {current_measurement} {given_substance.calculation_presentation()}"))
-			answer = given_amount * (wanted_coefficient / given_coefficient)
-		else:
-			answer = given_amount
-
-		if wanted_measurement != "mol": # If we're not in moles, convert to the wanted measurement.
-			answer = wanted_substance.measurement_converter(answer, wanted_measurement, "*", self.work_shown)
-	
-		# Round the answer to the given signific3 ant figures
-		answer = round(answer, given_significant_figures) # Chemists usually round up, so it's rounded up to the significant figures.
-		answer = Significant_Figures().round(answer, given_significant_figures) # Then cut off to the significant figures.
-
-		answer = Scientific_Handler(answer).to_float() # Convert to scientific notation if needed.
-
-		if wanted_measurement == "g":
-			self.work_shown.append((f"= {Scientific_Handler(answer).to_scientific()}{wanted_measurement} {wanted_substance.calculation_presentation()}"))
-		else:
-			self.work_shown.append((f"= {Scientific_Handler(answer).to_scientific()} {wanted_measurement} {wanted_substance.calculation_presentation()}"))
-		return f"{Scientific_Handler(answer).to_scientific()} {wanted_measurement} {wanted_substance.calculation_presentation()}", self.work_shown
\ No newline at end of file
+		return plan(self.balanced_dict, given_substance, given_measurement, wanted_substance, wanted_measurement)(given_amount, given_significant_figures, self.work_shown)
+
+	def solve_array(self, amounts, given_significant_figures, given_measurement, given_substance, wanted_measurement, wanted_substance, show_work=False):
+		"""
+		Performs the same stoichiometry calculation as solve, but over a whole array of
+		given amounts at once. As the equation, substances, and measurements stay the same,
+		the conversion factor is only worked out once (it's the question's Conversion_Plan),
+		and applied to every amount with NumPy.
+		The answers are then rounded (half up, like solve) to the significant figures together, too.
+		(As they're floats, not exact like solve's, an answer within a few float steps of a rounding
+		boundary can still land on the other side of it.)
+
+		:param amounts: The amounts of the given substance (anything NumPy can turn into an array of floats).
+		:param given_significant_figures: The significant figures of the given amounts (one for all of them, or an array with one per amount, e.g. from parse_amounts).
+		:param given_measurement: The measurement of the given substance (L, r.p., g, mol).
+		:param given_substance: The given substance to convert to the wanted substance.
+		:param wanted_measurement: The measurement of the wanted substance (L, r.p., g, mol).
+		:param wanted_substance: The wanted substance to convert the given substance to.
+		:param show_work: Whether to also give back the steps taken (done for the first amount only).
+		:return: A float64 array of the wanted amounts, or (array, steps) if show_work is True.
+		"""
+
+		import numpy
+
+		conversion_plan = plan(self.balanced_dict, given_substance, given_measurement, wanted_substance, wanted_measurement)
+		answers = conversion_plan.solve_array(amounts, given_significant_figures)
+
+		if show_work:
+			work_shown = conversion_plan(float(numpy.asarray(amounts, dtype=numpy.float64).flat[0]), int(numpy.asarray(given_significant_figures).flat[0]), [])[1]
+			return answers, work_shown
+		return answers
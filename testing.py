@@ -14,10 +14,28 @@
 
 # Testing Library
 import unittest
+from fractions import Fraction
 
 # Logical Libraries
 from entities import Substance, Equation
 from precision import Scientific_Handler, Significant_Figures
+from periodic_table import periodic_table, is_element, atomic_mass, atomic_number, atomic_mass_vector
+from caching import LRU_Cache
+from balancing import integer_balance
+from batch import balance_many
+from stoichiometry import Stoichify, solve
+from precision import round_sig_array, parse_amounts, Measured
+from stoichify import read_problems, solve_problems, write_results
+from formula import COMPOSITION_CACHE, composition
+from equation_cache import Equation_Cache, canonical_equation
+import instrumentation
+from instrumentation import Stage_Registry
+from limiting import Yield_Calculator, limiting_reactant
+from service import Stoichify_Service
+from worker import Background_Worker
+from live import Live_Balancer
+from units import UNITS, Unit_Graph, gas_volume, molarity
+from steps import Quantity, Given_Step, Conversion_Factor, Result_Step, render_plain, render_unicode, render_latex
 
 class Test_Substances(unittest.TestCase):
 	def __init__(self, *args, **kwargs):
@@ -55,6 +73,37 @@ class Test_Substances(unittest.TestCase):
 	def test_remove_coefficients(self):
 		self.assertEqual(self.many_waters.remove_coefficients(), "H2O")
 
+	def test_remove_coefficients_leaves_substance(self):
+		self.assertIs(self.two_waters.remove_coefficients(), self.water)
+		self.assertEqual(self.two_waters.substance, "2H2O")
+
+	#
+	# Testing Interned, Immutable Substances
+	#   One Substance per formula text, that can't be changed, and equals its text.
+	#
+
+	def test_substance_interned(self):
+		self.assertIs(Substance("H2O"), self.water)
+		self.assertIsNot(Substance("H₂O"), self.water)
+
+	# Different texts of a formula are their own substances, but share their composition
+	def test_substance_shares_composition(self):
+		self.assertIs(composition(Substance("H₂O").substance), composition(self.water.substance))
+		self.assertEqual(Substance("H₂O").molar_mass(), self.water.molar_mass())
+
+	def test_substance_immutable(self):
+		with self.assertRaises(AttributeError):
+			self.water.substance = "CO2"
+
+	def test_substance_equals_text(self):
+		self.assertEqual(self.water, "H2O")
+		self.assertEqual({self.water: 18}["H2O"], 18)
+		self.assertNotEqual(self.water, self.two_waters)
+
+	def test_substance_pickled_interned(self):
+		import pickle
+		self.assertIs(pickle.loads(pickle.dumps(self.complex)), self.complex)
+
 	#
 	# Testing Substance Subscripts Handling
 	#
@@ -80,6 +129,15 @@ class Test_Substances(unittest.TestCase):
 	def test_calculation_presentation_with_coefficient(self):
 		self.assertEqual(self.two_waters.calculation_presentation(), "H₂O")
 
+	def test_calculation_presentation_group_coefficient(self):
+		substance = Substance("2(NH4)2SO4")
+		self.assertEqual(substance.substance_coefficient(), 2)
+		self.assertEqual(substance.calculation_presentation(), "(NH₄)₂SO₄")
+
+	def test_calculation_presentation_hydrate(self):
+		substance = Substance("CuSO4·5H2O")
+		self.assertEqual(substance.calculation_presentation(), "CuSO₄·5H₂O")
+
 	#
 	# Testing Substance Element Scanning
 	#
@@ -114,6 +172,32 @@ class Test_Substances(unittest.TestCase):
 	def test_substance_scanner_complex(self):
 		self.assertEqual(self.complex.substance_scanner(), [('K', (1, 4, 1)), ('Fe', (1, 1, 1)), ('S', (1, 1, 6)), ('C', (1, 1, 6)), ('N', (1, 1, 6))])
 
+	def test_substance_scanner_nested_groups(self):
+		substance = Substance("[Co(NH3)6]2(SO4)3")
+		self.assertEqual(substance.substance_scanner(), [('Co', (1, 1, 2)), ('N', (1, 1, 12)), ('H', (1, 3, 12)), ('S', (1, 1, 3)), ('O', (1, 4, 3))])
+
+	def test_substance_scanner_hydrate(self):
+		substance = Substance("CuSO4·5H2O")
+		self.assertEqual(substance.substance_scanner(), [('Cu', (1, 1, 1)), ('S', (1, 1, 1)), ('O', (1, 4, 1)), ('H', (1, 2, 5)), ('O', (1, 1, 5))])
+
+	def test_substance_scanner_multiple_digit_multiplier(self):
+		substance = Substance("(CH2)12")
+		self.assertEqual(substance.substance_scanner(), [('C', (1, 1, 12)), ('H', (1, 2, 12))])
+
+	def test_substance_scanner_unclosed_parenthesis(self):
+		with self.assertRaises(Exception):
+			Substance("Fe2(SO4").substance_scanner()
+
+	def test_substance_scanner_unmatched_bracket(self):
+		with self.assertRaises(Exception):
+			Substance("K4[Fe(SCN)6)").substance_scanner()
+
+	# Charges aren't dropped (Na+ isn't Na)
+	def test_substance_scanner_charge(self):
+		for substance in ["Na+", "SO4-2", "Cl−"]:
+			with self.assertRaisesRegex(Exception, "Charges Check"):
+				Substance(substance).molar_mass()
+
 	#
 	# Testing Substance Measurement Conversions
 	#
@@ -136,6 +220,13 @@ class Test_Substances(unittest.TestCase):
 	def test_measurement_converter_representative_particles_division(self):
 		self.assertEqual(self.water.measurement_converter(1, "r.p.", "/", []), 1.6611295681063124e-24)
 
+	# The factor alone, exact, with its step recorded the right way up
+	def test_conversion_factor(self):
+		work_shown = []
+		self.assertEqual(self.water.conversion_factor("L", "/", work_shown), Fraction(224, 10))
+		self.assertEqual(len(work_shown), 1)
+		self.assertIsNone(self.water.conversion_factor("mol", "*"))
+
 	#
 	# Testing Substance Calculations
 	#
@@ -176,9 +267,8 @@ class Test_Equations(unittest.TestCase):
 			equation = Equation("SO2(g) + -> SO3(g)").type_checker()
 
 	def test_equation_type_checker_oxidation_reduction(self):
-		equation = Equation("SO2(g) + O2-(g) -> SO3(g)")
-		with self.assertRaises(Exception): # Includes a charge
-			equation.type_checker()		
+		with self.assertRaises(Exception): # Includes a charge (now caught while balancing, as the formula can't be read)
+			Equation("SO2(g) + O2-(g) -> SO3(g)").type_checker()
 
 	#
 	# Testing Equation Balancing
@@ -202,6 +292,28 @@ class Test_Equations(unittest.TestCase):
 		with self.assertRaises(Exception): # Element(s) not found
 			equation = Equation("H2O + 2 -> H2O")
 
+	#
+	# Testing the Integer Balancing Engine
+	#   Has to give the exact same coefficients as sympy's nullspace.
+	#
+
+	def test_integer_engine_matches_sympy(self):
+		for equation in [self.first, self.second, self.third, self.insane]:
+			integer_equation = Equation(equation.original, engine="integer")
+			self.assertEqual(integer_equation.balanced, equation.balanced)
+			self.assertEqual(integer_equation.balanced_coefficients, [int(coefficient) for coefficient in equation.balanced_coefficients])
+
+	def test_integer_engine_hydrate(self):
+		self.assertEqual(Equation("CuSO4·5H2O -> CuSO4 + H2O", engine="integer").balanced, "1CuSO₄·5H₂O → 1CuSO₄ + 5H₂O")
+
+	def test_integer_engine_singular(self):
+		with self.assertRaises(Exception): # Nothing but the zero solution
+			integer_balance([[1, 0], [0, 1]])
+
+	def test_unknown_engine(self):
+		with self.assertRaises(Exception):
+			Equation("SO2 + O2 -> SO3", engine="abacus")
+
 	#
 	# Testing Equation Stoichification ( :D )
 	# 	Includes the whole stoichiometry.py class of Stoichify, in which
@@ -238,6 +350,555 @@ class Test_Equations(unittest.TestCase):
 	def test_equation_stoichify_third_another_one(self):
 		self.assertEqual(self.third.stoichify(42.8, 2, "g", "Al", "g", "Cl2")[0], "170 g Cl₂")
 
+	#
+	# Testing Stateless Stoichification
+	#   The balanced equation is only read from, so results never build up
+	#   and one equation can be shared between threads.
+	#
+
+	def test_equation_stoichify_doesnt_accumulate(self):
+		first = self.third.stoichify(35, 2, "g", "Al", "g", "AlCl3")
+		second = self.third.stoichify(35, 2, "g", "Al", "g", "AlCl3")
+		self.assertEqual(first.work_shown, second.work_shown)
+		self.assertIsNot(first.work_shown, second.work_shown)
+
+	def test_solve_balanced_dict_read_only(self):
+		with self.assertRaises(TypeError):
+			self.first.balanced_dict["SO2"] = 3
+
+	def test_solve_without_work(self):
+		self.assertIsNone(solve(self.second, 2.8, 2, "mol", "C3H8", "g", "CO2", show_work=False).work_shown)
+
+	def test_solve_balanced_record(self):
+		record = balance_many(["Al + Cl2 -> AlCl3"], workers=1)[0]
+		self.assertEqual(solve(record, 42.8, 2, "g", "Al", "g", "Cl2").answer, "170 g Cl₂")
+
+	def test_solve_shared_between_threads(self):
+		from concurrent.futures import ThreadPoolExecutor
+		problems = [(35, "AlCl3", "170 g AlCl₃"), (42.8, "Cl2", "170 g Cl₂")] * 50
+		with ThreadPoolExecutor(max_workers=8) as executor:
+			answers = list(executor.map(lambda problem: solve(self.third, problem[0], 2, "g", "Al", "g", problem[1]).answer, problems))
+		self.assertEqual(answers, [problem[2] for problem in problems])
+
+	#
+	# Testing Conversion Plans
+	#   The same question, worked out once and asked with many amounts.
+	#
+
+	def test_plan_matches_stoichify(self):
+		plan = self.third.plan("Al", "g", "AlCl3", "g")
+		for amount in [35, 42.8, "4.2 x 10^2"]:
+			self.assertEqual(list(plan(amount, 2, [])), list(self.third.stoichify(amount, 2, "g", "Al", "g", "AlCl3")))
+
+	def test_plan_reused(self):
+		self.assertIs(self.second.plan("C3H8", "L", "H2O", "r.p."), self.second.plan("C3H8", "L", "H2O", "r.p."))
+		self.assertIsNot(self.second.plan("C3H8", "L", "H2O", "r.p."), self.second.plan("C3H8", "L", "H2O", "g"))
+
+	def test_plan_without_work(self):
+		result = self.first.plan("SO2", "mol", "O2", "mol")(3.4, 2)
+		self.assertEqual(result.answer, "1.7 mol O₂")
+		self.assertIsNone(result.work_shown)
+
+	#
+	# Testing Array Stoichification
+	#   The same calculations as above, but many given amounts at once.
+	#
+
+	def test_equation_solve_array(self):
+		answers = Stoichify(self.third.balanced_dict, []).solve_array([35, 42.8], 2, "g", "Al", "g", "AlCl3")
+		self.assertEqual(answers.tolist(), [170.0, 210.0])
+
+	def test_equation_solve_array_moles(self):
+		answers = Stoichify(self.first.balanced_dict, []).solve_array([3.4, 4.7], 2, "mol", "SO2", "mol", "O2")
+		self.assertEqual(answers.tolist(), [1.7, 2.4])
+
+	def test_equation_solve_array_per_amount(self):
+		answers = Stoichify(self.third.balanced_dict, []).solve_array([35, 42.8], [2, 3], "g", "Al", "g", "AlCl3")
+		self.assertEqual(answers.tolist(), [170.0, 212.0])
+
+	def test_equation_solve_array_show_work(self):
+		answers, work_shown = Stoichify(self.second.balanced_dict, []).solve_array([25], 2, "g", "C3H8", "mol", "H2O", show_work=True)
+		self.assertEqual(answers.tolist(), [2.3])
+		self.assertEqual(len(work_shown), 4)
+
+	#
+	# Testing Recorded Steps
+	#   The work shown is recorded as steps, and only turned into text by a renderer.
+	#
+
+	def test_stoichify_steps_recorded(self):
+		steps = self.second.stoichify(25, 2, "L", "C3H8", "r.p.", "H2O").work_shown
+		self.assertEqual([type(step) for step in steps], [Given_Step, Conversion_Factor, Conversion_Factor, Conversion_Factor, Result_Step])
+		self.assertEqual(steps[1], Conversion_Factor(Quantity(1, "mol", "C3H8"), Quantity(22.4, "L", "C3H8"))) # Liters used to go missing
+
+	def test_stoichify_steps_render_plain(self):
+		steps = self.third.stoichify(35, 2, "g", "Al", "mol", "AlCl3").work_shown
+		self.assertEqual(render_plain(steps), "35 g Al x (1 mol Al / 26.982 g Al) x (2 mol AlCl3 / 2 mol Al) = 1.3 mol AlCl3")
+
+	# The given amount is shown as typed, trailing zeros included
+	def test_stoichify_steps_given_trailing_zeros(self):
+		steps = self.third.stoichify("35.00", 4, "g", "Al", "mol", "AlCl3").work_shown
+		self.assertEqual(render_plain(steps), "35.00 g Al x (1 mol Al / 26.982 g Al) x (2 mol AlCl3 / 2 mol Al) = 1.297 mol AlCl3")
+
+	def test_stoichify_steps_render_unicode(self):
+		steps = self.second.stoichify(2.8, 2, "mol", "C3H8", "r.p.", "CO2").work_shown
+		self.assertEqual(render_unicode(steps), "2.8 mol C₃H₈ × (3 mol CO₂ / 1 mol C₃H₈) × (6.02 × 10²³ r.p. CO₂ / 1 mol CO₂) = 5.1 × 10²⁴ r.p. CO₂")
+
+	def test_stoichify_steps_render_latex(self):
+		steps = self.second.stoichify(2.8, 2, "mol", "C3H8", "mol", "H2O").work_shown
+		self.assertEqual(render_latex(steps), "2.8\\ \\mathrm{mol}\\ \\mathrm{C_{3}H_{8}} \\times \\frac{4\\ \\mathrm{mol}\\ \\mathrm{H_{2}O}}{1\\ \\mathrm{mol}\\ \\mathrm{C_{3}H_{8}}} = 11\\ \\mathrm{mol}\\ \\mathrm{H_{2}O}")
+
+class Test_Units(unittest.TestCase):
+	def test_metric_prefixes(self):
+		self.assertEqual(Substance("H2O").stoichify(18015, 5, "mg", "H2O", "mmol", "H2O").answer, "1000.0 mmol H₂O")
+		self.assertEqual(Equation("C3H8 + O2 -> CO2 + H2O").stoichify("1.00", 3, "kg", "C3H8", "kmol", "CO2").answer, "0.0680 kmol CO₂")
+
+	def test_atoms(self):
+		self.assertEqual(Substance("H2O").stoichify("6.02e23", 3, "atoms", "H2O", "mol", "H2O").answer, "0.333 mol H₂O")
+
+	def test_gas_volume(self):
+		self.assertEqual(Substance("O2").stoichify("1.00", 3, "mol", "O2", gas_volume(298.15, 1), "O2").answer, "24.5 L (298.15 K, 1 atm) O₂")
+
+	def test_molarity(self):
+		self.assertEqual(Substance("NaCl").stoichify("0.500", 3, molarity(0.25), "NaCl", "g", "NaCl").answer, "7.31 g NaCl")
+
+	def test_steps_through_every_conversion(self):
+		steps = Substance("H2O").stoichify(18015, 5, "mg", "H2O", "mol", "H2O").work_shown
+		self.assertEqual(render_unicode(steps), "18,015 mg H₂O × (1 g H₂O / 1,000 mg H₂O) × (1 mol H₂O / 18.015 g H₂O) = 1.0000 mol H₂O")
+
+	def test_paths_kept(self):
+		self.assertIs(UNITS.path("mg", "kmol", "H2O"), UNITS.path("mg", "kmol", "H2O"))
+
+	def test_new_unit(self):
+		graph = Unit_Graph()
+		graph.add_conversion("mol", "g", 2)
+		graph.add_conversion("lb", "g", 453.59237)
+		self.assertEqual(float(graph.path("lb", "mol", "H2").factor), 453.59237 / 2)
+		self.assertEqual(graph.names(), ["mol", "g", "lb"])
+
+	def test_unknown_unit(self):
+		with self.assertRaises(Exception):
+			Substance("H2O").stoichify(1, 1, "furlongs", "H2O", "g", "H2O")
+
+	# Units from a family are read from their names, never added to the graph
+	def test_family_lookups_leave_graph(self):
+		units = UNITS.names()
+		self.assertTrue(all(f"L ({temperature} K, 1 atm)" in UNITS for temperature in range(1, 100)))
+		self.assertEqual(UNITS.names(), units)
+		self.assertNotIn("L (0 K, 1 atm)", UNITS)
+		self.assertNotIn("L (1.2.3 K, 1 atm)", UNITS)
+		self.assertNotIn("M (. L)", UNITS)
+
+	def test_family_names_written_out(self):
+		self.assertEqual(gas_volume(298.1523, 1), "L (298.1523 K, 1 atm)")
+		self.assertEqual(molarity(1e-5), "M (0.00001 L)")
+		self.assertIn(molarity(1e-5), UNITS)
+
+class Test_Limiting_Reactant(unittest.TestCase):
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.equation = Equation("Al + Cl2 -> AlCl3")
+
+	def test_limiting_reactant_mixed_measurements(self):
+		result = limiting_reactant(Equation("C3H8 + O2 -> CO2 + H2O"), {"C3H8": (2, "mol"), "O2": ("6.02 x 10^23", "r.p.")}, yield_measurement="mol", significant_figures=2)
+		self.assertEqual(result.limiting_reactant, "O2")
+		self.assertEqual(result.theoretical_yields, {"CO2": 0.6, "H2O": 0.8})
+		self.assertEqual(result.excess, {"C3H8": 1.8, "O2": 0.0})
+
+	def test_limiting_reactant_matches_solve(self):
+		result = limiting_reactant(self.equation, {"Al": (35, "g"), "Cl2": (100, "g")}, significant_figures=3)
+		self.assertEqual(result.limiting_reactant, "Cl2")
+		self.assertEqual(f"{result.theoretical_yields['AlCl3']:g} g AlCl₃", self.equation.stoichify(100, 3, "g", "Cl2", "g", "AlCl3").answer)
+
+	# Small yields and excesses keep their significant figures (not rounded to 3 decimal places first)
+	def test_limiting_reactant_small_amounts(self):
+		result = limiting_reactant(self.equation, {"Al": ("0.0100", "g"), "Cl2": ("0.0400", "g")}, yield_measurement="mol", significant_figures=3)
+		self.assertEqual(result.theoretical_yields, {"AlCl3": 0.000371})
+		self.assertEqual(result.excess, {"Al": 0.0, "Cl2": 0.000581})
+		self.assertEqual(f"{result.theoretical_yields['AlCl3']} mol AlCl₃", self.equation.stoichify("0.0100", 3, "g", "Al", "mol", "AlCl3").answer)
+
+	def test_limiting_reactant_percent_yield(self):
+		result = limiting_reactant(self.equation, {"Al": (35, "g"), "Cl2": (100, "g")}, actual_yield=("AlCl3", 100, "g"), significant_figures=3)
+		self.assertEqual(result.percent_yield, 79.8)
+
+	def test_limiting_reactant_scenarios(self):
+		import numpy
+		result = Yield_Calculator(self.equation).solve({"Al": (numpy.array([35, 10, 1]), "g"), "Cl2": (numpy.array([100, 100, 1]), "g")}, significant_figures=3)
+		self.assertEqual(result.limiting_reactant.tolist(), ["Cl2", "Al", "Cl2"])
+		self.assertEqual(result.theoretical_yields["AlCl3"].tolist(), [125.0, 49.4, 1.25])
+		self.assertEqual(result.excess["Cl2"].tolist(), [0.0, 60.6, 0.0])
+
+	def test_limiting_reactant_not_a_reactant(self):
+		with self.assertRaises(Exception):
+			limiting_reactant(self.equation, {"AlCl3": (35, "g")})
+
+class Test_Batch(unittest.TestCase):
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.equations = ["SO2 + O2 -> SO3", "H2O + 2 -> H2O", "Al(s) + Cl2(g) -> AlCl3(s)", "C3H8 + O2 -> CO2 + H2O"]
+
+	def test_balance_many_in_order(self):
+		records = balance_many(self.equations, workers=2, chunksize=1)
+		self.assertEqual([record.equation for record in records], self.equations)
+		self.assertEqual(records[0].balanced, "2SO₂ + 1O₂ → 2SO₃")
+		self.assertEqual(records[3].coefficients, (1, 5, 3, 4))
+
+	def test_balance_many_reports_failures(self):
+		records = balance_many(self.equations, workers=1)
+		self.assertIsNone(records[0].error)
+		self.assertIsNotNone(records[1].error)
+		self.assertEqual(records[2].balanced, "2Al(s) + 3Cl₂(g) → 2AlCl₃(s)")
+
+	def test_balance_many_records_picklable(self):
+		import pickle
+		record = balance_many(self.equations[2:3], workers=1, engine="integer")[0]
+		self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+		self.assertEqual(record.states, {"Al": "(s)", "Cl2": "(g)", "AlCl3": "(s)"})
+
+class Test_Equation_Cache(unittest.TestCase):
+	def setUp(self):
+		import tempfile, os
+		self.directory = tempfile.TemporaryDirectory()
+		self.cache = Equation_Cache(os.path.join(self.directory.name, "balanced.db"), maxsize=3)
+
+	def tearDown(self):
+		self.cache.close()
+		self.directory.cleanup()
+
+	def test_canonical_equation(self):
+		self.assertEqual(canonical_equation("O₂ + 2H₂ ⟶ 2H₂O(l)"), canonical_equation("H2 + O2 -> H2O"))
+		self.assertIsNone(canonical_equation("H2 + O2 = H2O"))
+
+	def test_equation_cache_hit(self):
+		Equation("C3H8 + O2 -> CO2 + H2O", cache=self.cache)
+		cached = Equation("O₂(g) + C₃H₈(g) ⟶ H₂O(l) + CO₂(g)", cache=self.cache)
+		self.assertEqual(cached.balanced, "5O₂(g) + 1C₃H₈(g) → 4H₂O(l) + 3CO₂(g)")
+		self.assertEqual(self.cache.info().hits, 1)
+
+	# A cached equation is just like one balanced fresh (rebuilt from the record, in its own order)
+	def test_equation_cache_hit_full_state(self):
+		Equation("C3H8 + O2 -> CO2 + H2O + (NH4)2SO4", cache=self.cache)
+		cached = Equation("O2(g) + 2C3H8 -> (NH4)2SO4 + H2O(l) + CO2", cache=self.cache)
+		fresh = Equation("O2(g) + 2C3H8 -> (NH4)2SO4 + H2O(l) + CO2")
+		for attribute in ("unbalanced", "elements", "reactants", "products", "makeups", "substances", "substance_states", "substances_arrowed", "element_matrix", "balanced", "balanced_dict"):
+			self.assertEqual(getattr(cached, attribute), getattr(fresh, attribute))
+		self.assertEqual(self.cache.info().hits, 1)
+
+	# Upon a hit, nothing is parsed, and the element matrix isn't built or solved
+	def test_equation_cache_hit_skips_parsing(self):
+		Equation("C3H8 + O2 -> CO2 + H2O", cache=self.cache)
+		def fail(*args):
+			raise AssertionError("Parsed upon a cache hit")
+		class Cached_Equation(Equation):
+			type_checker = substance_element_makeups = matrix_builder = matrix_solver = fail
+		self.assertEqual(Cached_Equation("O2 + C3H8 -> H2O + CO2", cache=self.cache).balanced, "5O₂ + 1C₃H₈ → 4H₂O + 3CO₂")
+
+	# A record that doesn't balance the equation is balanced again
+	def test_equation_cache_bad_record(self):
+		self.cache.put(canonical_equation("H2 + O2 -> H2O"), {"reactants": {"H2": 1, "O2": 1}, "products": {"H2O": 1}})
+		self.assertEqual(Equation("H2 + O2 -> H2O", cache=self.cache).balanced, "2H₂ + 1O₂ → 2H₂O")
+
+	# Only spaces are ignored by the key, just like Equation
+	def test_equation_cache_whitespace(self):
+		self.assertNotEqual(canonical_equation("H2 +\tO2 -> H2O"), canonical_equation("H2 + O2 -> H2O"))
+
+	def test_equation_cache_eviction(self):
+		for equation in ["SO2 + O2 -> SO3", "Al + Cl2 -> AlCl3", "H2 + O2 -> H2O", "C3H8 + O2 -> CO2 + H2O"]:
+			Equation(equation, cache=self.cache)
+		self.assertEqual(len(self.cache), 3)
+		self.assertIsNone(self.cache.get(canonical_equation("SO2 + O2 -> SO3"))) # The oldest is forgotten first
+
+	def test_equation_cache_between_processes(self):
+		records = balance_many(["Al + Cl2 -> AlCl3", "SO2 + O2 -> SO3"], workers=2, chunksize=1, cache=self.cache)
+		self.assertEqual(len(self.cache), 2)
+		self.assertEqual(Equation("Cl2 + Al -> AlCl3", cache=self.cache).balanced_dict, {"Cl2": 3, "Al": 2, "AlCl3": 2})
+		self.assertEqual(records[0].balanced, "2Al + 3Cl₂ → 2AlCl₃")
+
+class Test_Instrumentation(unittest.TestCase):
+	def tearDown(self):
+		instrumentation.disable()
+		instrumentation.REGISTRY.reset()
+
+	def test_stages_off_by_default(self):
+		registry = Stage_Registry()
+		with registry.stage("balance"):
+			pass
+		self.assertEqual(registry.stats(), {})
+
+	def test_equation_and_solve_stages(self):
+		instrumentation.enable()
+		Equation("C3H8 + O2 -> CO2 + H2O", engine="integer").stoichify(25, 2, "g", "C3H8", "g", "CO2")
+		stats = instrumentation.REGISTRY.stats()
+		self.assertEqual(stats["equation.matrix_solver"].calls, 1)
+		self.assertEqual(stats["equation.substance_element_makeups"].calls, 2) # Once per side
+		self.assertEqual(stats["stoichify.rounding"].calls, 1)
+		self.assertGreaterEqual(stats["equation.balance"].total_seconds, stats["equation.matrix_solver"].total_seconds)
+
+	def test_stage_hooks_and_prometheus(self):
+		registry = Stage_Registry(enabled=True)
+		finished = []
+		registry.add_hook(lambda name, seconds: finished.append(name))
+		for _ in range(2):
+			with registry.stage("parse"):
+				pass
+		self.assertEqual(finished, ["parse", "parse"])
+		self.assertEqual(registry.to_dict()["parse"]["calls"], 2)
+		self.assertIn('stoichify_stage_calls_total{stage="parse"} 2', registry.to_prometheus())
+
+class Test_Command_Line(unittest.TestCase):
+	def test_solve_problems_jsonl(self):
+		import io
+		stream = io.StringIO('{"equation": "Al + Cl2 -> AlCl3", "given_amount": 35, "given_measurement": "g", "given_substance": "Al", "wanted_measurement": "g", "wanted_substance": "AlCl3"}\n\n{"substance": "S", "given_amount": 4.2, "given_measurement": "mol", "wanted_measurement": "g"}\n')
+		results = list(solve_problems(read_problems(stream, "jsonl")))
+		self.assertEqual([result["answer"] for result in results], ["170 g AlCl₃", "130 g S"])
+		self.assertEqual(results[0]["balanced"], "2Al + 3Cl₂ → 2AlCl₃")
+
+	# Lines that aren't JSON objects are reported, and the rest still run
+	def test_solve_problems_jsonl_not_objects(self):
+		import io
+		stream = io.StringIO('42\n[1]\n"H2O"\n{"substance": "H2O"}\n')
+		results = list(solve_problems(read_problems(stream, "jsonl")))
+		self.assertEqual([result["error"] for result in results[:3]], [f"Problem Check: Line {number} isn't a JSON object." for number in (1, 2, 3)])
+		self.assertEqual(results[3]["balanced"], "H₂O")
+
+	def test_solve_problems_csv(self):
+		import io
+		stream = io.StringIO("equation,given_amount,given_measurement,given_substance,wanted_measurement,wanted_substance\nC3H8 + O2 -> CO2 + H2O,2.8,mol,C3H8,g,CO2\nSO2 + O2 -> SO3,,,,,\n")
+		output = io.StringIO()
+		write_results(solve_problems(read_problems(stream, "csv")), output, "csv")
+		lines = output.getvalue().splitlines()
+		self.assertEqual(len(lines), 3)
+		self.assertIn("370 g CO₂", lines[1])
+
+	# Significant figures are counted from the digits as typed (4.20 x 10^2 has 3, not the 4 of 420.0)
+	def test_solve_problems_significant_figures(self):
+		results = list(solve_problems([{"substance": "S", "given_amount": amount, "given_measurement": "mol", "wanted_measurement": "g"} for amount in ["4.20 x 10^2", "4.2e2", "0.0050"]]))
+		self.assertEqual([result["answer"] for result in results], ["13,500 g S", "13,000 g S", "0.16 g S"])
+
+	def test_solve_problems_errors_per_row(self):
+		results = list(solve_problems([{"equation": "H2O + 2 -> H2O"}, {"substance": "H2O", "given_amount": 2}, {"substance": "H2O"}]))
+		self.assertIn("error", results[0])
+		self.assertIn("error", results[1])
+		self.assertEqual(results[2]["balanced"], "H₂O")
+
+class Test_Service(unittest.TestCase):
+	def request(self, service, path, body=None):
+		import json
+		import urllib.error
+		import urllib.request
+		data = None if body is None else json.dumps(body).encode("utf-8")
+		try:
+			with urllib.request.urlopen(urllib.request.Request(f"http://127.0.0.1:{service.port}{path}", data=data, method="GET" if body is None else "POST")) as response:
+				return response.status, json.loads(response.read())
+		except urllib.error.HTTPError as error:
+			return error.code, json.loads(error.read())
+
+	def serve(self, test, **options):
+		import asyncio
+		async def run():
+			service = await Stoichify_Service(port=0, executor="thread", engine="integer", **options).start()
+			try:
+				return await test(service)
+			finally:
+				await service.close()
+		return asyncio.run(run())
+
+	def test_coalesces_duplicate_balances(self):
+		import asyncio
+		async def test(service):
+			records = await asyncio.gather(*[service.balance("Al + Cl2 -> AlCl3") for _ in range(20)])
+			await service.balance("Al + Cl2 -> AlCl3")
+			return records, service.stats
+		records, stats = self.serve(test)
+		self.assertEqual({record.balanced for record in records}, {"2Al + 3Cl₂ → 2AlCl₃"})
+		self.assertEqual((stats["balanced"], stats["coalesced"], stats["cached"]), (1, 19, 1))
+
+	def test_endpoints(self):
+		import asyncio
+		async def test(service):
+			return await asyncio.to_thread(lambda: [
+				self.request(service, "/balance", {"equation": "H2 + O2 -> H2O"}),
+				self.request(service, "/molar-mass", {"substance": "H2O"}),
+				self.request(service, "/stoichify", {"equation": "Al + Cl2 -> AlCl3", "given_amount": 35, "given_measurement": "g", "given_substance": "Al", "wanted_measurement": "g", "wanted_substance": "AlCl3"}),
+				self.request(service, "/stoichify", {"substance": "S", "given_amount": 4.2, "given_measurement": "mol", "wanted_measurement": "g"}),
+				self.request(service, "/health"),
+			])
+		balanced, molar_mass, stoichified, substance, health = self.serve(test)
+		self.assertEqual(balanced, (200, {"equation": "H2 + O2 -> H2O", "balanced": "2H₂ + 1O₂ → 2H₂O", "coefficients": {"H2": 2, "O2": 1, "H2O": 2}, "states": {}}))
+		self.assertEqual(molar_mass, (200, {"substance": "H₂O", "molar_mass": 18.015}))
+		self.assertEqual(stoichified[1]["answer"], "170 g AlCl₃")
+		self.assertEqual(substance[1]["answer"], "130 g S")
+		self.assertEqual(health[1]["status"], "ok")
+
+	def test_request_errors(self):
+		import asyncio
+		async def test(service):
+			return await asyncio.to_thread(lambda: [
+				self.request(service, "/balance", {"equation": "H2O + 2 -> H2O"}),
+				self.request(service, "/balance", {}),
+				self.request(service, "/missing", {}),
+				self.request(service, "/balance"),
+				self.request(service, "/molar-mass", {"substance": "Xy2"}),
+			])
+		statuses = [status for status, _ in self.serve(test)]
+		self.assertEqual(statuses, [400, 400, 404, 405, 400])
+
+	# The request that started a balance giving up doesn't take it away from the requests sharing it
+	def test_coalesced_balance_outlives_its_request(self):
+		import asyncio
+		import threading
+		async def test(service):
+			release = threading.Event()
+			busy = asyncio.get_running_loop().run_in_executor(service.executor, release.wait) # Hold the only worker
+			first = asyncio.create_task(service.balance("Al + Cl2 -> AlCl3"))
+			await asyncio.sleep(0)
+			second = asyncio.create_task(service.balance("Al + Cl2 -> AlCl3"))
+			await asyncio.sleep(0)
+			first.cancel()
+			release.set()
+			record = await second
+			await busy
+			await asyncio.sleep(0)
+			return first.cancelled(), record, service.in_flight, len(service.balanced)
+		cancelled, record, in_flight, cached = self.serve(test, workers=1)
+		self.assertTrue(cancelled)
+		self.assertEqual(record.balanced, "2Al + 3Cl₂ → 2AlCl₃")
+		self.assertEqual((in_flight, cached), ({}, 1))
+
+	# A Content-Length that isn't a number still gets an answer (and the connection is closed)
+	def test_bad_content_length(self):
+		import asyncio
+		async def test(service):
+			responses = []
+			for length in ["abc", "-5"]:
+				reader, writer = await asyncio.open_connection("127.0.0.1", service.port)
+				writer.write(f"POST /balance HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode("latin-1"))
+				await writer.drain()
+				responses.append(await reader.read())
+				writer.close()
+			return responses
+		for response in self.serve(test):
+			self.assertTrue(response.startswith(b"HTTP/1.1 400"))
+			self.assertIn(b"Connection: close", response)
+
+	# A request line longer than the reader's limit still gets an answer (and the connection is closed)
+	def test_request_line_too_long(self):
+		import asyncio
+		async def test(service):
+			reader, writer = await asyncio.open_connection("127.0.0.1", service.port)
+			writer.write(f"POST /{'a' * 100000} HTTP/1.1\r\n\r\n".encode("latin-1"))
+			await writer.drain()
+			response = await reader.read()
+			writer.close()
+			return response
+		response = self.serve(test)
+		self.assertTrue(response.startswith(b"HTTP/1.1 400"))
+		self.assertIn(b"Connection: close", response)
+
+	# Anything an endpoint didn't expect is a 500, not a dropped connection
+	def test_unexpected_errors(self):
+		import asyncio
+		async def test(service):
+			async def broken(service, body):
+				raise ValueError("broken")
+			service.ROUTES = dict(service.ROUTES, **{"/broken": broken})
+			return await asyncio.to_thread(lambda: [
+				self.request(service, "/stoichify", {"equation": [], "given_amount": 1}),
+				self.request(service, "/broken", {}),
+			])
+		(unhashable, _), (status, body) = self.serve(test)
+		self.assertEqual(unhashable, 400)
+		self.assertEqual(status, 500)
+		self.assertIn("broken", body["error"])
+
+	def test_back_pressure(self):
+		import asyncio
+		async def test(service):
+			service.active = 3 # As if 3 requests were being worked on (or waiting)
+			rejected = await asyncio.to_thread(self.request, service, "/molar-mass", {"substance": "H2O"})
+			service.active = 0
+			return rejected, service.stats["rejected"]
+		(status, body), rejected = self.serve(test, max_concurrency=2, max_queue=1)
+		self.assertEqual(status, 503)
+		self.assertIn("Service Check", body["error"])
+		self.assertEqual(rejected, 1)
+
+class Test_Live_Balancer(unittest.TestCase):
+	def test_matches_equation(self):
+		for equation in ["Al(s) + Cl2(g) -> AlCl3(s)", "C3H8 + O2 → CO2 + H2O(l)", "K4[Fe(SCN)6] + K2Cr2O7 + H2SO4 -> Fe2(SO4)3 + Cr2(SO4)3 + CO2 + H2O + K2SO4 + KNO3"]:
+			self.assertEqual(Live_Balancer().update(equation).balanced, Equation(equation, engine="integer").balanced)
+
+	def test_only_changed_substances_are_parsed(self):
+		balancer = Live_Balancer()
+		self.assertEqual(balancer.update("C3H8 + O2 -> CO2 + H2O").parsed, 4)
+		preview = balancer.update("C4H10 + O2 -> CO2 + H2O")
+		self.assertEqual((preview.balanced, preview.parsed), ("2C₄H₁₀ + 13O₂ → 8CO₂ + 10H₂O", 1))
+		preview = balancer.update("C4H10 + O2 -> CO2 + H2O(l) + N2")
+		self.assertEqual((preview.coefficients, preview.parsed), ([2, 13, 8, 10, 0], 1))
+		self.assertEqual(balancer.update("C3H8 + O2 -> CO2 + H2O").parsed, 0) # Seen before
+
+	# Substances typed and then deleted are forgotten once the cache is full
+	def test_counts_are_bounded(self):
+		balancer = Live_Balancer(cache_size=8)
+		for carbons in range(1, 30):
+			balancer.update(f"C{carbons}H{2 * carbons + 2} + O2 -> CO2 + H2O")
+		self.assertEqual(len(balancer.counts), 8)
+		self.assertEqual(balancer.update("CH4 + O2 -> CO2 + H2O").balanced, "1CH₄ + 2O₂ → 1CO₂ + 2H₂O")
+
+	def test_half_typed_equations(self):
+		balancer = Live_Balancer()
+		self.assertIn("Arrow Check", balancer.update("C3H8 + O2").error)
+		self.assertIn("Element Verification", balancer.update("C3H8 + O2 -> Co2 + Hx").error)
+		self.assertEqual(balancer.update("C3H8 + O2 -> CO2 + H2O").balanced, "1C₃H₈ + 5O₂ → 3CO₂ + 4H₂O")
+
+class Test_Background_Worker(unittest.TestCase):
+	def setUp(self):
+		class Window(): # Stands in for Tk, the main loop is run() below
+			def __init__(self):
+				self.scheduled = []
+			def after(self, milliseconds, function, *args):
+				self.scheduled.append((function, args))
+		self.window = Window()
+		self.worker = Background_Worker(self.window, poll_interval=1)
+		self.addCleanup(self.worker.shutdown)
+
+	def run_loop(self):
+		import time
+		while self.window.scheduled:
+			function, args = self.window.scheduled.pop(0)
+			function(*args)
+			time.sleep(0.001)
+
+	def test_result_comes_back_on_the_loop(self):
+		results = []
+		self.worker.submit(lambda: Equation("Al + Cl2 -> AlCl3").balanced, results.append)
+		self.assertTrue(self.worker.busy)
+		self.run_loop()
+		self.assertEqual(results, ["2Al + 3Cl₂ → 2AlCl₃"])
+		self.assertFalse(self.worker.busy)
+
+	def test_newer_job_supersedes(self):
+		import threading
+		release = threading.Event()
+		results = []
+		self.worker.submit(lambda: release.wait(5) and "old", results.append)
+		self.worker.submit(lambda: "new", results.append)
+		release.set()
+		self.run_loop()
+		self.assertEqual(results, ["new"])
+
+	def test_errors_and_cancel(self):
+		errors = []
+		results = []
+		self.worker.submit(lambda: Equation("H2O + 2 -> H2O"), results.append, errors.append)
+		self.run_loop()
+		self.assertEqual(results, [])
+		self.assertEqual(len(errors), 1)
+		self.worker.submit(lambda: "cancelled", results.append)
+		self.worker.cancel()
+		self.run_loop()
+		self.assertEqual(results, [])
+
 class Test_Precision(unittest.TestCase):
 	def __init__(self, *args, **kwargs):
 		super().__init__(*args, **kwargs)
@@ -307,6 +968,153 @@ class Test_Precision(unittest.TestCase):
 	def test_crazy_sig_figs(self):
 		self.assertEqual(Significant_Figures().parser(90845375987.0003), 15)
 
+	# Rounding arrays of numbers
+	def test_round_sig_array(self):
+		self.assertEqual(round_sig_array([15446.502406121414, 0.00123456, 0, -2.55e-7], 3).tolist(), [15400.0, 0.00123, 0.0, -2.55e-7])
+
+	# One significant figure per number, with the text written like Measured writes it
+	def test_round_sig_array_per_number(self):
+		rounded, text = round_sig_array([9.996, 4.515e23, 0, -0.0012345], [3, 2, 3, 2], formatted=True)
+		self.assertEqual(rounded.tolist(), [10.0, 4.5e23, 0.0, -0.0012])
+		self.assertEqual(text.tolist(), ["10.0", "4.5 × 10²³", "0.00", "-0.0012"])
+
+	# Halves go up (away from zero), just like Measured, and infinities pass through
+	def test_round_sig_array_half_up(self):
+		rounded, text = round_sig_array([2.5, -4.515, 4.515e23, float("inf"), 587110], [1, 3, 3, 3, 5], formatted=True)
+		self.assertEqual(rounded.tolist(), [3.0, -4.52, 4.52e23, float("inf"), 587110.0])
+		self.assertEqual(text.tolist(), [str(Measured("2.5", 1)), str(Measured("-4.515", 3)), "4.52 × 10²³", "inf", "587,110"])
+
+	# Reading whole lists of amounts, in every notation, with their significant figures
+	def test_parse_amounts(self):
+		values, figures = parse_amounts(["4.2 x 10^2", "4.2e2", "4.2*10^-27", "4.20", "0.0035", 150000000, 6.02e23])
+		self.assertEqual(values.tolist(), [420.0, 420.0, 4.2e-27, 4.2, 0.0035, 150000000.0, 6.02e23])
+		self.assertEqual(figures.tolist(), [2, 2, 2, 3, 2, 2, 3])
+
+	def test_parse_amounts_invalid(self):
+		with self.assertRaises(Exception):
+			parse_amounts(["4.2", "four"])
+
+	# A shorthand exponent starting with 10 isn't read as an expanded one
+	def test_to_float_shorthand_exponent(self):
+		self.assertEqual(Scientific_Handler("4.2e102").to_float(), 4.2e102)
+
+	#
+	# Testing Exact (Measured) Amounts
+	#
+
+	# Trailing zeros and exponents count, however they're typed
+	def test_measured_parse(self):
+		self.assertEqual(Measured.parse("4.20").significant_figures, 3)
+		self.assertEqual(Measured.parse("4.20 x 10^3"), Measured(4200, 3))
+		self.assertEqual(Measured.parse("9.3021e-27"), Measured("9.3021e-27", 5))
+		self.assertEqual(str(Measured.parse("6.02e23")), "6.02 × 10²³")
+
+	# Exact numbers keep the significant figures, other measurements keep the fewer
+	def test_measured_arithmetic(self):
+		amount = Measured.parse("4.20") / 22.4 * 22.4
+		self.assertEqual(amount, Measured("4.20", 3))
+		self.assertEqual((amount * Measured.parse("2.0")).significant_figures, 2)
+
+	# Always half up (even past what a float can hold), carrying into the next place
+	def test_measured_rounding(self):
+		self.assertEqual(str(Measured("4.515e23", 3)), "4.52 × 10²³")
+		self.assertEqual(str(Measured("9.996", 3)), "10.0")
+		self.assertEqual(str(Measured("1", 3)), "1.00")
+		self.assertEqual(str(Measured("-0.0995", 2)), "-0.10")
+
+	# The exact answer comes back alongside its text
+	def test_measured_solve(self):
+		result = solve(Equation("C3H8 + O2 -> CO2 + H2O"), "4.20", 3, "L", "C3H8", "r.p.", "H2O", show_work=False)
+		self.assertEqual(result.value, Measured("4.52e23", 3))
+		self.assertEqual(result.answer, "4.52 × 10²³ r.p. H₂O")
+
+	# Big numbers keep their exponent, even rounded to one significant figure
+	def test_measured_solve_one_figure(self):
+		result = solve(Equation("C3H8 + O2 -> CO2 + H2O"), "6.02e23", 1, "g", "C3H8", "g", "H2O", show_work=False)
+		self.assertEqual(result.answer, "1 × 10²⁴ g H₂O")
+
+	# The answer is written from the exact amount, small ones and trailing zeros included
+	def test_measured_solve_answer_text(self):
+		equation = Equation("H2 + O2 -> H2O")
+		self.assertEqual(equation.stoichify("0.0100", 3, "g", "H2O", "mol", "H2O").answer, "0.000555 mol H₂O")
+		self.assertEqual(equation.stoichify("5.00", 3, "mg", "H2", "mol", "H2").answer, "0.00248 mol H₂")
+		self.assertEqual(equation.stoichify("2.50e-3", 3, "mol", "H2", "g", "H2O").answer, "0.0450 g H₂O")
+
+class Test_Periodic_Table(unittest.TestCase):
+	def test_table_built_once(self):
+		self.assertIs(periodic_table(), periodic_table())
+
+	def test_table_read_only(self):
+		with self.assertRaises(TypeError):
+			periodic_table()["Xx"] = None
+
+	def test_is_element(self):
+		self.assertTrue(is_element("Fe"))
+		self.assertFalse(is_element("Py"))
+
+	def test_atomic_number(self):
+		self.assertEqual(atomic_number("O"), 8)
+
+	def test_atomic_mass_unknown(self):
+		with self.assertRaises(Exception):
+			atomic_mass("Py")
+
+	def test_atomic_masses_match_chemlib(self):
+		from chemlib import Element
+		for symbol in periodic_table():
+			self.assertEqual(atomic_mass(symbol), Element(symbol).properties['AtomicMass'])
+
+class Test_Startup(unittest.TestCase):
+	def test_import_is_lazy(self):
+		import subprocess, sys, os
+		code = "import sys, entities; print(','.join(module for module in ('sympy', 'chemlib', 'pandas') if module in sys.modules))"
+		output = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True)
+		self.assertEqual(output.stdout.strip(), "")
+
+class Test_Caching(unittest.TestCase):
+	def test_lru_evicts_least_recently_used(self):
+		cache = LRU_Cache(maxsize=2)
+		cache.put("H2O", 1)
+		cache.put("CO2", 2)
+		cache.get("H2O")
+		cache.put("O2", 3)
+		self.assertIn("H2O", cache)
+		self.assertNotIn("CO2", cache)
+
+	def test_lru_stats(self):
+		cache = LRU_Cache(maxsize=2)
+		cache.get_or_compute("H2O", len)
+		cache.get_or_compute("H2O", len)
+		self.assertEqual(tuple(cache.info()), (1, 1, 2, 1))
+
+	def test_lru_resize(self):
+		cache = LRU_Cache(maxsize=3)
+		for key in ["H2O", "CO2", "O2"]:
+			cache.put(key, key)
+		cache.resize(1)
+		self.assertEqual(len(cache), 1)
+		self.assertIn("O2", cache)
+
+	def test_composition_canonical_formula(self):
+		self.assertEqual(composition("2H₂O").formula, "H2O")
+		self.assertEqual(composition("(NH4)2SO4").counts, (("N", 2), ("H", 8), ("S", 1), ("O", 4)))
+
+	def test_composition_cache_shared(self):
+		COMPOSITION_CACHE.clear()
+		Substance("H2O").molar_mass()
+		Substance("3H₂O").molar_mass()
+		self.assertEqual(COMPOSITION_CACHE.info().hits, 1)
+		self.assertEqual(COMPOSITION_CACHE.info().currsize, 1)
+
+	def test_composition_vector(self):
+		vector = Substance("Fe2(SO4)3").element_vector()
+		self.assertEqual((vector[26], vector[16], vector[8], sum(vector)), (2, 3, 12, 17))
+		self.assertEqual(len(vector), len(atomic_mass_vector()))
+
+	def test_composition_molar_mass_exact(self):
+		self.assertEqual(Substance("Mg(OH)2").molar_mass(), 58.319)
+		self.assertEqual(Substance("CuSO4·5H2O").molar_mass(), 249.682)
+
 #
 # Fixes made along the way
 #   However, I did testing last, which was a big mistake. I made dozens 
@@ -0,0 +1,262 @@
+#
+# Every measurement Stoichify can convert between, as a graph: each unit is a
+# node, and each conversion (e.g. 1 mol is 22.4 L, or 1 g is 1000 mg) is an edge
+# that works both ways. Some edges depend on the substance (1 mol of it is its
+# molar mass in grams), and some units are read from their names whenever they're
+# asked for (a gas at any temperature and pressure, or a solution of any volume),
+# without ever being added to the graph. Getting from one unit to another finds the
+# shortest path through the graph, once per (from, to, substance), and keeps the
+# most recent ones, so adding a unit never touches Stoichify.
+#
+# Main Libraries:
+# - fractions: Fraction (Exact conversion factors).
+# - caching: LRU_Cache (The paths found so far).
+# - formula: composition (Molar masses and atom counts).
+#
+
+from collections import namedtuple, deque
+from decimal import Decimal
+from fractions import Fraction
+import re
+import threading
+
+from caching import LRU_Cache
+from formula import composition
+from precision import exact
+from steps import Quantity, Conversion_Factor
+
+STP = 22.4 # Standard Temperature and Pressure (L/mol)
+AVOGADRO = 6.02e23 # Avogadro's number (particles/mol)
+GAS_CONSTANT = Fraction("8.31446261815324") / Fraction("101.325") # The ideal gas constant (L·atm/(mol·K)), exact
+
+# One of the unit is amount of the other (a number, or a function of the substance's formula that gives it)
+Conversion = namedtuple("Conversion", ["unit", "other", "amount"])
+
+# A positive decimal number in a unit's name (e.g. 298.15, 1, or .25)
+DECIMAL = r"(\d+(?:\.\d*)?|\.\d+)"
+
+# The way from one unit to another: the exact factor (how many of the other unit one of the first is), and the steps to show
+Conversion_Path = namedtuple("Conversion_Path", ["factor", "steps"])
+
+class Unit_Graph():
+	"""
+	The units, and the conversions between them. Paths are found with a breadth first search
+	(the fewest conversions), and kept by (from, to, substance) until a conversion is added.
+	"""
+
+	def __init__(self, cache_size=4096):
+		"""
+		:param cache_size: How many paths to keep.
+		"""
+
+		self.units = {} # Each unit, and its conversions (unit: [(neighbour, conversion)])
+		self.families = [] # (pattern, factory) of the units read from their names
+		self.paths = LRU_Cache(maxsize=cache_size)
+		self.lock = threading.Lock()
+
+	def __contains__(self, unit):
+		try:
+			return self.resolve(unit) is not None
+		except Exception: # A unit from a family, that can't be (e.g. a gas at 0 K)
+			return False
+
+	def names(self):
+		"""
+		:return: The names of the units, in the order they were added (e.g. for a dropdown).
+		"""
+
+		return list(self.units)
+
+	def add_conversion(self, unit, other, amount):
+		"""
+		Connects two units (both ways), adding them if they're new. Every unit has to be
+		connected to mol somehow, which is what Stoichify bridges substances with.
+
+		:param unit: The unit to convert from (e.g. "g").
+		:param other: The unit to convert to (e.g. "mg").
+		:param amount: How many of the other unit one of the unit is (e.g. 1 g is 1000 mg), or a function
+		of the substance's formula that gives it (e.g. its molar mass, for 1 mol in g).
+		"""
+
+		with self.lock:
+			conversion = Conversion(unit, other, amount)
+			self.units.setdefault(unit, []).append((other, conversion))
+			self.units.setdefault(other, []).append((unit, conversion))
+			self.paths.clear() # A new conversion can make a shorter path
+
+	def add_family(self, pattern, factory):
+		"""
+		Adds units that are read from their names whenever they're asked for. They're never
+		added to the graph (there's no end to them), only their paths are kept (see path).
+
+		:param pattern: A regular expression matching the names of the units.
+		:param factory: Called with the match, gives the unit's Conversion (to a unit in the graph).
+		"""
+
+		self.families.append((re.compile(pattern), factory))
+
+	def family_conversion(self, unit):
+		"""
+		:param unit: The name of the unit.
+		:return: The Conversion of the unit, if it's from a family (None if it isn't).
+		"""
+
+		for pattern, factory in self.families:
+			match = pattern.fullmatch(unit)
+			if match:
+				return factory(match)
+		return None
+
+	def resolve(self, unit):
+		"""
+		:param unit: The name of the unit.
+		:return: The name of the unit, or None if it isn't known (neither in the graph, nor from a family).
+		"""
+
+		if not isinstance(unit, str):
+			return None
+		if unit in self.units or self.family_conversion(unit) is not None:
+			return unit
+		return None
+
+	def path(self, unit, other, substance):
+		"""
+		:param unit: The unit to convert from.
+		:param other: The unit to convert to.
+		:param substance: The formula of the substance (without its coefficient).
+		:return: The Conversion_Path from the unit to the other.
+		"""
+
+		key = (unit, other, substance)
+		path = self.paths.get(key)
+		if path is None:
+			path = self.find_path(unit, other, substance)
+			self.paths.put(key, path)
+		return path
+
+	def find_path(self, unit, other, substance):
+		"""
+		Finds the path with the fewest conversions between two units (see path, which keeps them).
+		"""
+
+		# Units from a family are only connected for this search
+		family = {}
+		for name in (unit, other):
+			if name in self.units:
+				continue
+			conversion = self.family_conversion(name) if isinstance(name, str) else None
+			if conversion is None:
+				raise Exception(f"Measurement Check: '{name}' isn't a measurement Stoichify knows ({', '.join(self.units)}).")
+			family.setdefault(conversion.unit, []).append((conversion.other, conversion))
+			family.setdefault(conversion.other, []).append((conversion.unit, conversion))
+
+		# Breadth first, remembering how each unit was reached
+		reached = {unit: None}
+		queue = deque([unit])
+		while queue and other not in reached:
+			current = queue.popleft()
+			for neighbour, conversion in self.units.get(current, []) + family.get(current, []):
+				if neighbour not in reached:
+					reached[neighbour] = (current, conversion)
+					queue.append(neighbour)
+		if other not in reached:
+			raise Exception(f"Measurement Check: There's no way to convert {unit} to {other}.")
+
+		# Walk back from the other unit, multiplying the factors and making the steps
+		factor = Fraction(1)
+		steps = []
+		current = other
+		while reached[current] is not None:
+			previous, conversion = reached[current]
+			amount = conversion.amount(substance) if callable(conversion.amount) else conversion.amount
+			shown = float(f"{float(amount):.5g}") if isinstance(amount, Fraction) else amount # Exact factors are shown to 5 significant figures
+			if conversion.unit == previous: # 1 unit is amount other, so multiply by (amount other / 1 unit)
+				factor *= exact(amount)
+				steps.append(Conversion_Factor(Quantity(shown, conversion.other, substance), Quantity(1, conversion.unit, substance)))
+			else:
+				factor /= exact(amount)
+				steps.append(Conversion_Factor(Quantity(1, conversion.unit, substance), Quantity(shown, conversion.other, substance)))
+			current = previous
+		return Conversion_Path(factor, tuple(reversed(steps)))
+
+def molar_mass(substance):
+	"""
+	:param substance: The formula of the substance.
+	:return: The molar mass of the substance (g/mol).
+	"""
+
+	return composition(substance).molar_mass
+
+def atom_count(substance):
+	"""
+	:param substance: The formula of the substance.
+	:return: How many atoms one molecule (or formula unit) of the substance has.
+	"""
+
+	return sum(count for _, count in composition(substance).counts)
+
+def gas_volume(temperature, pressure):
+	"""
+	:param temperature: The temperature of the gas (K).
+	:param pressure: The pressure of the gas (atm).
+	:return: The name of the unit of liters of an ideal gas at the temperature and pressure (e.g. "L (298.15 K, 1 atm)").
+	"""
+
+	unit = f"L ({decimal_text(temperature)} K, {decimal_text(pressure)} atm)"
+	if UNITS.resolve(unit) is None:
+		raise Exception(f"Measurement Check: A gas needs a temperature and pressure above 0 (not {temperature} K and {pressure} atm).")
+	return unit
+
+def molarity(volume):
+	"""
+	:param volume: The volume of the solution (L).
+	:return: The name of the unit of molarity of a solution with the volume (e.g. "M (0.25 L)").
+	"""
+
+	unit = f"M ({decimal_text(volume)} L)"
+	if UNITS.resolve(unit) is None:
+		raise Exception(f"Measurement Check: A solution needs a volume above 0 (not {volume} L).")
+	return unit
+
+def decimal_text(number):
+	"""
+	:param number: An int, float, Decimal, or string.
+	:return: The number written out in full, as a unit's name needs it (e.g. 298.1523 or 0.00001, never 1e-05).
+	"""
+
+	return format(Decimal(repr(number) if isinstance(number, float) else number), "f")
+
+def gas_volume_conversion(match):
+	"""
+	Liters of an ideal gas at a temperature and pressure, from PV = nRT (1 mol is RT/P L).
+	"""
+
+	temperature, pressure = Fraction(match.group(1)), Fraction(match.group(2))
+	if temperature <= 0 or pressure <= 0:
+		raise Exception(f"Measurement Check: A gas needs a temperature and pressure above 0 (not {match.group(0)}).")
+	return Conversion("mol", match.group(0), GAS_CONSTANT * temperature / pressure)
+
+def molarity_conversion(match):
+	"""
+	The molarity of a solution of a volume (1 M is the volume's worth of moles).
+	"""
+
+	volume = Fraction(match.group(1))
+	if volume <= 0:
+		raise Exception(f"Measurement Check: A solution needs a volume above 0 (not {match.group(0)}).")
+	return Conversion(match.group(0), "mol", volume)
+
+# The units Stoichify knows, out of the box (in the order they're listed)
+UNITS = Unit_Graph()
+UNITS.add_conversion("mol", "g", molar_mass)
+UNITS.add_conversion("mol", "L", STP) # A gas at STP
+UNITS.add_conversion("mol", "r.p.", AVOGADRO) # Representative particles
+UNITS.add_conversion("g", "mg", 1000)
+UNITS.add_conversion("kg", "g", 1000)
+UNITS.add_conversion("mol", "mmol", 1000)
+UNITS.add_conversion("kmol", "mol", 1000)
+UNITS.add_conversion("L", "mL", 1000)
+UNITS.add_conversion("r.p.", "molecules", 1)
+UNITS.add_conversion("r.p.", "atoms", atom_count)
+UNITS.add_family(rf"L \({DECIMAL} K, {DECIMAL} atm\)", gas_volume_conversion)
+UNITS.add_family(rf"M \({DECIMAL} L\)", molarity_conversion)
@@ -0,0 +1,105 @@
+#
+# Balancing a big equation (or the very first one, which also has to load sympy)
+# can take long enough that the whole window freezes, since Tk can only redraw
+# between callbacks. This module runs that work on a background thread instead, and
+# checks on it from Tk's own loop (with window.after), so the results (and errors)
+# are always handed back on the main thread, where it's safe to touch widgets.
+# Every job gets a generation number, and submitting a new one supersedes whatever
+# was still pending: its result is thrown away, instead of showing up late.
+#
+# Main Libraries:
+# - concurrent.futures: ThreadPoolExecutor (The background thread).
+#
+
+from concurrent.futures import ThreadPoolExecutor
+
+class Background_Worker():
+	"""
+	Runs one job at a time off of the main thread. Only the newest job's callbacks are
+	ever called, and always from the window's loop. Nothing here touches Tk itself,
+	other than window.after, so any object with an after(milliseconds, function, *args) works.
+	"""
+
+	def __init__(self, window, poll_interval=25):
+		"""
+		:param window: The Tk window (or anything with an after method) to call the callbacks from.
+		:param poll_interval: How often (in milliseconds) a running job is checked on.
+		"""
+
+		self.window = window
+		self.poll_interval = poll_interval
+		self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stoichify-worker") # Jobs run in order, so a superseded one that hasn't started is just skipped
+		self.generation = 0 # Bumped by every submit (and cancel), only the current generation is answered
+		self.pending = None
+
+	@property
+	def busy(self):
+		"""
+		:return: Whether the newest job is still running (or waiting to run).
+		"""
+
+		return self.pending is not None
+
+	def submit(self, function, on_done, on_error=None):
+		"""
+		Runs the function in the background, superseding any job that's still pending.
+
+		:param function: The work to do (it must not touch any widgets).
+		:param on_done: Called with the function's result, from the window's loop.
+		:param on_error: Called with the exception, if the function raised one (from the window's loop).
+		:return: The generation of the job.
+		"""
+
+		self.cancel()
+		future = self.executor.submit(function)
+		self.pending = future
+		self.window.after(self.poll_interval, self.poll, future, self.generation, on_done, on_error)
+		return self.generation
+
+	def prepare(self, function):
+		"""
+		Runs the function in the background, without any callbacks (e.g. loading a library ahead of time).
+		It doesn't supersede anything, it just takes its turn.
+
+		:param function: The work to do.
+		"""
+
+		self.executor.submit(function)
+
+	def cancel(self):
+		"""
+		Supersedes the pending job (if any), its callbacks will never be called.
+		"""
+
+		self.generation += 1
+		if self.pending is not None:
+			self.pending.cancel() # Only stops it if it hasn't started yet, otherwise its result is ignored
+			self.pending = None
+
+	def poll(self, future, generation, on_done, on_error):
+		"""
+		Checks on a job, calling its callback once it's done (or checking again later).
+		"""
+
+		if generation != self.generation: # Superseded
+			return
+		if not future.done():
+			self.window.after(self.poll_interval, self.poll, future, generation, on_done, on_error)
+			return
+
+		self.pending = None
+		error = future.exception()
+		if error is None:
+			on_done(future.result())
+		elif on_error is not None:
+			on_error(error)
+		else:
+			raise error
+
+	def shutdown(self):
+		"""
+		Supersedes the pending job, and stops the background thread once it's free.
+		"""
+
+		self.cancel()
+		self.executor.shutdown(wait=False, cancel_futures=True)